@@ -0,0 +1,14 @@
+"""
+Suíte de benchmarks do site público e da API de rastreamento
+
+Uso:
+    python -m benchmarks.executar --modo processo --saida resultados/base.json
+    python -m benchmarks.executar --modo http --url http://127.0.0.1:8000 --saida resultados/http.json
+    python -m benchmarks.comparar resultados/base.json resultados/novo.json
+
+No modo "processo" um banco de teste descartável é criado e populado com
+dados determinísticos (core.seeding, o mesmo gerador do comando
+seed_scale), e as requisições passam pelo cliente de testes do Django, o
+que permite contar consultas por requisição.
+No modo "http" as requisições vão para um servidor já em execução.
+"""
@@ -0,0 +1,130 @@
+"""
+Mede as ações em massa do admin de postagens e vídeos
+
+    python -m benchmarks.acoes_admin --selecao 1000 --saida benchmarks/acoes_admin.json
+
+Cria um banco de teste com postagens e vídeos determinísticos e executa
+cada ação sobre a seleção informada, contando tempo e consultas (a
+atualização das relacionadas, disparada após o commit, entra na conta).
+Para comparação, a duplicação e a publicação também são feitas linha a
+linha com save(), como as ações faziam antes.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+
+def medir_acao(funcao):
+    """Executa a ação e retorna (segundos, consultas)"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+    return round(duracao, 3), len(consultas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark das ações em massa do admin')
+    parser.add_argument('--selecao', type=int, default=1000, help='Linhas selecionadas em cada ação')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--sem-referencia', action='store_true', help='Não mede a versão linha a linha')
+    parser.add_argument('--rotulo', default='', help='Identificação livre da execução (ex: hash do commit)')
+    parser.add_argument('--saida', default='benchmarks/acoes_admin.json')
+    args = parser.parse_args(argv)
+
+    from django.contrib import admin
+    from django.contrib.auth.models import User
+    from django.contrib.messages.storage.cookie import CookieStorage
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import setup_test_environment
+    from django.utils import timezone
+
+    from core.models import Postagem, Video
+    from core.seeding import semear
+
+    setup_test_environment()
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        semear(args.selecao, args.selecao, 0, args.semente)
+        Postagem.objects.update(status='publicado')
+
+        requisicao = RequestFactory().post('/admin/')
+        requisicao.user = User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+        requisicao._messages = CookieStorage(requisicao)
+        postagens = admin.site._registry[Postagem]
+        videos = admin.site._registry[Video]
+
+        originais = list(Postagem.objects.order_by('pk').values_list('pk', flat=True))
+        copias = lambda: Postagem.objects.exclude(pk__in=originais)  # noqa: E731
+
+        acoes = [
+            ('postagem.duplicar', lambda: postagens.duplicar_postagem(requisicao, Postagem.objects.filter(pk__in=originais))),
+            ('postagem.publicar', lambda: postagens.publicar_postagens(requisicao, copias())),
+            ('postagem.agendar_para_hoje', lambda: postagens.agendar_para_hoje(requisicao, copias())),
+            ('postagem.marcar_como_rascunho', lambda: postagens.marcar_como_rascunho(requisicao, copias())),
+            ('postagem.excluir', lambda: postagens.delete_queryset(requisicao, copias())),
+            ('video.agendar_para_hoje', lambda: videos.agendar_para_hoje(requisicao, Video.objects.all())),
+            ('video.excluir', lambda: videos.delete_queryset(requisicao, Video.objects.all())),
+        ]
+
+        def duplicar_por_linha():
+            for obj in Postagem.objects.filter(pk__in=originais):
+                obj.pk = None
+                obj.titulo = f'[CÓPIA] {obj.titulo}'[:200]
+                obj.status = 'rascunho'
+                obj.data_publicacao = timezone.now()
+                obj.save()
+
+        def publicar_por_linha():
+            for obj in copias():
+                obj.status = 'publicado'
+                obj.save()
+
+        if not args.sem_referencia:
+            acoes += [
+                ('referencia.duplicar_por_linha', duplicar_por_linha),
+                ('referencia.publicar_por_linha', publicar_por_linha),
+            ]
+
+        resultados = {}
+        for nome, acao in acoes:
+            segundos, consultas = medir_acao(acao)
+            resultados[nome] = {'segundos': segundos, 'consultas': consultas}
+            print(f'✅ {nome}: {segundos:.3f}s, {consultas} consultas')
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+    saida = {
+        'meta': {
+            'rotulo': args.rotulo,
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'banco': connection.vendor,
+            'selecao': args.selecao,
+        },
+        'acoes': resultados,
+    }
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.saida).write_text(json.dumps(saida, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'📄 Resultados salvos em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
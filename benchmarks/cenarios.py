@@ -0,0 +1,98 @@
+"""
+Cenários de requisição medidos pelos benchmarks
+Cada cenário recebe os alvos disponíveis (ids e páginas) e o gerador
+pseudoaleatório, e devolve (método, caminho, corpo JSON ou None)
+"""
+import json
+
+
+def _home(alvos, rng):
+    return 'GET', '/', None
+
+
+def _postagem_list(alvos, rng):
+    categoria, pagina = rng.choice(alvos['paginas'])
+    parametros = [f'page={pagina}']
+    if categoria:
+        parametros.insert(0, f'categoria={categoria}')
+    return 'GET', '/postagens/?' + '&'.join(parametros), None
+
+
+def _postagem_detail(alvos, rng):
+    return 'GET', f'/postagens/{rng.choice(alvos["postagens"])}/', None
+
+
+def _video_list(alvos, rng):
+    return 'GET', f'/videos/?page={rng.randint(1, alvos["paginas_videos"])}', None
+
+
+# A API de rastreamento ignora robôs, então os cenários se apresentam como navegador
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+
+def _track_view(alvos, rng):
+    # Lote como o enviado pelo rastreador (página atual + pendentes)
+    corpo = [
+        {
+            'tipo_conteudo': 'postagem',
+            'conteudo_id': rng.choice(alvos['postagens']),
+            'conteudo_titulo': 'Benchmark',
+            'tempo_visualizacao': rng.randint(1, 300),
+            'scroll_profundidade': rng.randint(0, 100),
+        }
+        for _ in range(rng.randint(1, 3))
+    ]
+    return 'POST', '/api/track-view/', json.dumps(corpo)
+
+
+CENARIOS = (
+    ('home', _home),
+    ('postagem_list', _postagem_list),
+    ('postagem_detail', _postagem_detail),
+    ('video_list', _video_list),
+    ('track_view', _track_view),
+)
+
+
+def alvos_do_banco():
+    """Monta os alvos a partir do banco atual (modo processo)"""
+    from math import ceil
+    from django.db.models import Count
+    from core.models import Postagem, Video
+    from core.views import PostagemListView, VideoListView
+
+    publicadas = Postagem.objects.filter(status='publicado')
+    paginas = [('', pagina) for pagina in range(1, ceil(publicadas.count() / PostagemListView.paginate_by) + 1)]
+    for linha in publicadas.values('categoria').annotate(total=Count('pk')):
+        total_paginas = ceil(linha['total'] / PostagemListView.paginate_by)
+        paginas.extend((linha['categoria'], pagina) for pagina in range(1, total_paginas + 1))
+
+    return {
+        'postagens': list(publicadas.values_list('pk', flat=True)),
+        'paginas': paginas or [('', 1)],
+        'paginas_videos': max(1, ceil(Video.objects.count() / VideoListView.paginate_by)),
+    }
+
+
+def alvos_do_sitemap(sessao, url_base):
+    """Monta os alvos a partir do sitemap.xml de um servidor em execução (modo http)"""
+    import re
+    from math import ceil
+    from xml.etree import ElementTree
+    from core.models import Postagem
+    from core.views import PostagemListView
+
+    resposta = sessao.get(f'{url_base}/sitemap.xml', timeout=30)
+    resposta.raise_for_status()
+    namespace = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+    urls = [loc.text for loc in ElementTree.fromstring(resposta.content).iter(f'{namespace}loc')]
+
+    postagens = [int(m.group(1)) for url in urls if (m := re.search(r'/postagens/(\d+)/$', url))]
+    paginas_videos = max([1] + [int(m.group(1)) for url in urls if (m := re.search(r'/videos/\?page=(\d+)', url))])
+    paginas = [('', pagina) for pagina in range(1, ceil(len(postagens) / PostagemListView.paginate_by) + 1)]
+    paginas.extend((categoria, 1) for categoria, _ in Postagem.CATEGORIA_CHOICES)
+
+    if not postagens:
+        raise RuntimeError('Nenhuma postagem publicada encontrada no sitemap')
+
+    return {'postagens': postagens, 'paginas': paginas, 'paginas_videos': paginas_videos}
@@ -0,0 +1,73 @@
+"""
+Compara dois arquivos de resultados e aponta regressões
+
+    python -m benchmarks.comparar base.json novo.json --tolerancia 0.10
+
+Sai com código 1 se algum cenário piorar além da tolerância.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Métricas comparadas: (chave, maior é melhor)
+METRICAS = (
+    ('req_s', True),
+    ('p50_ms', False),
+    ('p95_ms', False),
+    ('p99_ms', False),
+    ('consultas_media', False),
+)
+
+
+def comparar(base, novo, tolerancia):
+    """
+    Returns:
+        Lista de (cenário, métrica, valor base, valor novo, variação, regressão)
+    """
+    linhas = []
+    for cenario, metricas_base in base['cenarios'].items():
+        metricas_novo = novo['cenarios'].get(cenario)
+        if metricas_novo is None:
+            continue
+        for chave, maior_melhor in METRICAS:
+            antes, depois = metricas_base.get(chave), metricas_novo.get(chave)
+            if not antes or depois is None:
+                continue
+            variacao = (depois - antes) / antes
+            if chave == 'consultas_media':
+                # Consultas são determinísticas: qualquer aumento é regressão
+                regressao = depois > antes
+            else:
+                regressao = -variacao > tolerancia if maior_melhor else variacao > tolerancia
+            linhas.append((cenario, chave, antes, depois, variacao, regressao))
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara dois resultados de benchmark')
+    parser.add_argument('base')
+    parser.add_argument('novo')
+    parser.add_argument('--tolerancia', type=float, default=0.10, help='Variação aceita (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    base = json.loads(Path(args.base).read_text(encoding='utf-8'))
+    novo = json.loads(Path(args.novo).read_text(encoding='utf-8'))
+    if base['meta'].get('modo') != novo['meta'].get('modo'):
+        print('⚠️  Os resultados foram gerados em modos diferentes')
+
+    linhas = comparar(base, novo, args.tolerancia)
+    for cenario, chave, antes, depois, variacao, regressao in linhas:
+        marcador = '❌' if regressao else '  '
+        print(f'{marcador} {cenario:<16} {chave:<16} {antes:>10} → {depois:<10} ({variacao:+.1%})')
+
+    regressoes = [linha for linha in linhas if linha[5]]
+    if regressoes:
+        print(f'\n❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}')
+        return 1
+    print('\n✅ Nenhuma regressão encontrada')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
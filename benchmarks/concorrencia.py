@@ -0,0 +1,89 @@
+"""
+Compara a capacidade sob concorrência de servidores ASGI e WSGI
+
+    uvicorn config.asgi:application --port 8001 --workers 1
+    gunicorn config.wsgi:application --bind 127.0.0.1:8000 --workers 1
+    python -m benchmarks.concorrencia --servidor asgi=http://127.0.0.1:8001 \\
+        --servidor wsgi=http://127.0.0.1:8000 --niveis 1 8 32 64
+
+Para cada servidor e nível de concorrência executa os cenários do modo http
+de benchmarks.executar e grava req/s e latências. Use o mesmo número de
+workers nos dois servidores; a diferença aparece quando as views esperam
+I/O (ex: a API do YouTube na home com "Usar Inscritos Automático" ligado).
+As mesmas observações do modo http sobre o limite de taxa por IP valem aqui.
+"""
+import argparse
+import json
+import platform
+import random
+import time
+from pathlib import Path
+
+from benchmarks.executar import executar_http
+
+import django  # noqa: E402  (configurado por benchmarks.executar)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Capacidade sob concorrência: ASGI x WSGI')
+    parser.add_argument(
+        '--servidor', action='append', required=True,
+        help='rotulo=url de um servidor em execução (pode ser repetido)',
+    )
+    parser.add_argument('--niveis', type=int, nargs='+', default=[1, 8, 32, 64], help='Requisições simultâneas')
+    parser.add_argument('--cenarios', nargs='*', default=['home', 'track_view'])
+    parser.add_argument('--requisicoes', type=int, default=200, help='Requisições medidas por cenário e nível')
+    parser.add_argument('--aquecimento', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--rotulo', default='', help='Identificação livre da execução (ex: hash do commit)')
+    parser.add_argument('--saida', default='benchmarks/concorrencia.json')
+    args = parser.parse_args(argv)
+
+    servidores = {}
+    for servidor in args.servidor:
+        rotulo, separador, url = servidor.partition('=')
+        if not separador:
+            parser.error(f'Servidor inválido: {servidor} (use rotulo=url)')
+        servidores[rotulo] = url
+
+    resultados = {}
+    for rotulo, url in servidores.items():
+        resultados[rotulo] = {}
+        for nivel in args.niveis:
+            print(f'\n🚀 {rotulo} ({url}) com concorrência {nivel}')
+            execucao = argparse.Namespace(
+                url=url, cenarios=args.cenarios, requisicoes=args.requisicoes,
+                aquecimento=args.aquecimento, concorrencia=nivel,
+            )
+            _, resultados[rotulo][nivel] = executar_http(execucao, random.Random(args.semente))
+
+    print()
+    for cenario in args.cenarios:
+        print(f'{cenario}:')
+        for nivel in args.niveis:
+            colunas = '  '.join(
+                f'{rotulo} {resultados[rotulo][nivel][cenario]["req_s"]:>8} req/s '
+                f'{resultados[rotulo][nivel][cenario]["p95_ms"]:>8} ms p95'
+                for rotulo in servidores
+                if cenario in resultados[rotulo][nivel]
+            )
+            print(f'   {nivel:>4}  {colunas}')
+
+    saida = {
+        'meta': {
+            'rotulo': args.rotulo,
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'servidores': servidores,
+            'requisicoes': args.requisicoes,
+        },
+        'resultados': resultados,
+    }
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.saida).write_text(json.dumps(saida, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'📄 Resultados salvos em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Executa os cenários e grava os resultados em JSON
+
+    python -m benchmarks.executar --modo processo --requisicoes 200 --saida base.json
+    python -m benchmarks.executar --modo http --url http://127.0.0.1:8000 --concorrencia 8
+
+No modo http todas as requisições saem do mesmo IP: aumente RASTREAMENTO_RAJADA_IP
+e RASTREAMENTO_LIMITE_IP no servidor medido, ou o cenário track_view recebe 429
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from benchmarks.cenarios import CENARIOS, USER_AGENT, alvos_do_banco, alvos_do_sitemap  # noqa: E402
+
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    indice = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+def resumir(tempos, duracao_total, consultas, erros):
+    """Consolida as amostras de um cenário (tempos em segundos)"""
+    ordenados = sorted(tempos)
+    resumo = {
+        'requisicoes': len(tempos),
+        'erros': erros,
+        'req_s': round(len(tempos) / duracao_total, 2) if duracao_total else None,
+        'p50_ms': round(percentil(ordenados, 50) * 1000, 2),
+        'p95_ms': round(percentil(ordenados, 95) * 1000, 2),
+        'p99_ms': round(percentil(ordenados, 99) * 1000, 2),
+        'consultas_media': None,
+        'consultas_max': None,
+    }
+    if consultas:
+        resumo['consultas_media'] = round(sum(consultas) / len(consultas), 2)
+        resumo['consultas_max'] = max(consultas)
+    return resumo
+
+
+def executar_processo(args, rng):
+    """Cria um banco de teste, popula com dados determinísticos e mede via cliente de testes"""
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+    from core.seeding import semear
+
+    setup_test_environment()
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        contagens = semear(args.postagens, args.videos, args.visualizacoes, args.semente, lote=5000)
+        alvos = alvos_do_banco()
+        cache.clear()
+
+        resultados = {}
+        for nome, cenario in CENARIOS:
+            if args.cenarios and nome not in args.cenarios:
+                continue
+            client = Client(HTTP_USER_AGENT=USER_AGENT)
+            tempos, consultas, erros = [], [], 0
+            for indice in range(args.aquecimento + args.requisicoes):
+                metodo, caminho, corpo = cenario(alvos, rng)
+                if nome == 'track_view' and rng.random() < 0.5:
+                    client.cookies.clear()  # metade das visualizações vem de novas sessões
+                    # e de outro IP, para não esbarrar no limite de taxa por IP
+                    client.defaults['REMOTE_ADDR'] = f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    resposta = client.generic(metodo, caminho, corpo or '', content_type='application/json')
+                    duracao = time.perf_counter() - inicio
+                if indice < args.aquecimento:
+                    continue
+                tempos.append(duracao)
+                consultas.append(len(capturadas))
+                erros += resposta.status_code >= 400
+            resultados[nome] = resumir(tempos, sum(tempos), consultas, erros)
+            print(f'✅ {nome}: {resultados[nome]["p95_ms"]} ms p95, {resultados[nome]["consultas_media"]} consultas/req')
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+    return contagens, resultados
+
+
+def executar_http(args, rng):
+    """Mede um servidor em execução com requisições concorrentes"""
+    import requests
+
+    url_base = args.url.rstrip('/')
+    alvos = alvos_do_sitemap(requests.Session(), url_base)
+    local = threading.local()
+
+    def sessao():
+        if not hasattr(local, 'sessao'):
+            local.sessao = requests.Session()
+        return local.sessao
+
+    def requisitar(pedido):
+        metodo, caminho, corpo = pedido
+        s = sessao()
+        headers = {'Referer': f'{url_base}/', 'User-Agent': USER_AGENT}
+        if metodo == 'POST':
+            headers['Content-Type'] = 'application/json'
+        inicio = time.perf_counter()
+        resposta = s.request(metodo, url_base + caminho, data=corpo, headers=headers, timeout=30)
+        return time.perf_counter() - inicio, resposta.status_code
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        for nome, cenario in CENARIOS:
+            if args.cenarios and nome not in args.cenarios:
+                continue
+            pedidos = [cenario(alvos, rng) for _ in range(args.aquecimento + args.requisicoes)]
+            list(executor.map(requisitar, pedidos[:args.aquecimento]))
+            inicio = time.perf_counter()
+            amostras = list(executor.map(requisitar, pedidos[args.aquecimento:]))
+            duracao_total = time.perf_counter() - inicio
+            erros = sum(status >= 400 for _, status in amostras)
+            resultados[nome] = resumir([tempo for tempo, _ in amostras], duracao_total, [], erros)
+            print(f'✅ {nome}: {resultados[nome]["req_s"]} req/s, {resultados[nome]["p95_ms"]} ms p95')
+
+    return {'postagens': len(alvos['postagens'])}, resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do site público e da API de rastreamento')
+    parser.add_argument('--modo', choices=('processo', 'http'), default='processo')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL base (modo http)')
+    parser.add_argument('--requisicoes', type=int, default=200, help='Requisições medidas por cenário')
+    parser.add_argument('--aquecimento', type=int, default=20, help='Requisições descartadas antes da medição')
+    parser.add_argument('--concorrencia', type=int, default=4, help='Requisições simultâneas (modo http)')
+    parser.add_argument('--cenarios', nargs='*', help='Executa apenas os cenários informados')
+    parser.add_argument('--postagens', type=int, default=60)
+    parser.add_argument('--videos', type=int, default=40)
+    parser.add_argument('--visualizacoes', type=int, default=5000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--rotulo', default='', help='Identificação livre da execução (ex: hash do commit)')
+    parser.add_argument('--saida', default='benchmarks/resultados.json')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semente)
+    executar = executar_processo if args.modo == 'processo' else executar_http
+    dados, resultados = executar(args, rng)
+
+    saida = {
+        'meta': {
+            'modo': args.modo,
+            'rotulo': args.rotulo,
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'requisicoes': args.requisicoes,
+            'concorrencia': args.concorrencia if args.modo == 'http' else 1,
+            'dados': dados,
+        },
+        'cenarios': resultados,
+    }
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.saida).write_text(json.dumps(saida, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'📄 Resultados salvos em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
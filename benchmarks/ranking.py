@@ -0,0 +1,84 @@
+"""
+Mede o tempo de recálculo do ranking de postagens (core/ranking.py)
+
+    python -m benchmarks.ranking --visualizacoes 10000000 --saida benchmarks/ranking.json
+
+Cria um banco de teste, popula com dados determinísticos e executa o cálculo
+algumas vezes. Em PostgreSQL a carga usa COPY; em SQLite dezenas de milhões
+de linhas levam muito tempo para serem geradas.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do recálculo do ranking de postagens')
+    parser.add_argument('--postagens', type=int, default=500)
+    parser.add_argument('--visualizacoes', type=int, default=10_000_000)
+    parser.add_argument('--dias', type=int, default=90, help='Período coberto pelas visualizações geradas')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--rotulo', default='', help='Identificação livre da execução (ex: hash do commit)')
+    parser.add_argument('--saida', default='benchmarks/ranking.json')
+    args = parser.parse_args(argv)
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from core.ranking import calcular_ranking
+    from core.seeding import semear
+
+    setup_test_environment()
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        inicio = time.perf_counter()
+        semear(
+            args.postagens, 0, args.visualizacoes, args.semente, args.dias,
+            progresso=lambda gravadas: print(f'   {gravadas:,} visualizações gravadas', end='\r'),
+        )
+        carga = time.perf_counter() - inicio
+        print(f'\n✅ Carga em {carga:.1f}s')
+
+        duracoes = []
+        for _ in range(args.repeticoes):
+            resultado = calcular_ranking()
+            duracoes.append(resultado['duracao'])
+            print(f'✅ Ranking de {resultado["postagens"]} postagens em {resultado["duracao"]:.2f}s')
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+    saida = {
+        'meta': {
+            'rotulo': args.rotulo,
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'banco': connection.vendor,
+            'postagens': args.postagens,
+            'visualizacoes': args.visualizacoes,
+            'dias': args.dias,
+        },
+        'carga_s': round(carga, 2),
+        'ranking_s': [round(duracao, 3) for duracao in duracoes],
+        'ranking_min_s': round(min(duracoes), 3),
+    }
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.saida).write_text(json.dumps(saida, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'📄 Resultados salvos em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
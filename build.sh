@@ -2,6 +2,7 @@
 
 # Executar migrations
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 # Coletar arquivos estáticos
 python manage.py collectstatic --noinput
@@ -10,6 +10,7 @@ python manage.py collectstatic --noinput --clear
 if [ -n "$DATABASE_URL" ]; then
     echo "Running migrations..."
     python manage.py migrate --noinput
+    python manage.py createcachetable
     
     echo "Creating superuser..."
     python manage.py create_superuser_auto
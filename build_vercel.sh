@@ -8,6 +8,7 @@ python manage.py collectstatic --noinput --clear
 # Executar migrations (cria as tabelas automaticamente)
 echo "🗄️  Executando migrations no banco de dados..."
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 # Configurar banco de dados inicial (se necessário)
 echo "⚙️  Configurando banco de dados..."
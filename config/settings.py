@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     # Editor de texto rico
     'ckeditor',
     'ckeditor_uploader',
@@ -48,8 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentacaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.agendamento.PublicacaoAgendadaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,7 +65,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Backend padrão do Django com medição do tempo de renderização
+        'BACKEND': 'core.instrumentation.DjangoTemplates',
         'DIRS': [BASE_DIR / 'core' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -114,6 +118,39 @@ elif DATABASE_URL:
 else:
     raise Exception("DATABASE_URL não configurado! Configure no .env ou use USE_LOCAL_DB=True para desenvolvimento local.")
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# A invalidação por versão (core/cache_utils.py), o limite de beacons e os
+# caches das estatísticas só valem para o site inteiro se todos os processos
+# (workers, instâncias serverless, cron) usarem o mesmo cache. CACHE_URL com
+# redis:// usa Redis (pip install redis); sem ela, em PostgreSQL usa a tabela
+# de cache do banco (python manage.py createcachetable) e no SQLite local a
+# memória do processo.
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'core_cache',
+            # Padrão é 300 entradas: pouco para respostas, versões e contadores
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -152,9 +189,18 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = []
 
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    # Bundle minificado das folhas de estilo (core/css/bundle.css)
+    'core.static_pipeline.BundleFinder',
+]
+
 # Whitenoise configuration for serving static files
-# Usando CompressedStaticFilesStorage para evitar erros de manifest
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# Nomes com hash + Brotli/gzip; referências quebradas não interrompem o collectstatic
+# (ver core.static_pipeline.StaticFilesStorage), por isso os arquivos podem ser
+# servidos com cache imutável
+STATICFILES_BACKEND = 'core.static_pipeline.StaticFilesStorage'
 
 # Media files (Uploads)
 MEDIA_URL = '/media/'
@@ -177,7 +223,7 @@ if USE_SUPABASE_STORAGE and SUPABASE_URL and SUPABASE_KEY:
             "BACKEND": "core.storage.SupabaseStorage",
         },
         "staticfiles": {
-            "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
+            "BACKEND": STATICFILES_BACKEND,
         },
     }
 else:
@@ -187,13 +233,50 @@ else:
             "BACKEND": "django.core.files.storage.FileSystemStorage",
         },
         "staticfiles": {
-            "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
+            "BACKEND": STATICFILES_BACKEND,
         },
     }
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Retenção das estatísticas de visualização
+# Linhas mais antigas que o prazo são arquivadas no storage e removidas
+ESTATISTICAS_RETENCAO_DIAS = config('ESTATISTICAS_RETENCAO_DIAS', default=180, cast=int)
+ESTATISTICAS_ARQUIVO_FORMATO = config('ESTATISTICAS_ARQUIVO_FORMATO', default='ndjson')  # ndjson ou parquet
+ESTATISTICAS_LOTE_EXCLUSAO = config('ESTATISTICAS_LOTE_EXCLUSAO', default=5000, cast=int)
+
+# Acima deste número de linhas o admin mostra contagens estimadas pelo planner
+# do PostgreSQL em vez de COUNT(*) exato (ver core/paginacao.py)
+ADMIN_CONTAGEM_ESTIMADA_LIMITE = config('ADMIN_CONTAGEM_ESTIMADA_LIMITE', default=100000, cast=int)
+
+# Proxies à frente da aplicação que acrescentam o IP do cliente ao
+# X-Forwarded-For (a Vercel substitui o cabeçalho pelo IP do cliente: 1).
+# Use 0 sem proxy, quando o cabeçalho vem do próprio cliente (ver core/beacons.py)
+PROXIES_CONFIAVEIS = config('PROXIES_CONFIAVEIS', default=1, cast=int)
+
+# Limite de beacons da API de rastreamento (token bucket: rajada e reposição por minuto)
+RASTREAMENTO_RAJADA_VISITANTE = config('RASTREAMENTO_RAJADA_VISITANTE', default=20, cast=int)
+RASTREAMENTO_LIMITE_VISITANTE = config('RASTREAMENTO_LIMITE_VISITANTE', default=30, cast=int)
+# Vários visitantes podem compartilhar um IP (NAT, redes móveis)
+RASTREAMENTO_RAJADA_IP = config('RASTREAMENTO_RAJADA_IP', default=120, cast=int)
+RASTREAMENTO_LIMITE_IP = config('RASTREAMENTO_LIMITE_IP', default=300, cast=int)
+
+# Publicação das postagens agendadas pela primeira requisição depois da data
+# (core/agendamento.py); desligue se o comando publicar_agendadas rodar por
+# cron ou --loop
+AGENDAMENTO_NAS_REQUISICOES = config('AGENDAMENTO_NAS_REQUISICOES', default=True, cast=bool)
+
+# Ranking de postagens da home (recalculado por "python manage.py calcular_ranking")
+RANKING_JANELA_DIAS = config('RANKING_JANELA_DIAS', default=30, cast=int)
+RANKING_MEIA_VIDA_DIAS = config('RANKING_MEIA_VIDA_DIAS', default=3, cast=float)
+RANKING_TAMANHO = config('RANKING_TAMANHO', default=20, cast=int)
+
+# Postagens relacionadas (TF-IDF, ver core/relacionadas.py)
+RELACIONADAS_QUANTIDADE = config('RELACIONADAS_QUANTIDADE', default=6, cast=int)
+RELACIONADAS_BONUS_CATEGORIA = config('RELACIONADAS_BONUS_CATEGORIA', default=0.1, cast=float)
+RELACIONADAS_EXIBIDAS = config('RELACIONADAS_EXIBIDAS', default=3, cast=int)
+
 # YouTube Integration
 # ID do canal Mesa Secreta no YouTube
 YOUTUBE_CHANNEL_ID = 'UCJIy5HynJfVzHaRKm7WlHFw'
@@ -236,3 +319,11 @@ SILENCED_SYSTEM_CHECKS = ['security.W019']
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
+
+# Instrumentação de desempenho (consultas e tempos por URL, relatório em /admin/desempenho/)
+INSTRUMENTACAO_ATIVA = config('INSTRUMENTACAO_ATIVA', default=False, cast=bool)
+INSTRUMENTACAO_AMOSTRAS = config('INSTRUMENTACAO_AMOSTRAS', default=500, cast=int)
+# Cabeçalho Server-Timing (db, tpl, yt, storage) visível no devtools do navegador
+INSTRUMENTACAO_SERVER_TIMING = config('INSTRUMENTACAO_SERVER_TIMING', default=DEBUG, cast=bool)
+# Arquivo de spans OTLP/JSON (vazio = desativado)
+INSTRUMENTACAO_SPANS_ARQUIVO = config('INSTRUMENTACAO_SPANS_ARQUIVO', default='')
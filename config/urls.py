@@ -25,6 +25,9 @@ admin.site.login = core_views.login_view
 admin.site.logout = core_views.logout_view
 
 urlpatterns = [
+    # Páginas extras do admin precisam vir antes de admin.site.urls
+    path('admin/desempenho/', core_views.relatorio_desempenho, name='relatorio_desempenho'),
+    path('admin/estatisticas/', core_views.painel_estatisticas, name='painel_estatisticas'),
     path('admin/', admin.site.urls),
     path('ckeditor/', include('ckeditor_uploader.urls')),
     path('', include('core.urls')),
@@ -1,15 +1,24 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.urls import reverse
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q
 from django.utils import timezone
 from django.contrib import messages
 from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from datetime import date, datetime, time, timedelta
 import csv
-from .models import Postagem, Video, ConfiguracaoSite, EstatisticaVisualizacao
+import ipaddress
+from .cache_utils import invalidar
+from .paginacao import PaginadorEstimado
+from .signals import em_lote
+from .models import Postagem, Video, ConfiguracaoSite, EstatisticaVisualizacao, AgenteUsuario, RankingPostagem, ResumoDiario
+from .templatetags.youtube import youtube_leve
 
 
 class ExportCsvMixin:
@@ -43,7 +52,7 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
     date_hierarchy = 'data_publicacao'
     list_per_page = 25
     list_select_related = True
-    show_full_result_count = True
+    show_full_result_count = False
     
     # Ações em massa personalizadas
     actions = ['publicar_postagens', 'marcar_como_rascunho', 'duplicar_postagem', 
@@ -98,7 +107,7 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
         
         # Estatísticas gerais
         total = Postagem.objects.count()
-        publicadas = Postagem.objects.filter(status='publicado').count()
+        publicadas = Postagem.objects.publicadas().count()
         rascunhos = Postagem.objects.filter(status='rascunho').count()
         esta_semana = Postagem.objects.filter(
             data_publicacao__gte=timezone.now() - timezone.timedelta(days=7)
@@ -118,6 +127,9 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
         if obj.status == 'publicado':
             icon = '✅'
             color = '#00E5CC'
+        elif obj.status == 'agendado':
+            icon = '⏰'
+            color = '#FFC107'
         else:
             icon = '📝'
             color = '#FF6B35'
@@ -233,6 +245,11 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
                 '<span style="color: {}; font-size: 12px;">{}</span>',
                 color, texto
             )
+        if obj.status == 'agendado':
+            return format_html(
+                '<span style="color: #FFC107; font-size: 12px;">⏰ {}</span>',
+                timezone.localtime(obj.data_publicacao).strftime('%d/%m %H:%M')
+            )
         return mark_safe('<span style="color: #999; font-size: 12px;">-</span>')
     dias_desde_publicacao.short_description = '📅 Publicado'
     dias_desde_publicacao.admin_order_field = 'data_publicacao'
@@ -278,10 +295,12 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
         if not obj.pk:
             return mark_safe('<p style="color: #999;">Salve a postagem primeiro para ver estatísticas.</p>')
         
-        total_views = obj.get_total_visualizacoes()
+        # Contagens únicas aproximadas (HyperLogLog); ?exato=1 na URL conta linha a linha
+        exato = getattr(obj, '_contagem_exata', False)
+        total_views = obj.get_total_visualizacoes(exato=exato)
         tempo_medio = obj.get_tempo_medio_visualizacao()
         scroll_medio = obj.get_scroll_medio()
-        views_30_dias = obj.get_visualizacoes_ultimos_30_dias()
+        views_30_dias = obj.get_visualizacoes_ultimos_30_dias(exato=exato)
         taxa_engajamento = obj.get_taxa_engajamento()
         
         # Converter tempo médio para formato legível
@@ -296,6 +315,13 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
             'Baixo': '#f44336'
         }.get(taxa_engajamento, '#999')
         
+        if exato:
+            nota_contagem = mark_safe('✔️ Contagens exatas (auditoria) · <a href="?">ver aproximadas</a>')
+        else:
+            nota_contagem = mark_safe(
+                'ℹ️ Visualizações únicas aproximadas (margem de ~1%) · <a href="?exato=1">contar exatamente</a>'
+            )
+        
         return format_html(
             '<div style="background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 100%); '
             'border: 2px solid #00E5CC; border-radius: 12px; padding: 24px; margin: 10px 0;">'
@@ -357,21 +383,51 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
             'Baseado em tempo e scroll</div>'
             '</div>'
             
+            '<div style="color: rgba(255,255,255,0.5); font-size: 11px; margin-top: 12px;">{}</div>'
+            
             '</div>',
             total_views,
             views_30_dias,
             tempo_texto,
             scroll_medio,
             cor_engajamento,
-            taxa_engajamento
+            taxa_engajamento,
+            nota_contagem
         )
     painel_estatisticas.short_description = 'Estatísticas Detalhadas'
     
-    # Ações em massa
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            obj._contagem_exata = request.GET.get('exato') == '1'
+        return obj
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if getattr(obj, 'erro_renderizacao', None):
+            self.message_user(
+                request,
+                f'⚠️ O conteúdo não pôde ser formatado ({obj.erro_renderizacao}); '
+                'a página pública mostra apenas o texto até a próxima edição.',
+                messages.WARNING
+            )
+
+    def delete_queryset(self, request, queryset):
+        """Exclusão em massa: os sinais de cada linha viram um único evento"""
+        with em_lote() as lote:
+            lote.excluir_postagens(queryset)
+            super().delete_queryset(request, queryset)
+    
+    # Ações em massa: uma operação por conjunto (update/bulk_create) e um único
+    # evento de invalidação de cache e de relacionadas por ação (signals.em_lote)
     def publicar_postagens(self, request, queryset):
-        """Publica postagens selecionadas"""
-        rascunhos = queryset.filter(status='rascunho')
-        count = rascunhos.update(status='publicado', data_publicacao=timezone.now())
+        """Publica agora as postagens selecionadas (rascunhos e agendadas)"""
+        pendentes = queryset.exclude(status='publicado')
+        linhas = list(pendentes.values_list('pk', 'categoria'))
+        with em_lote() as lote:
+            count = pendentes.update(status='publicado', data_publicacao=timezone.now())
+            lote.invalidar_postagens({categoria for _, categoria in linhas})
+            lote.atualizar_relacionadas([pk for pk, _ in linhas])
         if count:
             self.message_user(
                 request, 
@@ -381,14 +437,19 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
         else:
             self.message_user(
                 request,
-                '⚠️ Nenhuma postagem em rascunho foi selecionada.',
+                '⚠️ Nenhuma postagem em rascunho ou agendada foi selecionada.',
                 messages.WARNING
             )
     publicar_postagens.short_description = '✅ Publicar postagens selecionadas'
     
     def marcar_como_rascunho(self, request, queryset):
         """Marca postagens como rascunho"""
-        count = queryset.update(status='rascunho')
+        publicadas = list(queryset.filter(status='publicado').values_list('pk', 'categoria'))
+        with em_lote() as lote:
+            count = queryset.update(status='rascunho')
+            # Só as que eram públicas saem dos feeds e das listas de relacionadas
+            lote.invalidar_postagens({categoria for _, categoria in publicadas})
+            lote.atualizar_relacionadas([pk for pk, _ in publicadas])
         self.message_user(
             request, 
             f'📝 {count} postagem(ns) marcada(s) como rascunho',
@@ -397,34 +458,50 @@ class PostagemAdmin(admin.ModelAdmin, ExportCsvMixin):
     marcar_como_rascunho.short_description = '📝 Marcar como rascunho'
     
     def duplicar_postagem(self, request, queryset):
-        """Duplica postagens selecionadas"""
-        if queryset.count() > 5:
-            self.message_user(
-                request,
-                '⚠️ Você pode duplicar no máximo 5 postagens por vez.',
-                messages.WARNING
+        """Duplica postagens selecionadas como rascunhos (um INSERT por lote, sem save() nem sinais)"""
+        campos = [
+            campo.attname for campo in Postagem._meta.concrete_fields
+            if campo.attname not in ('id', 'data_criacao', 'data_atualizacao')
+        ]
+        agora = timezone.now()
+        copias = []
+        atualizadas = []
+        for valores in queryset.order_by('pk').values(*campos, 'data_atualizacao'):
+            # O HTML renderizado é copiado quando está em dia com o original
+            atualizadas.append(valores.pop('data_atualizacao') == valores['conteudo_renderizado_versao'])
+            valores.update(
+                titulo=f'[CÓPIA] {valores["titulo"]}'[:Postagem._meta.get_field('titulo').max_length],
+                status='rascunho',
+                data_publicacao=agora,
+                conteudo_renderizado_versao=None,
             )
-            return
+            copias.append(Postagem(**valores))
         
-        count = 0
-        for obj in queryset:
-            obj.pk = None
-            obj.titulo = f'[CÓPIA] {obj.titulo}'
-            obj.status = 'rascunho'
-            obj.data_publicacao = timezone.now()
-            obj.save()
-            count += 1
+        criadas = Postagem.objects.bulk_create(copias, batch_size=200)
+        # update() não altera data_atualizacao: a versão passa a ser a data_atualizacao da cópia
+        Postagem.objects.filter(
+            pk__in=[copia.pk for copia, atualizada in zip(criadas, atualizadas) if atualizada]
+        ).update(conteudo_renderizado_versao=F('data_atualizacao'))
+        # Rascunhos não aparecem em feeds, sitemap nem relacionadas: nada a invalidar
         
         self.message_user(
             request, 
-            f'📋 {count} postagem(ns) duplicada(s) com sucesso!',
+            f'📋 {len(criadas)} postagem(ns) duplicada(s) com sucesso!',
             messages.SUCCESS
         )
     duplicar_postagem.short_description = '📋 Duplicar postagens'
     
     def agendar_para_hoje(self, request, queryset):
         """Agenda postagens para hoje"""
-        count = queryset.update(data_publicacao=timezone.now())
+        from .agendamento import publicar_vencidas
+        
+        pks = list(queryset.values_list('pk', flat=True))
+        categorias = set(queryset.filter(status='publicado').values_list('categoria', flat=True))
+        with em_lote() as lote:
+            count = queryset.update(data_publicacao=timezone.now())
+            lote.invalidar_postagens(categorias)
+            # As agendadas selecionadas venceram agora: publica sem esperar o agendador
+            publicar_vencidas(pks=pks)
         self.message_user(
             request,
             f'📅 {count} postagem(ns) agendada(s) para hoje!',
@@ -445,7 +522,12 @@ class VideoAdmin(admin.ModelAdmin, ExportCsvMixin):
     date_hierarchy = 'data_publicacao'
     list_per_page = 25
     
-    actions = ['export_as_csv', 'agendar_para_hoje']
+    actions = ['export_as_csv', 'agendar_para_hoje', 'gerar_thumbnails']
+    
+    class Media:
+        # Incorporação leve do preview (core/templatetags/youtube.py)
+        css = {'all': ('core/css/youtube_leve.css',)}
+        js = ('core/js/youtube_leve.js',)
     
     fieldsets = (
         ('🎬 Informações do Vídeo', {
@@ -521,14 +603,14 @@ class VideoAdmin(admin.ModelAdmin, ExportCsvMixin):
         if obj.youtube_id:
             return format_html(
                 '<a href="{}" target="_blank">'
-                '<img src="https://img.youtube.com/vi/{}/mqdefault.jpg" '
-                'width="120" height="90" style="border-radius: 8px; '
+                '<img src="{}" loading="lazy" '
+                'width="120" height="68" style="border-radius: 8px; object-fit: cover; '
                 'border: 2px solid #FF0000; box-shadow: 0 2px 8px rgba(255,0,0,0.2); '
                 'transition: transform 0.3s;" '
                 'onmouseover="this.style.transform=\'scale(1.05)\'" '
                 'onmouseout="this.style.transform=\'scale(1)\'" />'
                 '</a>',
-                obj.get_youtube_url(), obj.youtube_id
+                obj.get_youtube_url(), obj.get_thumbnail_url()
             )
         return mark_safe('<span style="color: #999;">⚠️ ID inválido</span>')
     preview_thumbnail.short_description = '🖼️ Thumbnail'
@@ -565,11 +647,8 @@ class VideoAdmin(admin.ModelAdmin, ExportCsvMixin):
         if obj.youtube_id:
             return format_html(
                 '<div style="margin: 15px 0; background: #f5f5f5; padding: 20px; border-radius: 8px;">'
-                '<iframe width="100%" height="400" '
-                'src="https://www.youtube.com/embed/{}" '
-                'frameborder="0" allowfullscreen '
-                'allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" '
-                'style="border-radius: 8px; box-shadow: 0 4px 12px rgba(0,0,0,0.15);"></iframe>'
+                '<div style="max-width: 720px; border-radius: 8px; overflow: hidden; '
+                'box-shadow: 0 4px 12px rgba(0,0,0,0.15);">{}</div>'
                 '<div style="margin-top: 15px; display: flex; gap: 10px;">'
                 '<a href="{}" target="_blank" '
                 'style="background: #FF0000; color: white; padding: 10px 20px; '
@@ -581,7 +660,9 @@ class VideoAdmin(admin.ModelAdmin, ExportCsvMixin):
                 '🖼️ Ver Thumbnail</a>'
                 '</div>'
                 '</div>',
-                obj.youtube_id, obj.get_youtube_url(), obj.youtube_id
+                # O player só é carregado se o editor clicar em play
+                render_to_string('core/partials/youtube_leve.html', youtube_leve(obj)),
+                obj.get_youtube_url(), obj.youtube_id
             )
         return mark_safe(
             '<div style="padding: 20px; background: #fff3cd; border: 2px dashed #ffc107; '
@@ -629,15 +710,32 @@ class VideoAdmin(admin.ModelAdmin, ExportCsvMixin):
         )
     acoes.short_description = '⚡ Ações'
     
+    def delete_queryset(self, request, queryset):
+        """Exclusão em massa: uma única invalidação do grupo de vídeos"""
+        with em_lote():
+            super().delete_queryset(request, queryset)
+    
     def agendar_para_hoje(self, request, queryset):
         """Agenda vídeos para hoje"""
         count = queryset.update(data_publicacao=timezone.now())
+        invalidar('videos')
         self.message_user(
             request,
             f'📅 {count} vídeo(s) agendado(s) para hoje!',
             messages.SUCCESS
         )
     agendar_para_hoje.short_description = '📅 Agendar para hoje'
+    
+    def gerar_thumbnails(self, request, queryset):
+        """Baixa de novo as thumbnails dos vídeos selecionados"""
+        from .thumbnails import gerar_pendentes
+        count = gerar_pendentes(queryset, forcar=True)
+        self.message_user(
+            request,
+            f'🖼️ Thumbnails geradas para {count} de {queryset.count()} vídeo(s)',
+            messages.SUCCESS if count else messages.WARNING
+        )
+    gerar_thumbnails.short_description = '🖼️ Gerar thumbnails'
 
 
 # Customizar página inicial do admin
@@ -648,7 +746,7 @@ class MesaSecretaAdminSite(admin.AdminSite):
         
         # Estatísticas gerais
         total_postagens = Postagem.objects.count()
-        postagens_publicadas = Postagem.objects.filter(status='publicado').count()
+        postagens_publicadas = Postagem.objects.publicadas().count()
         postagens_rascunho = Postagem.objects.filter(status='rascunho').count()
         total_videos = Video.objects.count()
         
@@ -803,23 +901,105 @@ class ConfiguracaoSiteAdmin(admin.ModelAdmin):
         return self.changeform_view(request, str(config.pk), '', extra_context)
 
 
+def _intervalo_periodo(valor):
+    """Converte 'hoje', 'AAAA-MM' ou 'AAAA-MM-DD' em (primeiro dia, dia seguinte ao último)"""
+    if valor == 'hoje':
+        hoje = timezone.localdate()
+        return hoje, hoje + timedelta(days=1)
+    try:
+        if len(valor) == 7:
+            inicio = date.fromisoformat(f'{valor}-01')
+            return inicio, (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+        inicio = date.fromisoformat(valor)
+    except ValueError:
+        return None
+    return inicio, inicio + timedelta(days=1)
+
+
+class PeriodoResumoFilter(admin.SimpleListFilter):
+    """
+    Navegação por mês e dia no lugar do date_hierarchy
+    
+    O date_hierarchy descobre os anos, meses e dias com SELECT DISTINCT sobre
+    as visualizações; aqui as opções e as contagens vêm dos resumos diários e
+    o filtro escolhido vira um intervalo em data_visualizacao (indexado).
+    """
+    
+    title = 'período'
+    parameter_name = 'periodo'
+    
+    def lookups(self, request, model_admin):
+        resumos = ResumoDiario.objects.filter(tipo_conteudo='site')
+        opcoes = [('hoje', 'Hoje')]
+        valor = self.value()
+        intervalo = _intervalo_periodo(valor) if valor and valor != 'hoje' else None
+        
+        if intervalo:
+            # Mês (ou dia dele) selecionado: mostra os dias do mês
+            mes = intervalo[0].replace(day=1)
+            proximo = (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+            opcoes.append((f'{mes:%Y-%m}', f'Todo o mês {mes:%m/%Y}'))
+            dias = resumos.filter(dia__gte=mes, dia__lt=proximo).order_by('-dia').values_list('dia', 'visualizacoes')
+            opcoes += [(dia.isoformat(), f'{dia:%d/%m/%Y} ({total} visualizações)') for dia, total in dias]
+            return opcoes
+        
+        meses = (
+            resumos.annotate(mes=TruncMonth('dia'))
+            .values('mes')
+            .annotate(total=Sum('visualizacoes'))
+            .order_by('-mes')
+        )
+        opcoes += [(f"{linha['mes']:%Y-%m}", f"{linha['mes']:%m/%Y} ({linha['total']} visualizações)") for linha in meses]
+        return opcoes
+    
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        intervalo = _intervalo_periodo(self.value())
+        if intervalo is None:
+            raise IncorrectLookupParameters(f'Período inválido: {self.value()}')
+        inicio, fim = (timezone.make_aware(datetime.combine(dia, time.min)) for dia in intervalo)
+        return queryset.filter(data_visualizacao__gte=inicio, data_visualizacao__lt=fim)
+
+
 @admin.register(EstatisticaVisualizacao)
 class EstatisticaVisualizacaoAdmin(admin.ModelAdmin):
     """Admin para visualizar estatísticas de acesso"""
     
-    list_display = ('tipo_conteudo', 'conteudo_titulo', 'metricas_badge', 'data_visualizacao', 'ip_address')
-    list_filter = ('tipo_conteudo', 'data_visualizacao')
-    search_fields = ('conteudo_titulo', 'ip_address', 'session_key')
-    date_hierarchy = 'data_visualizacao'
+    list_display = ('tipo_conteudo', 'conteudo_titulo', 'metricas_badge', 'dispositivo', 'data_visualizacao', 'ip_address')
+    list_filter = ('tipo_conteudo', 'agente__dispositivo', 'agente__navegador', PeriodoResumoFilter)
+    list_select_related = ('agente',)
+    # Busca só em colunas indexadas (ver get_search_results)
+    search_fields = ('^session_key', '=ip_address')
+    search_help_text = 'Início da session key ou IP exato'
     list_per_page = 50
+    # A tabela cresce a cada visualização: nada de COUNT(*) exato por página
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     readonly_fields = ('tipo_conteudo', 'conteudo_id', 'conteudo_titulo', 
-                      'session_key', 'ip_address', 'user_agent', 'data_visualizacao',
+                      'session_key', 'ip_address', 'agente', 'data_visualizacao',
                       'tempo_visualizacao', 'scroll_profundidade', 'data_saida')
     
     def has_add_permission(self, request):
         """Desabilitar adição manual"""
         return False
     
+    def get_search_results(self, request, queryset, search_term):
+        """
+        IP exato ou prefixo da session key, sem ILIKE '%...%'
+
+        O prefixo usa o índice de padrões que o Django cria para session_key
+        no PostgreSQL; o IP vai direto ao índice de ip_address.
+        """
+        termo = search_term.strip()
+        if not termo:
+            return queryset, False
+        try:
+            ipaddress.ip_address(termo)
+        except ValueError:
+            return queryset.filter(session_key__startswith=termo), False
+        return queryset.filter(ip_address=termo), False
+    
     def has_change_permission(self, request, obj=None):
         """Apenas visualização"""
         return False
@@ -842,6 +1022,14 @@ class EstatisticaVisualizacaoAdmin(admin.ModelAdmin):
         )
     metricas_badge.short_description = '📈 Métricas'
     
+    def dispositivo(self, obj):
+        """Tipo de dispositivo obtido da dimensão de user agents"""
+        if obj.agente:
+            return obj.agente.get_dispositivo_display()
+        return '-'
+    dispositivo.short_description = '📱 Dispositivo'
+    dispositivo.admin_order_field = 'agente__dispositivo'
+    
     fieldsets = (
         ('Conteúdo', {
             'fields': ('tipo_conteudo', 'conteudo_id', 'conteudo_titulo')
@@ -850,7 +1038,7 @@ class EstatisticaVisualizacaoAdmin(admin.ModelAdmin):
             'fields': ('tempo_visualizacao', 'scroll_profundidade', 'data_saida')
         }),
         ('Informações da Sessão', {
-            'fields': ('session_key', 'ip_address', 'user_agent')
+            'fields': ('session_key', 'ip_address', 'agente')
         }),
         ('Data e Hora', {
             'fields': ('data_visualizacao',)
@@ -858,6 +1046,65 @@ class EstatisticaVisualizacaoAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AgenteUsuario)
+class AgenteUsuarioAdmin(admin.ModelAdmin):
+    """Admin somente leitura da dimensão de user agents"""
+    
+    list_display = ('dispositivo', 'navegador', 'sistema_operacional', 'user_agent_resumido', 'data_criacao')
+    list_filter = ('dispositivo', 'navegador', 'sistema_operacional')
+    search_fields = ('=hash', 'navegador', 'sistema_operacional')
+    list_per_page = 50
+    readonly_fields = ('hash', 'user_agent', 'dispositivo', 'navegador', 'sistema_operacional', 'data_criacao')
+    
+    def has_add_permission(self, request):
+        """Criados automaticamente pelo rastreamento"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Apenas visualização"""
+        return False
+    
+    def user_agent_resumido(self, obj):
+        """User agent truncado para a listagem"""
+        return format_html('<span title="{}" style="font-size: 11px; color: #666;">{}</span>', obj.user_agent, obj.user_agent[:80])
+    user_agent_resumido.short_description = 'User Agent'
+
+
+@admin.register(RankingPostagem)
+class RankingPostagemAdmin(admin.ModelAdmin):
+    """Admin somente leitura do ranking gerado pelo comando calcular_ranking"""
+    
+    list_display = ('lista', 'posicao', 'postagem', 'pontuacao', 'sessoes_unicas', 'tempo_medio', 'scroll_medio', 'calculado_em')
+    list_filter = ('lista',)
+    list_select_related = ('postagem',)
+    
+    def has_add_permission(self, request):
+        """Gerado pelo cálculo do ranking"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Apenas visualização"""
+        return False
+
+
+@admin.register(ResumoDiario)
+class ResumoDiarioAdmin(admin.ModelAdmin):
+    """Admin somente leitura dos resumos gerados pelo comando consolidar_estatisticas"""
+    
+    list_display = ('dia', 'tipo_conteudo', 'conteudo_id', 'visualizacoes', 'sessoes', 'tempo_total', 'scroll_total')
+    list_filter = ('tipo_conteudo',)
+    date_hierarchy = 'dia'
+    exclude = ('sessoes_hll',)
+    
+    def has_add_permission(self, request):
+        """Gerado pela consolidação diária"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Apenas visualização"""
+        return False
+
+
 # Registrar no admin_site customizado também
 admin_site.register(ConfiguracaoSite, ConfiguracaoSiteAdmin)
 
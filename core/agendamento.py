@@ -0,0 +1,142 @@
+"""
+Publicação agendada de postagens
+Uma postagem salva como publicada com data futura fica com status
+'agendado' e não aparece em nenhuma consulta pública. Quando a data chega o
+status é trocado e só então os grupos de cache das categorias publicadas
+(feeds, sitemap) são invalidados e as relacionadas recalculadas, em vez de
+depender de prazos curtos de cache. Quem publica é a primeira requisição
+depois da data (PublicacaoAgendadaMiddleware), o que funciona também na
+Vercel, onde nenhum processo fica rodando; o comando publicar_agendadas
+(cron ou --loop) faz o mesmo fora das requisições.
+"""
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Postagem
+from .signals import em_lote
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) entre as leituras da próxima data agendada em cada processo
+INTERVALO_VERIFICACAO = 30
+# Só uma requisição por vez publica; as demais seguem sem esperar
+CHAVE_TRAVA = 'agendamento:publicando'
+TIMEOUT_TRAVA = 60
+
+
+def publicar_vencidas(agora=None, pks=None):
+    """
+    Publica as postagens agendadas cuja data de publicação já passou
+
+    Args:
+        pks: Restringe às postagens informadas (ex: seleção de uma ação do admin)
+
+    Returns:
+        Lista de (pk, título) das postagens publicadas
+    """
+    agora = agora or timezone.now()
+    agendadas = Postagem.objects.agendadas().filter(data_publicacao__lte=agora)
+    if pks is not None:
+        agendadas = agendadas.filter(pk__in=pks)
+    vencidas = list(agendadas.values_list('pk', 'titulo', 'categoria'))
+    if not vencidas:
+        return []
+
+    pks = [pk for pk, _, _ in vencidas]
+    with em_lote() as lote:
+        Postagem.objects.agendadas().filter(pk__in=pks).update(status='publicado')
+        lote.invalidar_postagens({categoria for _, _, categoria in vencidas})
+        lote.atualizar_relacionadas(pks)
+
+    logger.info(f'{len(pks)} postagem(ns) agendada(s) publicada(s): {pks}')
+    return [(pk, titulo) for pk, titulo, _ in vencidas]
+
+
+def proxima_publicacao():
+    """Data da próxima postagem agendada, ou None se não houver"""
+    return Postagem.objects.agendadas().aggregate(proxima=Min('data_publicacao'))['proxima']
+
+
+class _ProximaPublicacao:
+    """Data da próxima postagem agendada, relida do banco a cada INTERVALO_VERIFICACAO"""
+
+    def __init__(self):
+        self.data = None
+        self.lida_em = None
+        self.lock = threading.Lock()
+
+    def desatualizada(self):
+        return self.lida_em is None or time.monotonic() - self.lida_em >= INTERVALO_VERIFICACAO
+
+    def vencida(self):
+        return self.data is not None and self.data <= timezone.now()
+
+    def ler(self):
+        with self.lock:
+            if self.desatualizada():
+                self.data = proxima_publicacao()
+                self.lida_em = time.monotonic()
+
+    def esquecer(self):
+        self.lida_em = None
+
+
+_proxima = _ProximaPublicacao()
+
+
+def publicar_se_vencidas():
+    """
+    Publica as agendadas vencidas, consultando o banco no máximo a cada
+    INTERVALO_VERIFICACAO segundos enquanto nenhuma vencer
+
+    Returns:
+        Lista de (pk, título) das postagens publicadas
+    """
+    if _proxima.desatualizada():
+        _proxima.ler()
+    if not _proxima.vencida() or not cache.add(CHAVE_TRAVA, True, TIMEOUT_TRAVA):
+        return []
+    try:
+        return publicar_vencidas()
+    finally:
+        cache.delete(CHAVE_TRAVA)
+        _proxima.esquecer()
+
+
+class PublicacaoAgendadaMiddleware:
+    """
+    Publica as postagens agendadas vencidas antes de atender a requisição
+
+    Fora das verificações periódicas não consulta o banco nem o cache.
+    Desligado com AGENDAMENTO_NAS_REQUISICOES=False quando o comando
+    publicar_agendadas roda por cron ou --loop. Funciona em WSGI e em ASGI
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.AGENDAMENTO_NAS_REQUISICOES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        publicar_se_vencidas()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if _proxima.desatualizada() or _proxima.vencida():
+            await sync_to_async(publicar_se_vencidas)()
+        return await self.get_response(request)
@@ -0,0 +1,185 @@
+"""
+Proteção da API de rastreamento (track_view)
+Filtra robôs, limita a taxa de beacons por visitante e por IP (token bucket
+no cache) e descarta métricas que não aumentaram desde o último envio antes
+de chegar ao banco. Os contadores ficam no cache, então são compartilhados
+entre processos quando o backend de cache também é
+"""
+import ipaddress
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import EstatisticaVisualizacao
+from .user_agents import analisar_user_agent
+
+PREFIXO = 'beacons'
+CONTADORES = ('aceitos', 'descartados', 'limitados', 'robos')
+
+# Por quanto tempo o último envio de cada página é lembrado
+TIMEOUT_ULTIMO_ENVIO = 60 * 60 * 6
+
+# Tempo máximo de leitura aceito por página (segundos); valores maiores não
+# cabem na coluna e distorceriam as médias e o ranking
+LIMITE_TEMPO_VISUALIZACAO = 60 * 60 * 24
+
+TIPOS_CONTEUDO = {tipo for tipo, _ in EstatisticaVisualizacao.TIPO_CONTEUDO_CHOICES}
+
+
+def _ip_valido(valor):
+    try:
+        return str(ipaddress.ip_address(valor.strip()))
+    except ValueError:
+        return None
+
+
+def ip_do_cliente(request):
+    """
+    Retorna o IP do cliente visto pelo proxy confiável mais externo
+
+    O X-Forwarded-For é montado da esquerda para a direita e só as entradas
+    acrescentadas pelos proxies confiáveis (settings.PROXIES_CONFIAVEIS, a
+    partir da direita) são confiáveis; o que vem antes é escrito pelo próprio
+    cliente. Sem o cabeçalho esperado, ou com uma entrada inválida nessa
+    posição, vale o REMOTE_ADDR. Apenas um IP válido e normalizado é gravado.
+    """
+    proxies = settings.PROXIES_CONFIAVEIS
+    encaminhados = [ip for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if proxies and len(encaminhados) >= proxies:
+        ip = _ip_valido(encaminhados[-proxies])
+        if ip:
+            return ip
+    return _ip_valido(request.META.get('REMOTE_ADDR', ''))
+
+
+def eh_robo(user_agent):
+    """Robôs e clientes sem user agent não geram estatísticas"""
+    return analisar_user_agent(user_agent[:512])['dispositivo'] == 'bot'
+
+
+# ===================================
+# Limite de taxa
+# ===================================
+
+def _consumir(chave, capacidade, por_minuto):
+    """
+    Token bucket: cada beacon consome uma ficha; as fichas são repostas
+    continuamente até a capacidade (rajada máxima)
+
+    Leitura e escrita não são atômicas: requisições simultâneas podem
+    passar uma ou outra ficha a mais, o que é aceitável para este uso.
+    """
+    agora = time.time()
+    por_segundo = por_minuto / 60
+    fichas, atualizado = cache.get(chave, (capacidade, agora))
+    fichas = min(capacidade, fichas + (agora - atualizado) * por_segundo)
+    permitido = fichas >= 1
+    if permitido:
+        fichas -= 1
+    # Expira quando o balde estaria cheio de novo
+    cache.set(chave, (fichas, agora), int(capacidade / por_segundo) + 1)
+    return permitido
+
+
+def permitir(session_key, ip_address):
+    """
+    Verifica os limites do visitante (sessão ou, sem sessão, IP) e do IP
+
+    O cookie de sessão vem do cliente e pode ser trocado a cada envio; o
+    limite por IP (ip_do_cliente) é o que não pode ser contornado.
+    """
+    visitante = session_key or ip_address or 'anonimo'
+    if not _consumir(
+        f'{PREFIXO}:limite:visitante:{visitante}',
+        settings.RASTREAMENTO_RAJADA_VISITANTE,
+        settings.RASTREAMENTO_LIMITE_VISITANTE,
+    ):
+        return False
+    if ip_address is None:
+        return True
+    return _consumir(
+        f'{PREFIXO}:limite:ip:{ip_address}',
+        settings.RASTREAMENTO_RAJADA_IP,
+        settings.RASTREAMENTO_LIMITE_IP,
+    )
+
+
+# ===================================
+# Métricas
+# ===================================
+
+def normalizar(dados):
+    """Valida e converte uma métrica recebida (ValueError se inválida)"""
+    tipo = dados.get('tipo_conteudo', 'home')
+    if tipo not in TIPOS_CONTEUDO:
+        raise ValueError(f'Tipo de conteúdo inválido: {tipo}')
+    conteudo_id = dados.get('conteudo_id')
+    return {
+        'tipo_conteudo': tipo,
+        'conteudo_id': None if conteudo_id is None else int(conteudo_id),
+        'conteudo_titulo': str(dados.get('conteudo_titulo', ''))[:255],
+        'tempo_visualizacao': min(LIMITE_TEMPO_VISUALIZACAO, max(0, int(dados.get('tempo_visualizacao', 0)))),
+        'scroll_profundidade': min(100, max(0, int(dados.get('scroll_profundidade', 0)))),
+    }
+
+
+def _chave_ultimo_envio(session_key, metrica):
+    return f'{PREFIXO}:ultimo:{session_key}:{metrica["tipo_conteudo"]}:{metrica["conteudo_id"]}'
+
+
+def atualizacao_nova(session_key, metrica):
+    """
+    Retorna True se o tempo ou o scroll aumentaram desde o último envio
+    desta página pela sessão
+
+    Reenvios e lotes repetidos são descartados sem tocar no banco. O envio só
+    é memorizado por lembrar_envio(), depois de gravado.
+    """
+    anterior = cache.get(_chave_ultimo_envio(session_key, metrica))
+    return anterior is None or (
+        metrica['tempo_visualizacao'] > anterior[0] or metrica['scroll_profundidade'] > anterior[1]
+    )
+
+
+def lembrar_envio(session_key, metrica):
+    """Memoriza o maior tempo e scroll já gravados desta página pela sessão"""
+    chave = _chave_ultimo_envio(session_key, metrica)
+    atual = (metrica['tempo_visualizacao'], metrica['scroll_profundidade'])
+    anterior = cache.get(chave)
+    if anterior is not None:
+        atual = (max(atual[0], anterior[0]), max(atual[1], anterior[1]))
+    cache.set(chave, atual, TIMEOUT_ULTIMO_ENVIO)
+
+
+# ===================================
+# Contadores
+# ===================================
+
+def registrar(contador, quantidade=1):
+    """Incrementa um dos contadores de beacons"""
+    if not quantidade:
+        return
+    chave = f'{PREFIXO}:contador:{contador}'
+    cache.add(chave, 0, None)
+    try:
+        cache.incr(chave, quantidade)
+    except ValueError:
+        # Chave despejada entre o add e o incr
+        cache.set(chave, quantidade, None)
+
+
+def registrar_envio(aceitos, descartados):
+    """Contabiliza as métricas aceitas e descartadas de um envio"""
+    registrar('aceitos', aceitos)
+    registrar('descartados', descartados)
+
+
+def contadores():
+    """Retorna o valor atual de cada contador"""
+    valores = cache.get_many([f'{PREFIXO}:contador:{nome}' for nome in CONTADORES])
+    return {nome: valores.get(f'{PREFIXO}:contador:{nome}', 0) for nome in CONTADORES}
+
+
+def zerar_contadores():
+    cache.delete_many([f'{PREFIXO}:contador:{nome}' for nome in CONTADORES])
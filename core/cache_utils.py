@@ -0,0 +1,121 @@
+"""
+Utilitários de cache com invalidação por versão
+Cada grupo de conteúdo (postagens, postagens de uma categoria, vídeos) tem
+uma versão no cache; alterar o conteúdo troca a versão do grupo e torna
+obsoletas apenas as respostas que dependem dele. As versões ficam no cache
+padrão, que precisa ser compartilhado entre os processos (CACHES em
+config/settings.py) para a invalidação valer no site inteiro
+"""
+import gzip
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags, patch_vary_headers
+
+PREFIXO_VERSAO = 'versao-cache'
+TIMEOUT_RESPOSTAS = 60 * 60 * 24
+
+
+def _nova_versao():
+    # Baseada no relógio: se a chave da versão for despejada do cache, a
+    # versão recriada nunca coincide com uma já usada
+    return time.time_ns()
+
+
+def get_versoes(*grupos):
+    """Retorna a versão atual de cada grupo, criando as que não existirem"""
+    chaves = {f'{PREFIXO_VERSAO}:{grupo}': grupo for grupo in grupos}
+    existentes = cache.get_many(list(chaves))
+    faltantes = {chave: _nova_versao() for chave in chaves if chave not in existentes}
+    if faltantes:
+        cache.set_many(faltantes, None)
+        existentes.update(faltantes)
+    return {grupo: existentes[chave] for chave, grupo in chaves.items()}
+
+
+def invalidar(*grupos):
+    """Troca a versão dos grupos informados, invalidando o que depende deles"""
+    versao = _nova_versao()
+    cache.set_many({f'{PREFIXO_VERSAO}:{grupo}': versao for grupo in set(grupos)}, None)
+
+
+def chave_versionada(nome, grupos, *partes):
+    """Monta uma chave de cache que muda sempre que um dos grupos é invalidado"""
+    versoes = get_versoes(*grupos)
+    assinatura = '-'.join(str(versoes[grupo]) for grupo in grupos)
+    return ':'.join([nome, assinatura, *map(str, partes)])
+
+
+def _aceita_gzip(request):
+    """Indica se o Accept-Encoding aceita gzip (diretamente ou via *) com q > 0"""
+    qualidades = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        codificacao, _, parametros = item.partition(';')
+        codificacao = codificacao.strip().lower()
+        if not codificacao:
+            continue
+        qualidade = 1.0
+        for parametro in parametros.split(';'):
+            nome, _, valor = parametro.partition('=')
+            if nome.strip().lower() == 'q':
+                try:
+                    qualidade = float(valor)
+                except ValueError:
+                    qualidade = 0.0
+        qualidades[codificacao] = qualidade
+    return qualidades.get('gzip', qualidades.get('*', 0)) > 0
+
+
+def _etag_corresponde(request, etag):
+    """Comparação fraca do If-None-Match (RFC 9110), incluindo o curinga *"""
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return '*' in etags or any(candidata.removeprefix('W/') == etag for candidata in etags)
+
+
+def servir_em_cache(request, nome, grupos, gerar, content_type):
+    """
+    Serve uma resposta gerada uma única vez por versão dos grupos
+
+    A resposta é guardada já compactada com gzip e com seu ETag, então
+    requisições condicionais recebem 304 e as demais recebem os bytes
+    prontos, sem consultas ao banco nem renderização.
+
+    Args:
+        nome: Identificador da resposta (ex: 'sitemap')
+        grupos: Grupos de conteúdo dos quais a resposta depende
+        gerar: Função sem argumentos que retorna um HttpResponse
+        content_type: Content-Type da resposta servida
+    """
+    # Host e esquema fazem parte da chave: as URLs geradas são absolutas
+    chave = chave_versionada(nome, grupos, request.scheme, request.get_host())
+    entrada = cache.get(chave)
+
+    if entrada is None:
+        resposta = gerar()
+        if hasattr(resposta, 'render'):
+            resposta.render()
+        if resposta.status_code != 200:
+            return resposta
+        conteudo = resposta.content
+        entrada = {
+            'etag': '"%s"' % hashlib.sha1(conteudo).hexdigest(),
+            'conteudo': conteudo,
+            'conteudo_gzip': gzip.compress(conteudo, compresslevel=9, mtime=0),
+        }
+        cache.set(chave, entrada, TIMEOUT_RESPOSTAS)
+
+    if _etag_corresponde(request, entrada['etag']):
+        resposta = HttpResponseNotModified()
+    elif _aceita_gzip(request):
+        resposta = HttpResponse(entrada['conteudo_gzip'], content_type=content_type)
+        resposta['Content-Encoding'] = 'gzip'
+    else:
+        resposta = HttpResponse(entrada['conteudo'], content_type=content_type)
+
+    resposta['ETag'] = entrada['etag']
+    # Sempre revalidar: o conteúdo muda no momento da publicação, não por tempo
+    resposta['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    patch_vary_headers(resposta, ('Accept-Encoding',))
+    return resposta
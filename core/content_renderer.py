@@ -0,0 +1,327 @@
+"""
+Pipeline de renderização do conteúdo das postagens
+Sanitiza o HTML gerado pelo CKEditor e aplica as otimizações de exibição
+(lazy-loading, dimensões e derivados responsivos das imagens, âncoras nos
+títulos) uma única vez por revisão da postagem
+"""
+import hashlib
+import json
+import logging
+from html import escape
+from html.parser import HTMLParser
+from io import BytesIO
+from pathlib import PurePosixPath
+from urllib.parse import unquote, urlsplit
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+# Tags permitidas no conteúdo final
+TAGS_PERMITIDAS = {
+    'p', 'br', 'hr', 'div', 'span', 'strong', 'b', 'em', 'i', 'u', 's', 'strike',
+    'sub', 'sup', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'a', 'img',
+    'blockquote', 'pre', 'code', 'figure', 'figcaption',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption',
+}
+
+# Tags removidas junto com todo o seu conteúdo
+TAGS_DESCARTADAS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template', 'form'}
+
+TAGS_VAZIAS = {'br', 'hr', 'img'}
+
+ATRIBUTOS_PERMITIDOS = {
+    '*': {'style', 'title', 'class'},
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start', 'type'},
+}
+
+# Propriedades CSS geradas pelos botões do CKEditor (cores, alinhamento)
+ESTILOS_PERMITIDOS = {'color', 'background-color', 'text-align', 'text-decoration', 'font-weight', 'font-style'}
+
+ESQUEMAS_PERMITIDOS = {'', 'http', 'https', 'mailto'}
+
+# Títulos que recebem âncora (id) para links diretos
+TITULOS_COM_ANCORA = {'h2', 'h3', 'h4'}
+
+# Larguras dos derivados WebP gerados para as imagens enviadas ao storage
+LARGURAS_DERIVADOS = (480, 800, 1200)
+PASTA_DERIVADOS = 'derivados'
+# Largura máxima da coluna de leitura (.container-narrow)
+SIZES_CONTEUDO = '(max-width: 800px) 100vw, 800px'
+
+
+def _url_segura(url):
+    """Verifica se a URL usa um esquema permitido (bloqueia javascript:, data: etc.)"""
+    esquema = urlsplit(url.strip()).scheme.lower()
+    return esquema in ESQUEMAS_PERMITIDOS
+
+
+def _filtrar_estilo(valor):
+    """Mantém apenas as declarações CSS permitidas"""
+    declaracoes = []
+    for declaracao in valor.split(';'):
+        if ':' not in declaracao:
+            continue
+        propriedade, _, conteudo = declaracao.partition(':')
+        propriedade = propriedade.strip().lower()
+        conteudo = conteudo.strip()
+        if propriedade in ESTILOS_PERMITIDOS and 'url(' not in conteudo.lower() and 'expression' not in conteudo.lower():
+            declaracoes.append(f'{propriedade}: {conteudo}')
+    return '; '.join(declaracoes)
+
+
+def _nome_no_storage(url):
+    """Converte uma URL de mídia no nome do arquivo dentro do storage padrão"""
+    try:
+        prefixo = default_storage.url('')
+    except Exception:
+        return None
+
+    caminho = urlsplit(url).path
+    prefixo_caminho = urlsplit(prefixo).path
+    mesmo_host = urlsplit(url).netloc in ('', urlsplit(prefixo).netloc)
+    if prefixo_caminho and mesmo_host and caminho.startswith(prefixo_caminho):
+        return unquote(caminho[len(prefixo_caminho):]) or None
+    return None
+
+
+def _ler_manifesto(nome_manifesto):
+    try:
+        with default_storage.open(nome_manifesto, 'rb') as arquivo:
+            dados = json.loads(arquivo.read())
+        return dados['largura'], dados['altura'], [(nome, largura) for nome, largura in dados['derivados']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _gerar_derivados(nome):
+    """
+    Gera (uma única vez) os derivados WebP de uma imagem do storage
+
+    As dimensões do original e os nomes dos derivados ficam em um manifesto
+    JSON ao lado dos derivados: renderizações seguintes leem só esse arquivo
+    pequeno, sem baixar a imagem original nem consultar cada derivado.
+
+    Returns:
+        Tupla (largura, altura, [(url, largura), ...]) ou None se a imagem
+        não puder ser processada
+    """
+    assinatura = hashlib.sha1(nome.encode('utf-8')).hexdigest()[:10]
+    base = PurePosixPath(nome).stem
+    nome_manifesto = f'{PASTA_DERIVADOS}/{base}-{assinatura}.json'
+
+    manifesto = _ler_manifesto(nome_manifesto)
+    if manifesto is not None:
+        largura, altura, derivados = manifesto
+        return largura, altura, [(default_storage.url(nome_derivado), w) for nome_derivado, w in derivados]
+
+    with default_storage.open(nome, 'rb') as arquivo:
+        imagem = Image.open(BytesIO(arquivo.read()))
+        imagem.load()
+
+    largura, altura = imagem.size
+    derivados = []
+    for largura_alvo in LARGURAS_DERIVADOS:
+        if largura_alvo >= largura:
+            break
+        nome_derivado = f'{PASTA_DERIVADOS}/{base}-{assinatura}-{largura_alvo}w.webp'
+        if not default_storage.exists(nome_derivado):
+            altura_alvo = round(altura * largura_alvo / largura)
+            redimensionada = imagem.convert('RGBA' if imagem.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            redimensionada = redimensionada.resize((largura_alvo, altura_alvo), Image.LANCZOS)
+            buffer = BytesIO()
+            redimensionada.save(buffer, 'WEBP', quality=82, method=6)
+            nome_derivado = default_storage.save(nome_derivado, ContentFile(buffer.getvalue()))
+        derivados.append((nome_derivado, largura_alvo))
+
+    if default_storage.exists(nome_manifesto):
+        default_storage.delete(nome_manifesto)
+    default_storage.save(nome_manifesto, ContentFile(json.dumps({
+        'largura': largura, 'altura': altura, 'derivados': derivados,
+    }).encode('utf-8')))
+    return largura, altura, [(default_storage.url(nome_derivado), w) for nome_derivado, w in derivados]
+
+
+class _RenderizadorConteudo(HTMLParser):
+    """Parser que reescreve o HTML do conteúdo aplicando a lista de permissões"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.partes = []
+        self.descartando = 0
+        self.pilha = []
+        self.titulo_aberto = None
+        self.ancoras = set()
+
+    # Utilitários
+    def _formatar_tag(self, tag, atributos, fechada=False):
+        texto = ''.join(
+            f' {nome}' if valor is None else f' {nome}="{escape(valor, quote=True)}"'
+            for nome, valor in atributos
+        )
+        return f'<{tag}{texto}{" /" if fechada else ""}>'
+
+    def _limpar_atributos(self, tag, atributos):
+        permitidos = ATRIBUTOS_PERMITIDOS['*'] | ATRIBUTOS_PERMITIDOS.get(tag, set())
+        limpos = []
+        for nome, valor in atributos:
+            nome = nome.lower()
+            if nome not in permitidos:
+                continue
+            valor = valor or ''
+            if nome in ('href', 'src') and not _url_segura(valor):
+                continue
+            if nome == 'style':
+                valor = _filtrar_estilo(valor)
+                if not valor:
+                    continue
+            limpos.append((nome, valor))
+        return limpos
+
+    def _processar_link(self, atributos):
+        atributos = dict(atributos)
+        if atributos.get('target') == '_blank':
+            atributos['rel'] = 'noopener noreferrer'
+        return list(atributos.items())
+
+    def _processar_imagem(self, atributos):
+        atributos = dict(atributos)
+        src = atributos.get('src')
+        if not src:
+            return None
+
+        nome = _nome_no_storage(src)
+        if nome:
+            try:
+                largura, altura, derivados = _gerar_derivados(nome)
+            except Exception as e:
+                logger.warning(f'Não foi possível gerar derivados para {nome}: {e}')
+            else:
+                atributos['width'] = str(largura)
+                atributos['height'] = str(altura)
+                if derivados:
+                    srcset = [f'{url} {w}w' for url, w in derivados]
+                    srcset.append(f'{src} {largura}w')
+                    atributos['src'] = derivados[-1][0]
+                    atributos['srcset'] = ', '.join(srcset)
+                    atributos['sizes'] = SIZES_CONTEUDO
+
+        atributos.setdefault('alt', '')
+        atributos['loading'] = 'lazy'
+        atributos['decoding'] = 'async'
+        return list(atributos.items())
+
+    def _nova_ancora(self, texto):
+        base = slugify(texto)[:60] or 'secao'
+        ancora = base
+        contador = 2
+        while ancora in self.ancoras:
+            ancora = f'{base}-{contador}'
+            contador += 1
+        self.ancoras.add(ancora)
+        return ancora
+
+    # Callbacks do HTMLParser
+    def handle_starttag(self, tag, attrs):
+        if self.descartando:
+            if tag in TAGS_DESCARTADAS:
+                self.descartando += 1
+            return
+        if tag in TAGS_DESCARTADAS:
+            self.descartando = 1
+            return
+        if tag not in TAGS_PERMITIDAS:
+            return
+
+        atributos = self._limpar_atributos(tag, attrs)
+        if tag == 'a':
+            atributos = self._processar_link(atributos)
+        elif tag == 'img':
+            atributos = self._processar_imagem(atributos)
+            if atributos is None:
+                return
+
+        if tag in TAGS_VAZIAS:
+            self.partes.append(self._formatar_tag(tag, atributos))
+            return
+
+        self.pilha.append(tag)
+        if tag in TITULOS_COM_ANCORA and self.titulo_aberto is None:
+            # O id é definido no fechamento, quando o texto do título já é conhecido
+            self.titulo_aberto = (tag, len(self.partes), atributos, [])
+            self.partes.append('')
+        else:
+            self.partes.append(self._formatar_tag(tag, atributos))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in TAGS_VAZIAS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.descartando:
+            if tag in TAGS_DESCARTADAS:
+                self.descartando -= 1
+            return
+        if tag not in self.pilha or tag in TAGS_VAZIAS:
+            return
+
+        # Fecha tags intermediárias não fechadas para manter o HTML bem formado
+        while self.pilha:
+            aberta = self.pilha.pop()
+            self.partes.append(f'</{aberta}>')
+            if self.titulo_aberto and self.titulo_aberto[0] == aberta:
+                _, indice, atributos, textos = self.titulo_aberto
+                atributos = [(n, v) for n, v in atributos if n != 'id']
+                atributos.append(('id', self._nova_ancora(''.join(textos))))
+                self.partes[indice] = self._formatar_tag(aberta, atributos)
+                self.titulo_aberto = None
+            if aberta == tag:
+                break
+
+    def handle_data(self, data):
+        if self.descartando:
+            return
+        if self.titulo_aberto:
+            self.titulo_aberto[3].append(data)
+        self.partes.append(escape(data, quote=False))
+
+    def handle_entityref(self, name):
+        if not self.descartando:
+            self.partes.append(f'&{name};')
+
+    def handle_charref(self, name):
+        if not self.descartando:
+            self.partes.append(f'&#{name};')
+
+    def renderizar(self):
+        # Um <script>/<style> nunca fechado descarta o resto do conteúdo, mas
+        # as tags permitidas ainda abertas precisam ser fechadas
+        self.descartando = 0
+        while self.pilha:
+            self.handle_endtag(self.pilha[-1])
+        return ''.join(self.partes)
+
+
+def renderizar_conteudo(html):
+    """
+    Sanitiza e otimiza o HTML de uma postagem
+
+    Args:
+        html: Conteúdo bruto vindo do CKEditor
+
+    Returns:
+        HTML pronto para ser servido sem processamento adicional
+    """
+    parser = _RenderizadorConteudo()
+    parser.feed(html or '')
+    parser.close()
+    return parser.renderizar()
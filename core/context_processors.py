@@ -6,6 +6,8 @@ def site_config(request):
     Context processor para disponibilizar as configurações do site
     em todos os templates automaticamente
     """
+    # Os textos legais são longos e só são usados pelas páginas de documentos
+    config = ConfiguracaoSite.objects.defer('politica_privacidade', 'termos_uso').filter(pk=1).first()
     return {
-        'site_config': ConfiguracaoSite.get_config()
+        'site_config': config or ConfiguracaoSite.get_config()
     }
@@ -0,0 +1,478 @@
+"""
+Consolidação diária das estatísticas de visualização
+Cada dia completo vira uma linha de ResumoDiario por conteúdo, uma por tipo
+de conteúdo (conteudo_id nulo) e uma do site inteiro, com contagens, somas e
+um esboço HyperLogLog das sessões. Visitantes únicos de qualquer período saem
+da união dos esboços dos dias, sem percorrer as visualizações; o dia corrente
+(ainda não consolidado) é completado a partir da tabela de visualizações.
+O painel de estatísticas do admin lê apenas esses resumos.
+"""
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .cache_utils import chave_versionada, invalidar
+from .hll import HyperLogLog, hash_64
+from .models import EstatisticaVisualizacao, Postagem, ResumoDiario
+
+logger = logging.getLogger(__name__)
+
+# Contagens aproximadas ficam em cache por alguns minutos (o dia corrente muda)
+TIMEOUT_CONTAGENS = 300
+
+# Agrupamentos aceitos nas séries temporais
+SERIES = {'dia': TruncDay, 'semana': TruncWeek}
+
+# Painel do admin: agrupamento dos resumos diários (dia não precisa truncar)
+GRANULARIDADES = {'dia': None, 'semana': TruncWeek, 'mes': TruncMonth}
+# Pontos por série; períodos mais longos são agregados por semana ou mês
+MAX_PONTOS_PAINEL = 120
+TIPOS_PAINEL = ('home', 'postagem', 'video')
+TOP_POSTAGENS_PAINEL = 10
+# Os resumos só mudam na consolidação, que invalida o grupo 'estatisticas'
+TIMEOUT_PAINEL = 60 * 60 * 24
+
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+class _Acumulador:
+    """Totais de um conteúdo em um dia"""
+
+    __slots__ = ('visualizacoes', 'sessoes', 'esboco', 'tempo_total', 'com_tempo', 'scroll_total')
+
+    def __init__(self):
+        self.visualizacoes = 0
+        self.sessoes = set()
+        self.esboco = HyperLogLog()
+        self.tempo_total = 0
+        self.com_tempo = 0
+        self.scroll_total = 0
+
+    def adicionar(self, sessao, valor_hash, tempo, scroll):
+        self.visualizacoes += 1
+        self.sessoes.add(sessao)
+        self.esboco.adicionar_hash(valor_hash)
+        self.tempo_total += tempo
+        self.com_tempo += tempo > 0
+        self.scroll_total += scroll
+
+
+def consolidar_dia(dia):
+    """
+    Recalcula os resumos de um dia (idempotente) e retorna o total de visualizações
+
+    Os resumos existentes só são substituídos se as linhas brutas ainda
+    estiverem todas no banco: um dia com menos visualizações do que o resumo
+    já registra teve linhas removidas pela retenção, e refazê-lo apagaria o
+    histórico (e os esboços) que só existem no resumo.
+
+    Returns:
+        Total de visualizações, ou None se os resumos existentes foram mantidos
+    """
+    acumuladores = defaultdict(_Acumulador)
+    site = acumuladores[('site', None)]
+
+    linhas = (
+        EstatisticaVisualizacao.objects
+        .filter(
+            data_visualizacao__gte=_inicio_do_dia(dia),
+            data_visualizacao__lt=_inicio_do_dia(dia + timedelta(days=1)),
+        )
+        .order_by()
+        .values_list('tipo_conteudo', 'conteudo_id', 'session_key', 'tempo_visualizacao', 'scroll_profundidade')
+    )
+    for tipo, conteudo_id, sessao, tempo, scroll in linhas.iterator(chunk_size=5000):
+        valor_hash = hash_64(sessao)
+        # conteudo_id nulo resume o tipo inteiro (para a home, a própria página)
+        acumuladores[(tipo, None)].adicionar(sessao, valor_hash, tempo, scroll)
+        if conteudo_id is not None:
+            acumuladores[(tipo, conteudo_id)].adicionar(sessao, valor_hash, tempo, scroll)
+        site.adicionar(sessao, valor_hash, tempo, scroll)
+
+    resumos = [
+        ResumoDiario(
+            tipo_conteudo=tipo,
+            conteudo_id=conteudo_id,
+            dia=dia,
+            visualizacoes=acumulador.visualizacoes,
+            sessoes=len(acumulador.sessoes),
+            sessoes_hll=acumulador.esboco.serializar(),
+            tempo_total=acumulador.tempo_total,
+            visualizacoes_com_tempo=acumulador.com_tempo,
+            scroll_total=acumulador.scroll_total,
+        )
+        for (tipo, conteudo_id), acumulador in acumuladores.items()
+    ]
+    with transaction.atomic():
+        anterior = (
+            ResumoDiario.objects.select_for_update()
+            .filter(dia=dia, tipo_conteudo='site')
+            .values_list('visualizacoes', flat=True)
+            .first()
+        )
+        if anterior is not None and site.visualizacoes < anterior:
+            logger.warning(
+                f'Resumos de {dia} mantidos: {site.visualizacoes} visualizações brutas '
+                f'contra {anterior} já consolidadas (linhas removidas pela retenção)'
+            )
+            return None
+        ResumoDiario.objects.filter(dia=dia).delete()
+        ResumoDiario.objects.bulk_create(resumos, batch_size=500)
+    return site.visualizacoes
+
+
+def ultimo_dia_consolidado():
+    return ResumoDiario.objects.filter(tipo_conteudo='site').aggregate(ultimo=Max('dia'))['ultimo']
+
+
+def consolidar(desde=None, ate=None, progresso=None):
+    """
+    Consolida os dias completos ainda não consolidados
+
+    Por padrão vai do último dia consolidado (refeito, para incluir métricas
+    que chegaram depois) até ontem.
+
+    Args:
+        progresso: Função chamada com o dia e o total de visualizações (None
+            se os resumos do dia foram mantidos, ver consolidar_dia)
+
+    Returns:
+        Número de dias consolidados
+    """
+    ate = ate or timezone.localdate() - timedelta(days=1)
+    if desde is None:
+        desde = ultimo_dia_consolidado()
+        if desde is None:
+            primeira = EstatisticaVisualizacao.objects.aggregate(primeira=Min('data_visualizacao'))['primeira']
+            if primeira is None:
+                return 0
+            desde = timezone.localdate(primeira)
+
+    dias = 0
+    dia = desde
+    while dia <= ate:
+        visualizacoes = consolidar_dia(dia)
+        if progresso:
+            progresso(dia, visualizacoes)
+        dia += timedelta(days=1)
+        dias += 1
+
+    if dias:
+        invalidar('estatisticas')
+    return dias
+
+
+def _filtro_visualizacoes(tipo, conteudo_id):
+    if tipo == 'site':
+        return {}
+    if conteudo_id is None:
+        return {'tipo_conteudo': tipo}
+    return {'tipo_conteudo': tipo, 'conteudo_id': conteudo_id}
+
+
+def contar_unicos(tipo, conteudo_id=None, inicio=None, fim=None, exato=False):
+    """
+    Sessões únicas de um conteúdo entre dois dias
+
+    Com conteudo_id=None conta o tipo inteiro (todas as postagens, por
+    exemplo); o tipo 'site' conta todas as visualizações.
+
+    Args:
+        inicio: Primeiro dia (inclusive); None conta desde o início
+        fim: Último dia (inclusive); padrão: hoje
+        exato: Conta direto nas visualizações (para auditoria), sem esboços
+
+    Returns:
+        Número de sessões únicas (aproximado em ~1% quando exato=False)
+    """
+    fim = fim or timezone.localdate()
+    if inicio and inicio > fim:
+        return 0
+
+    if not exato:
+        chave = chave_versionada('unicos', ('estatisticas',), tipo, conteudo_id, inicio, fim)
+        total = cache.get(chave)
+        if total is not None:
+            return total
+
+    ultimo = None if exato else ultimo_dia_consolidado()
+    if ultimo is None:
+        # Auditoria, ou nenhum dia consolidado ainda
+        visualizacoes = EstatisticaVisualizacao.objects.filter(
+            data_visualizacao__lt=_inicio_do_dia(fim + timedelta(days=1)),
+            **_filtro_visualizacoes(tipo, conteudo_id),
+        )
+        if inicio:
+            visualizacoes = visualizacoes.filter(data_visualizacao__gte=_inicio_do_dia(inicio))
+        return visualizacoes.values('session_key').distinct().count()
+
+    esboco = HyperLogLog()
+    # conteudo_id=None vira IS NULL: a linha do tipo inteiro (ou do site)
+    resumos = ResumoDiario.objects.filter(tipo_conteudo=tipo, conteudo_id=conteudo_id, dia__lte=min(fim, ultimo))
+    if inicio:
+        resumos = resumos.filter(dia__gte=inicio)
+    for dados in resumos.values_list('sessoes_hll', flat=True):
+        esboco.mesclar_serializado(dados)
+
+    # Dias ainda não consolidados (normalmente só hoje)
+    if fim > ultimo:
+        inicio_pendente = max(inicio, ultimo + timedelta(days=1)) if inicio else ultimo + timedelta(days=1)
+        pendentes = EstatisticaVisualizacao.objects.filter(
+            data_visualizacao__gte=_inicio_do_dia(inicio_pendente),
+            data_visualizacao__lt=_inicio_do_dia(fim + timedelta(days=1)),
+            **_filtro_visualizacoes(tipo, conteudo_id),
+        ).order_by().values_list('session_key', flat=True).distinct()
+        for sessao in pendentes.iterator(chunk_size=5000):
+            esboco.adicionar(sessao)
+
+    total = len(esboco)
+    cache.set(chave, total, TIMEOUT_CONTAGENS)
+    return total
+
+
+def _periodo_da_serie(dia, serie):
+    """Primeiro dia do período da série (semanas começam na segunda, como o TruncWeek)"""
+    return dia - timedelta(days=dia.weekday()) if serie == 'semana' else dia
+
+
+def metricas_postagens(ids, inicio=None, fim=None, serie=None):
+    """
+    Métricas de várias postagens de uma vez
+
+    Os mesmos números de get_postagem_stats: visualizações, visitantes únicos
+    (união dos esboços HyperLogLog, como em contar_unicos), tempo e scroll
+    médios por visualização (como no painel) e engajamento. Os dias já
+    consolidados saem dos resumos diários, que continuam existindo depois da
+    retenção; só os dias ainda não consolidados são lidos das visualizações.
+
+    Args:
+        ids: IDs das postagens
+        inicio: Primeiro dia (inclusive); None considera desde o início
+        fim: Último dia (inclusive); padrão: hoje
+        serie: 'dia' ou 'semana' para incluir visualizações por período
+
+    Returns:
+        Dicionário {id: métricas}, com todas as postagens informadas
+    """
+    ids = sorted(set(ids))
+    fim = fim or timezone.localdate()
+    # Listas longas de IDs não cabem em uma chave de cache
+    assinatura = hashlib.sha1(','.join(map(str, ids)).encode()).hexdigest()
+    chave = chave_versionada('metricas-postagens', ('estatisticas',), inicio, fim, serie, assinatura)
+    metricas = cache.get(chave)
+    if metricas is not None:
+        return metricas
+
+    totais = {pk: {'visualizacoes': 0, 'tempo_total': 0, 'com_tempo': 0, 'scroll_total': 0} for pk in ids}
+    periodos = defaultdict(int)
+    esbocos = defaultdict(HyperLogLog)
+
+    ultimo = ultimo_dia_consolidado()
+    pendentes_desde = inicio
+    if ultimo is not None and (inicio is None or inicio <= ultimo):
+        resumos = ResumoDiario.objects.filter(tipo_conteudo='postagem', conteudo_id__in=ids, dia__lte=min(fim, ultimo))
+        if inicio:
+            resumos = resumos.filter(dia__gte=inicio)
+        linhas = resumos.order_by().values_list(
+            'conteudo_id', 'dia', 'visualizacoes', 'tempo_total', 'visualizacoes_com_tempo', 'scroll_total', 'sessoes_hll'
+        )
+        for pk, dia, visualizacoes, tempo, com_tempo, scroll, esboco in linhas.iterator(chunk_size=2000):
+            totais[pk]['visualizacoes'] += visualizacoes
+            totais[pk]['tempo_total'] += tempo
+            totais[pk]['com_tempo'] += com_tempo
+            totais[pk]['scroll_total'] += scroll
+            esbocos[pk].mesclar_serializado(esboco)
+            if serie:
+                periodo = _periodo_da_serie(dia, serie)
+                periodos[(pk, periodo)] += visualizacoes
+                esbocos[(pk, periodo)].mesclar_serializado(esboco)
+        pendentes_desde = max(inicio, ultimo + timedelta(days=1)) if inicio else ultimo + timedelta(days=1)
+
+    # Dias ainda não consolidados (normalmente só hoje)
+    if pendentes_desde is None or pendentes_desde <= fim:
+        visualizacoes = EstatisticaVisualizacao.objects.filter(
+            tipo_conteudo='postagem',
+            conteudo_id__in=ids,
+            data_visualizacao__lt=_inicio_do_dia(fim + timedelta(days=1)),
+        ).order_by()
+        if pendentes_desde:
+            visualizacoes = visualizacoes.filter(data_visualizacao__gte=_inicio_do_dia(pendentes_desde))
+
+        agregados = visualizacoes.values('conteudo_id').annotate(
+            total=Count('id'),
+            tempo=Sum('tempo_visualizacao'),
+            com_tempo=Count('id', filter=Q(tempo_visualizacao__gt=0)),
+            scroll=Sum('scroll_profundidade'),
+        )
+        for linha in agregados:
+            totais[linha['conteudo_id']]['visualizacoes'] += linha['total']
+            totais[linha['conteudo_id']]['tempo_total'] += linha['tempo'] or 0
+            totais[linha['conteudo_id']]['com_tempo'] += linha['com_tempo']
+            totais[linha['conteudo_id']]['scroll_total'] += linha['scroll'] or 0
+        sessoes = visualizacoes.values_list('conteudo_id', 'session_key').distinct()
+        for pk, sessao in sessoes.iterator(chunk_size=5000):
+            esbocos[pk].adicionar(sessao)
+
+        if serie:
+            por_periodo = visualizacoes.annotate(periodo=SERIES[serie]('data_visualizacao'))
+            for linha in por_periodo.values('conteudo_id', 'periodo').annotate(total=Count('id')):
+                periodos[(linha['conteudo_id'], timezone.localdate(linha['periodo']))] += linha['total']
+            sessoes = por_periodo.values_list('conteudo_id', 'periodo', 'session_key').distinct()
+            for pk, periodo, sessao in sessoes.iterator(chunk_size=5000):
+                esbocos[(pk, timezone.localdate(periodo))].adicionar(sessao)
+
+    metricas = {}
+    for pk, total in totais.items():
+        # Como em Postagem.get_tempo_medio_visualizacao: o tempo médio ignora as visualizações sem tempo
+        medias = _medias(total['visualizacoes'], total['tempo_total'], total['scroll_total'], total['com_tempo'])
+        metricas[pk] = {
+            'visualizacoes': total['visualizacoes'],
+            'visitantes_unicos': len(esbocos[pk]) if pk in esbocos else 0,
+            **medias,
+            'taxa_engajamento': Postagem.classificar_engajamento(medias['tempo_medio'], medias['scroll_medio']),
+        }
+        if serie:
+            metricas[pk]['serie'] = []
+    if serie:
+        for pk, periodo in sorted(periodos):
+            metricas[pk]['serie'].append({
+                'periodo': periodo.isoformat(),
+                'visualizacoes': periodos[(pk, periodo)],
+                'visitantes_unicos': len(esbocos[(pk, periodo)]),
+            })
+
+    cache.set(chave, metricas, TIMEOUT_CONTAGENS)
+    return metricas
+
+
+def granularidade_para(inicio, fim):
+    """Menor agrupamento que mantém a série com até MAX_PONTOS_PAINEL pontos"""
+    dias = (fim - inicio).days + 1
+    if dias <= MAX_PONTOS_PAINEL:
+        return 'dia'
+    if dias <= MAX_PONTOS_PAINEL * 7:
+        return 'semana'
+    return 'mes'
+
+
+def _periodos(inicio, fim, granularidade):
+    """Início de cada período entre os dois dias (os sem dados também aparecem no gráfico)"""
+    if granularidade == 'semana':
+        atual = inicio - timedelta(days=inicio.weekday())
+    elif granularidade == 'mes':
+        atual = inicio.replace(day=1)
+    else:
+        atual = inicio
+    while atual <= fim:
+        yield atual
+        if granularidade == 'mes':
+            atual = (atual.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            atual += timedelta(days=7 if granularidade == 'semana' else 1)
+
+
+def _medias(visualizacoes, tempo_total, scroll_total, com_tempo=None):
+    """Tempo e scroll médios; com_tempo, se informado, é o denominador do tempo"""
+    com_tempo = visualizacoes if com_tempo is None else com_tempo
+    return {
+        'tempo_medio': round(tempo_total / com_tempo) if com_tempo else 0,
+        'scroll_medio': round(scroll_total / visualizacoes) if visualizacoes else 0,
+    }
+
+
+def painel(inicio, fim, granularidade=None):
+    """
+    Dados do painel de estatísticas do admin, lidos apenas dos resumos diários
+
+    Um ano de dados são poucas linhas por dia (site e um total por tipo de
+    conteúdo); só o ranking do período agrupa as linhas das postagens.
+
+    Args:
+        inicio, fim: Dias consolidados considerados (inclusive)
+        granularidade: 'dia', 'semana' ou 'mes'; padrão: granularidade_para()
+
+    Returns:
+        Dicionário com a série por tipo, as tendências de tempo e scroll, a
+        divisão entre tipos e as postagens mais vistas do período
+    """
+    granularidade = granularidade or granularidade_para(inicio, fim)
+    chave = chave_versionada('painel', ('estatisticas',), inicio, fim, granularidade)
+    dados = cache.get(chave)
+    if dados is not None:
+        return dados
+
+    truncar = GRANULARIDADES[granularidade]
+    resumos = ResumoDiario.objects.filter(dia__gte=inicio, dia__lte=fim).order_by()
+    totais = (
+        resumos.filter(conteudo_id__isnull=True, tipo_conteudo__in=('site', *TIPOS_PAINEL))
+        .annotate(periodo=truncar('dia') if truncar else F('dia'))
+        .values('periodo', 'tipo_conteudo')
+        .annotate(
+            visualizacoes=Sum('visualizacoes'),
+            sessoes=Sum('sessoes'),
+            tempo_total=Sum('tempo_total'),
+            scroll_total=Sum('scroll_total'),
+        )
+    )
+
+    periodos = {periodo: {'periodo': periodo.isoformat(), **dict.fromkeys(TIPOS_PAINEL, 0)} for periodo in _periodos(inicio, fim, granularidade)}
+    tendencias = {periodo: {'periodo': periodo.isoformat(), 'visualizacoes': 0, 'sessoes': 0, **_medias(0, 0, 0)} for periodo in periodos}
+    divisao = dict.fromkeys(TIPOS_PAINEL, 0)
+    for linha in totais:
+        periodo, tipo = linha['periodo'], linha['tipo_conteudo']
+        if tipo == 'site':
+            tendencias[periodo].update(
+                visualizacoes=linha['visualizacoes'],
+                # Soma das sessões únicas de cada dia (uma sessão em dois dias conta duas vezes)
+                sessoes=linha['sessoes'],
+                **_medias(linha['visualizacoes'], linha['tempo_total'], linha['scroll_total']),
+            )
+        else:
+            periodos[periodo][tipo] = linha['visualizacoes']
+            divisao[tipo] += linha['visualizacoes']
+
+    top = list(
+        resumos.filter(tipo_conteudo='postagem', conteudo_id__isnull=False)
+        .values('conteudo_id')
+        .annotate(
+            visualizacoes=Sum('visualizacoes'),
+            tempo_total=Sum('tempo_total'),
+            scroll_total=Sum('scroll_total'),
+        )
+        .order_by('-visualizacoes', 'conteudo_id')[:TOP_POSTAGENS_PAINEL]
+    )
+    titulos = dict(Postagem.objects.filter(pk__in=[linha['conteudo_id'] for linha in top]).values_list('pk', 'titulo'))
+
+    total = sum(divisao.values())
+    dados = {
+        'inicio': inicio.isoformat(),
+        'fim': fim.isoformat(),
+        'granularidade': granularidade,
+        'serie': list(periodos.values()),
+        'tendencias': list(tendencias.values()),
+        'divisao': {
+            tipo: {'visualizacoes': valor, 'percentual': round(100 * valor / total, 1) if total else 0}
+            for tipo, valor in divisao.items()
+        },
+        'top_postagens': [
+            {
+                'pk': linha['conteudo_id'],
+                # Postagens excluídas continuam nos resumos
+                'titulo': titulos.get(linha['conteudo_id'], f'Postagem #{linha["conteudo_id"]} (excluída)'),
+                'visualizacoes': linha['visualizacoes'],
+                **_medias(linha['visualizacoes'], linha['tempo_total'], linha['scroll_total']),
+            }
+            for linha in top
+        ],
+    }
+    cache.set(chave, dados, TIMEOUT_PAINEL)
+    return dados
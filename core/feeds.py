@@ -0,0 +1,97 @@
+"""
+Feeds RSS/Atom de postagens (geral e por categoria) e de vídeos
+Os itens vêm de consultas values() leves, sem instanciar os models
+"""
+from django.contrib.syndication.views import Feed
+from django.http import Http404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from .models import Postagem, Video
+
+ITENS_POR_FEED = 20
+
+
+class PostagemFeed(Feed):
+    """Feed RSS das postagens publicadas, opcionalmente filtradas por categoria"""
+    description = 'Reviews, novidades e dicas sobre jogos de tabuleiro e RPG'
+
+    def get_object(self, request, categoria=None):
+        if categoria and categoria not in dict(Postagem.CATEGORIA_CHOICES):
+            raise Http404('Categoria inexistente')
+        return categoria
+
+    def title(self, categoria):
+        if categoria:
+            return f'Mesa Secreta - {dict(Postagem.CATEGORIA_CHOICES)[categoria]}'
+        return 'Mesa Secreta - Postagens'
+
+    def link(self, categoria):
+        url = reverse('core:postagem_list')
+        return f'{url}?categoria={categoria}' if categoria else url
+
+    def items(self, categoria):
+        postagens = Postagem.objects.publicadas()
+        if categoria:
+            postagens = postagens.filter(categoria=categoria)
+        return postagens.order_by('-data_publicacao').values(
+            'pk', 'titulo', 'subtitulo', 'categoria', 'data_publicacao', 'data_atualizacao'
+        )[:ITENS_POR_FEED]
+
+    def item_title(self, item):
+        return item['titulo']
+
+    def item_description(self, item):
+        return item['subtitulo']
+
+    def item_link(self, item):
+        return reverse('core:postagem_detail', args=[item['pk']])
+
+    def item_pubdate(self, item):
+        return item['data_publicacao']
+
+    def item_updateddate(self, item):
+        return item['data_atualizacao']
+
+    def item_categories(self, item):
+        return [dict(Postagem.CATEGORIA_CHOICES).get(item['categoria'], item['categoria'])]
+
+
+class PostagemAtomFeed(PostagemFeed):
+    feed_type = Atom1Feed
+    subtitle = PostagemFeed.description
+
+
+class VideoFeed(Feed):
+    """Feed RSS dos vídeos mais recentes do canal"""
+    title = 'Mesa Secreta - Vídeos'
+    description = 'Vídeos do canal Mesa Secreta no YouTube'
+
+    def link(self):
+        return reverse('core:video_list')
+
+    def items(self):
+        return Video.objects.order_by('-data_publicacao').values(
+            'youtube_id', 'titulo', 'descricao', 'data_publicacao'
+        )[:ITENS_POR_FEED]
+
+    def item_title(self, item):
+        return item['titulo']
+
+    def item_description(self, item):
+        return item['descricao']
+
+    def item_link(self, item):
+        return f'https://www.youtube.com/watch?v={item["youtube_id"]}'
+
+    def item_guid(self, item):
+        return f'yt:video:{item["youtube_id"]}'
+
+    item_guid_is_permalink = False
+
+    def item_pubdate(self, item):
+        return item['data_publicacao']
+
+
+class VideoAtomFeed(VideoFeed):
+    feed_type = Atom1Feed
+    subtitle = VideoFeed.description
@@ -0,0 +1,393 @@
+"""
+Instrumentação de desempenho por requisição
+Mede, para cada URL resolvida, o número de consultas, o tempo de SQL, as
+consultas duplicadas, o tempo de renderização de templates e o tempo de
+chamadas externas (YouTube, Supabase). As amostras ficam em um buffer
+circular em memória por nome de URL, exibido no relatório do admin.
+
+Os mesmos pontos de medição alimentam o cabeçalho Server-Timing e,
+opcionalmente, spans no formato OTLP/JSON gravados em arquivo (um trace
+por linha), legíveis pelo receptor otlpjsonfile do OpenTelemetry Collector.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates as BaseDjangoTemplates
+from django.template.backends.django import Template as BaseTemplate
+
+# Categorias de tempo medidas além do SQL
+CATEGORIAS = ('tpl', 'yt', 'storage')
+
+logger = logging.getLogger(__name__)
+
+_metricas_atuais = ContextVar('metricas_requisicao', default=None)
+
+
+class MetricasRequisicao:
+    """Métricas acumuladas durante uma única requisição"""
+
+    def __init__(self, rastrear=False, trace_id=None, span_pai=None):
+        self.inicio = perf_counter()
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.fingerprints = Counter()
+        self.tempos = dict.fromkeys(CATEGORIAS, 0.0)
+        # Spans só são coletados quando o exportador em arquivo está ativo
+        self.spans = [] if rastrear else None
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self._pilha = [span_pai] if span_pai else []
+
+    def adicionar(self, categoria, duracao):
+        self.tempos[categoria] = self.tempos.get(categoria, 0.0) + duracao
+
+    def abrir_span(self, nome, **atributos):
+        if self.spans is None:
+            return None
+        span = {
+            'traceId': self.trace_id,
+            'spanId': os.urandom(8).hex(),
+            'parentSpanId': self._pilha[-1] if self._pilha else '',
+            'name': nome,
+            'kind': 1,
+            'startTimeUnixNano': time.time_ns(),
+            'atributos': atributos,
+        }
+        self._pilha.append(span['spanId'])
+        return span
+
+    def fechar_span(self, span, **atributos):
+        if span is None:
+            return
+        if self._pilha and self._pilha[-1] == span['spanId']:
+            self._pilha.pop()
+        span['endTimeUnixNano'] = time.time_ns()
+        span['atributos'].update(atributos)
+        self.spans.append(span)
+
+    @property
+    def duplicadas(self):
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def amostra(self):
+        return {
+            'total': perf_counter() - self.inicio,
+            'consultas': self.consultas,
+            'sql': self.tempo_sql,
+            'duplicadas': self.duplicadas,
+            **self.tempos,
+        }
+
+
+def get_metricas():
+    """Retorna as métricas da requisição em andamento (ou None fora de uma)"""
+    return _metricas_atuais.get()
+
+
+@contextmanager
+def medir(categoria, nome=None, excluir_sql=False):
+    """
+    Soma o tempo do bloco à categoria na requisição atual
+
+    Args:
+        categoria: 'tpl', 'yt' ou 'storage'
+        nome: Nome do span no trace (padrão: a categoria)
+        excluir_sql: desconta o SQL executado dentro do bloco (querysets
+            avaliados durante a renderização já são contados como SQL)
+    """
+    metricas = _metricas_atuais.get()
+    if metricas is None:
+        yield
+        return
+
+    span = metricas.abrir_span(nome or categoria, categoria=categoria)
+    sql_antes = metricas.tempo_sql
+    inicio = perf_counter()
+    try:
+        yield
+    finally:
+        duracao = perf_counter() - inicio
+        if excluir_sql:
+            duracao -= metricas.tempo_sql - sql_antes
+        metricas.adicionar(categoria, max(duracao, 0.0))
+        metricas.fechar_span(span)
+
+
+def medido(categoria):
+    """Decorator equivalente a medir() para funções e métodos"""
+    def decorator(funcao):
+        @wraps(funcao)
+        def wrapper(*args, **kwargs):
+            with medir(categoria, funcao.__qualname__):
+                return funcao(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===================================
+# SQL
+# ===================================
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS_IN = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+
+
+def fingerprint_sql(sql):
+    """Normaliza a consulta removendo literais, para agrupar consultas repetidas"""
+    sql = _LITERAIS.sub('?', sql)
+    sql = _LISTAS_IN.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def _registrar_consulta(execute, sql, params, many, context):
+    metricas = _metricas_atuais.get()
+    if metricas is None:
+        return execute(sql, params, many, context)
+
+    fingerprint = fingerprint_sql(sql)
+    span = metricas.abrir_span('db', **{
+        'db.system': context['connection'].vendor,
+        'db.statement': fingerprint,
+    })
+    inicio = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metricas.tempo_sql += perf_counter() - inicio
+        metricas.consultas += 1
+        metricas.fingerprints[fingerprint] += 1
+        metricas.fechar_span(span)
+
+
+# ===================================
+# Templates
+# ===================================
+
+class Template(BaseTemplate):
+    """Template que soma o tempo de renderização à requisição atual"""
+
+    def render(self, context=None, request=None):
+        with medir('tpl', self.template.name, excluir_sql=True):
+            return super().render(context, request)
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """Backend de templates do Django com medição do tempo de renderização"""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return Template(template.template, self)
+
+
+# ===================================
+# Agregação
+# ===================================
+
+def _percentil(valores_ordenados, percentil):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, round(percentil / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+class AgregadorDesempenho:
+    """Buffer circular de amostras por nome de URL (seguro entre threads)"""
+
+    MAX_FINGERPRINTS = 200
+
+    def __init__(self, amostras_por_url=500):
+        self.amostras_por_url = amostras_por_url
+        self._lock = threading.Lock()
+        self._amostras = {}
+        self._duplicadas = {}
+
+    def registrar(self, nome_url, metricas):
+        amostra = metricas.amostra()
+        repetidas = {fp: n - 1 for fp, n in metricas.fingerprints.items() if n > 1}
+        with self._lock:
+            if nome_url not in self._amostras:
+                self._amostras[nome_url] = deque(maxlen=self.amostras_por_url)
+                self._duplicadas[nome_url] = Counter()
+            self._amostras[nome_url].append(amostra)
+            if repetidas:
+                contador = self._duplicadas[nome_url]
+                contador.update(repetidas)
+                if len(contador) > self.MAX_FINGERPRINTS:
+                    self._duplicadas[nome_url] = Counter(dict(contador.most_common(self.MAX_FINGERPRINTS // 2)))
+
+    def limpar(self):
+        with self._lock:
+            self._amostras.clear()
+            self._duplicadas.clear()
+
+    def relatorio(self):
+        """Resumo por URL, ordenado pelo p95 do tempo total (piores primeiro)"""
+        with self._lock:
+            copia = {nome: list(amostras) for nome, amostras in self._amostras.items()}
+            duplicadas = {nome: contador.most_common(5) for nome, contador in self._duplicadas.items()}
+
+        linhas = []
+        for nome, amostras in copia.items():
+            linha = {'url': nome, 'requisicoes': len(amostras), 'duplicadas_top': duplicadas.get(nome, [])}
+            for metrica in ('total', 'sql', *CATEGORIAS):
+                valores = sorted(a[metrica] for a in amostras)
+                for p in (50, 95, 99):
+                    linha[f'{metrica}_p{p}'] = _percentil(valores, p) * 1000
+            consultas = [a['consultas'] for a in amostras]
+            linha['consultas_media'] = sum(consultas) / len(consultas)
+            linha['consultas_max'] = max(consultas)
+            linha['duplicadas_media'] = sum(a['duplicadas'] for a in amostras) / len(amostras)
+            linhas.append(linha)
+
+        return sorted(linhas, key=lambda linha: linha['total_p95'], reverse=True)
+
+
+agregador = AgregadorDesempenho(getattr(settings, 'INSTRUMENTACAO_AMOSTRAS', 500))
+
+
+# ===================================
+# Server-Timing e exportação de spans
+# ===================================
+
+_TRACEPARENT = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+
+def server_timing(metricas):
+    """Monta o valor do cabeçalho Server-Timing a partir das métricas"""
+    partes = [
+        f'db;dur={metricas.tempo_sql * 1000:.1f};desc="{metricas.consultas} consultas"',
+        f'tpl;dur={metricas.tempos["tpl"] * 1000:.1f}',
+    ]
+    for categoria in ('yt', 'storage'):
+        if metricas.tempos[categoria]:
+            partes.append(f'{categoria};dur={metricas.tempos[categoria] * 1000:.1f}')
+    partes.append(f'total;dur={(perf_counter() - metricas.inicio) * 1000:.1f}')
+    return ', '.join(partes)
+
+
+def _valor_otlp(valor):
+    if isinstance(valor, bool):
+        return {'boolValue': valor}
+    if isinstance(valor, int):
+        return {'intValue': str(valor)}
+    if isinstance(valor, float):
+        return {'doubleValue': valor}
+    return {'stringValue': str(valor)}
+
+
+class ExportadorArquivo:
+    """Grava cada trace como uma linha OTLP/JSON (ExportTraceServiceRequest)"""
+
+    def __init__(self, caminho, servico='mesa-secreta'):
+        self.caminho = caminho
+        self.servico = servico
+        self._lock = threading.Lock()
+
+    def exportar(self, spans):
+        if not spans:
+            return
+        spans_otlp = []
+        for span in spans:
+            span = dict(span)
+            span['startTimeUnixNano'] = str(span['startTimeUnixNano'])
+            span['endTimeUnixNano'] = str(span['endTimeUnixNano'])
+            span['attributes'] = [
+                {'key': chave, 'value': _valor_otlp(valor)} for chave, valor in span.pop('atributos').items()
+            ]
+            spans_otlp.append(span)
+
+        linha = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.servico}}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans_otlp}],
+        }]}, separators=(',', ':'))
+        with self._lock, open(self.caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linha + '\n')
+
+
+class InstrumentacaoMiddleware:
+    """
+    Middleware que coleta as métricas de cada requisição. Conforme as
+    configurações, registra as amostras no agregador por nome de URL
+    (INSTRUMENTACAO_ATIVA), adiciona o cabeçalho Server-Timing
+    (INSTRUMENTACAO_SERVER_TIMING) e exporta os spans para um arquivo
+    (INSTRUMENTACAO_SPANS_ARQUIVO). Funciona em WSGI e em ASGI
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.agregar = getattr(settings, 'INSTRUMENTACAO_ATIVA', False)
+        self.server_timing = getattr(settings, 'INSTRUMENTACAO_SERVER_TIMING', False)
+        arquivo_spans = getattr(settings, 'INSTRUMENTACAO_SPANS_ARQUIVO', '')
+        self.exportador = ExportadorArquivo(arquivo_spans) if arquivo_spans else None
+        if not (self.agregar or self.server_timing or self.exportador):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metricas, span, token = self._iniciar(request)
+        try:
+            with connections['default'].execute_wrapper(_registrar_consulta):
+                response = self.get_response(request)
+        finally:
+            _metricas_atuais.reset(token)
+        return self._finalizar(request, response, metricas, span)
+
+    async def __acall__(self, request):
+        # As consultas das views assíncronas rodam em threads (sync_to_async),
+        # que herdam o contexto: a mesma conexão e as mesmas métricas
+        metricas, span, token = self._iniciar(request)
+        try:
+            with connections['default'].execute_wrapper(_registrar_consulta):
+                response = await self.get_response(request)
+        finally:
+            _metricas_atuais.reset(token)
+        return self._finalizar(request, response, metricas, span)
+
+    def _iniciar(self, request):
+        # Continua o trace do chamador quando há um cabeçalho traceparent (W3C)
+        pai = _TRACEPARENT.match(request.headers.get('traceparent', ''))
+        metricas = MetricasRequisicao(
+            rastrear=self.exportador is not None,
+            trace_id=pai.group(1) if pai else None,
+            span_pai=pai.group(2) if pai else None,
+        )
+        span = metricas.abrir_span(f'{request.method} {request.path}', **{'http.method': request.method})
+        return metricas, span, _metricas_atuais.set(metricas)
+
+    def _finalizar(self, request, response, metricas, span):
+        match = getattr(request, 'resolver_match', None)
+        if self.agregar and match is not None:
+            agregador.registrar(match.view_name, metricas)
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(metricas)
+        if self.exportador:
+            if match is not None:
+                span['name'] = f'{request.method} {match.route or match.view_name}'
+                span['atributos']['http.route'] = match.view_name
+            metricas.fechar_span(span, **{'http.status_code': response.status_code})
+            try:
+                self.exportador.exportar(metricas.spans)
+            except OSError as e:
+                logger.warning(f'Não foi possível gravar os spans: {e}')
+        return response
@@ -0,0 +1,171 @@
+"""
+Comando de gerenciamento Django para gerar o subconjunto de ícones do Font Awesome
+Uso: python manage.py build_icons [--origem /caminho/fontawesome-free]
+
+Procura as classes fa-* usadas nos templates, nos scripts e no código Python
+do app e gera fontes WOFF2 contendo apenas esses ícones, junto com o CSS
+mínimo (core/css/icones.css, incluído no bundle de estilos).
+
+Dependências de build (não necessárias em produção):
+    pip install fonttools brotli fontawesomefree==6.5.1
+"""
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+PASTA_APP = Path(settings.BASE_DIR) / 'core'
+DESTINO_CSS = PASTA_APP / 'static' / 'core' / 'css' / 'icones.css'
+DESTINO_FONTES = PASTA_APP / 'static' / 'core' / 'fonts'
+
+# Arquivos onde as classes são procuradas
+PADROES_BUSCA = ('templates/**/*.html', 'static/core/js/*.js', '*.py')
+
+CLASSE_ICONE = re.compile(r'\bfa-[a-z0-9]+(?:-[a-z0-9]+)*\b')
+
+# Estilo: (classes que o selecionam, família, peso, arquivo de origem)
+ESTILOS = {
+    'solid': (('fa-solid', 'fas'), 'Font Awesome 6 Free', 900, 'fa-solid-900'),
+    'regular': (('fa-regular', 'far'), 'Font Awesome 6 Free', 400, 'fa-regular-400'),
+    'brands': (('fa-brands', 'fab'), 'Font Awesome 6 Brands', 400, 'fa-brands-400'),
+}
+
+# Utilitários do Font Awesome suportados no CSS gerado
+UTILITARIOS = {
+    'fa-fw': 'text-align:center;width:1.25em',
+    'fa-xs': 'font-size:.75em;line-height:.08333em;vertical-align:.125em',
+    'fa-sm': 'font-size:.875em;line-height:.07143em;vertical-align:.05357em',
+    'fa-lg': 'font-size:1.25em;line-height:.05em;vertical-align:-.075em',
+    'fa-2x': 'font-size:2em',
+    'fa-3x': 'font-size:3em',
+    'fa-spin': 'animation:fa-spin 2s linear infinite',
+}
+
+
+class Command(BaseCommand):
+    help = 'Gera fontes WOFF2 e CSS apenas com os ícones do Font Awesome usados no site'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--origem',
+            type=str,
+            help='Pasta do pacote fontawesome-free (padrão: pacote Python fontawesomefree instalado)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError('fonttools não está instalado (pip install fonttools brotli)')
+
+        origem = self._pasta_origem(options.get('origem'))
+        metadados = json.loads((origem / 'metadata' / 'icons.json').read_text(encoding='utf-8'))
+
+        # Nome (incluindo aliases antigos, ex: fa-times) -> (nome canônico, dados)
+        icones = {}
+        for nome, dados in metadados.items():
+            icones[nome] = (nome, dados)
+            for alias in dados.get('aliases', {}).get('names', []):
+                icones.setdefault(alias, (nome, dados))
+
+        classes = self._classes_usadas()
+        estilos_usados = {
+            estilo for estilo, (seletores, *_) in ESTILOS.items()
+            if any(seletor in classes for seletor in seletores)
+        }
+        prefixos = {seletor for seletores, *_ in ESTILOS.values() for seletor in seletores}
+
+        usados = {}
+        for classe in sorted(classes - prefixos - set(UTILITARIOS)):
+            nome = classe[len('fa-'):]
+            if nome not in icones:
+                self.stdout.write(self.style.WARNING(f'   ⚠️  {classe} não é um ícone do Font Awesome, ignorado'))
+                continue
+            usados[classe] = icones[nome][1]
+
+        if not usados:
+            raise CommandError('Nenhum ícone encontrado')
+
+        self.stdout.write(self.style.WARNING(
+            f'Gerando subconjunto com {len(usados)} ícone(s) nos estilos {", ".join(sorted(estilos_usados))}...'
+        ))
+
+        DESTINO_FONTES.mkdir(parents=True, exist_ok=True)
+        font_faces = []
+        for estilo in sorted(estilos_usados):
+            _, familia, peso, arquivo = ESTILOS[estilo]
+            codigos = sorted({int(dados['unicode'], 16) for dados in usados.values() if estilo in dados['styles']})
+            if not codigos:
+                continue
+
+            opcoes = subset.Options()
+            opcoes.flavor = 'woff2'
+            opcoes.layout_features = []
+            fonte = subset.load_font(str(origem / 'webfonts' / f'{arquivo}.ttf'), opcoes)
+            subsetter = subset.Subsetter(opcoes)
+            subsetter.populate(unicodes=codigos)
+            subsetter.subset(fonte)
+            destino = DESTINO_FONTES / f'{arquivo}.woff2'
+            subset.save_font(fonte, str(destino), opcoes)
+
+            original = (origem / 'webfonts' / f'{arquivo}.woff2').stat().st_size
+            self.stdout.write(
+                f'   {destino.name}: {len(codigos)} glifo(s), '
+                f'{destino.stat().st_size / 1024:.1f} KB (original {original / 1024:.1f} KB)'
+            )
+            font_faces.append(
+                f'@font-face{{font-family:"{familia}";font-style:normal;font-weight:{peso};'
+                f'font-display:block;src:url("../fonts/{arquivo}.woff2") format("woff2")}}'
+            )
+
+        DESTINO_CSS.write_text(self._gerar_css(font_faces, usados, classes), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {DESTINO_CSS.relative_to(settings.BASE_DIR)} gerado ({DESTINO_CSS.stat().st_size / 1024:.1f} KB)'
+        ))
+
+    def _pasta_origem(self, origem):
+        if origem:
+            pasta = Path(origem)
+        else:
+            try:
+                import fontawesomefree
+            except ImportError:
+                raise CommandError('Informe --origem ou instale o pacote fontawesomefree')
+            pasta = Path(fontawesomefree.__file__).parent / 'static' / 'fontawesomefree'
+
+        if not (pasta / 'metadata' / 'icons.json').exists():
+            raise CommandError(f'Pacote do Font Awesome não encontrado em {pasta}')
+        return pasta
+
+    def _classes_usadas(self):
+        classes = set()
+        for padrao in PADROES_BUSCA:
+            for arquivo in PASTA_APP.glob(padrao):
+                classes.update(CLASSE_ICONE.findall(arquivo.read_text(encoding='utf-8')))
+        # Abreviações de estilo (fas, fab, far) não começam com fa-
+        for arquivo in PASTA_APP.glob('templates/**/*.html'):
+            classes.update(re.findall(r'\bfa[srb]\b', arquivo.read_text(encoding='utf-8')))
+        return classes
+
+    def _gerar_css(self, font_faces, usados, classes):
+        seletores_base = sorted({seletor for seletores, *_ in ESTILOS.values() for seletor in seletores})
+        linhas = [
+            '/* Gerado por "python manage.py build_icons" - não editar manualmente */',
+            '/* Font Awesome Free 6.5.1 - https://fontawesome.com/license/free (Fonts: SIL OFL 1.1, Code: MIT) */',
+            *font_faces,
+            ','.join(f'.{seletor}' for seletor in seletores_base) +
+            '{-moz-osx-font-smoothing:grayscale;-webkit-font-smoothing:antialiased;display:inline-block;'
+            'font-style:normal;font-variant:normal;line-height:1;text-rendering:auto}',
+        ]
+        for seletores, familia, peso, _ in ESTILOS.values():
+            linhas.append(f'{",".join("." + s for s in seletores)}{{font-family:"{familia}";font-weight:{peso}}}')
+        for classe in sorted(set(UTILITARIOS) & classes):
+            linhas.append(f'.{classe}{{{UTILITARIOS[classe]}}}')
+        if 'fa-spin' in classes:
+            linhas.append('@keyframes fa-spin{0%{transform:rotate(0deg)}to{transform:rotate(1turn)}}')
+        for classe, dados in sorted(usados.items()):
+            linhas.append(f'.{classe}:before{{content:"\\{dados["unicode"]}"}}')
+        return '\n'.join(linhas) + '\n'
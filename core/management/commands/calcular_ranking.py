@@ -0,0 +1,51 @@
+"""
+Comando de gerenciamento Django para recalcular o ranking de postagens da home
+Uso: python manage.py calcular_ranking [--janela 30] [--meia-vida 3] [--tamanho 20]
+
+Deve ser agendado (ex: a cada hora), como o sync_youtube
+"""
+from django.core.management.base import BaseCommand
+from core import ranking
+from core.models import RankingPostagem
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as listas "em alta" e "mais lidos" a partir das estatísticas de visualização'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--janela',
+            type=int,
+            help='Dias de visualizações considerados (padrão: RANKING_JANELA_DIAS)',
+        )
+        parser.add_argument(
+            '--meia-vida',
+            type=float,
+            help='Meia-vida em dias do decaimento da lista "em alta" (padrão: RANKING_MEIA_VIDA_DIAS)',
+        )
+        parser.add_argument(
+            '--tamanho',
+            type=int,
+            help='Postagens guardadas por lista (padrão: RANKING_TAMANHO)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Calculando ranking de postagens...'))
+
+        resultado = ranking.calcular_ranking(
+            janela_dias=options.get('janela'),
+            meia_vida_dias=options.get('meia_vida'),
+            tamanho=options.get('tamanho'),
+        )
+
+        for lista, nome in RankingPostagem.LISTA_CHOICES:
+            self.stdout.write(f'\n{nome}:')
+            for entrada in RankingPostagem.objects.filter(lista=lista).select_related('postagem')[:5]:
+                self.stdout.write(
+                    f'   {entrada.posicao}. {entrada.postagem.titulo} '
+                    f'({entrada.pontuacao:.1f} pts, {entrada.sessoes_unicas} sessões)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {resultado["postagens"]} postagem(ns) ranqueada(s) em {resultado["duracao"]:.2f}s'
+        ))
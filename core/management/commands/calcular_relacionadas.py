@@ -0,0 +1,45 @@
+"""
+Comando de gerenciamento Django para recalcular as postagens relacionadas
+Uso: python manage.py calcular_relacionadas [--quantidade 6] [--bonus-categoria 0.1]
+
+Salvar uma postagem já atualiza os vizinhos afetados; o recálculo completo
+atualiza também os pesos IDF de todas as listas (ex: agendar diariamente)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from core import relacionadas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as postagens relacionadas (TF-IDF) de todas as postagens publicadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quantidade',
+            type=int,
+            help='Vizinhos guardados por postagem (padrão: RELACIONADAS_QUANTIDADE)',
+        )
+        parser.add_argument(
+            '--bonus-categoria',
+            type=float,
+            help='Bônus de similaridade para a mesma categoria (padrão: RELACIONADAS_BONUS_CATEGORIA)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import scipy  # noqa: F401
+            motor = 'NumPy/SciPy'
+        except ImportError:
+            motor = 'Python puro (instale numpy e scipy para acelerar)'
+        self.stdout.write(self.style.WARNING(f'Calculando postagens relacionadas com {motor}...'))
+
+        inicio = time.perf_counter()
+        resultado = relacionadas.recalcular(
+            k=options.get('quantidade'),
+            bonus=options.get('bonus_categoria'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado["relacoes"]} relação(ões) entre {resultado["postagens"]} postagem(ns) '
+            f'em {time.perf_counter() - inicio:.2f}s'
+        ))
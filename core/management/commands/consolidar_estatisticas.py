@@ -0,0 +1,57 @@
+"""
+Comando de gerenciamento Django para consolidar as estatísticas de visualização
+Uso: python manage.py consolidar_estatisticas [--desde 2026-01-01] [--ate 2026-01-31]
+
+Deve ser agendado diariamente (logo após a meia-noite); o prune_estatisticas
+também consolida antes de excluir as linhas antigas. Com a tabela
+particionada, também cria as partições dos próximos meses
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from core import estatisticas, retention
+
+
+def _data(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f'Data inválida: {valor} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Gera os resumos diários (contagens e esboços de visitantes únicos) das estatísticas de visualização'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Primeiro dia (AAAA-MM-DD; padrão: último dia já consolidado)',
+        )
+        parser.add_argument(
+            '--ate',
+            help='Último dia (AAAA-MM-DD; padrão: ontem)',
+        )
+
+    def handle(self, *args, **options):
+        desde = _data(options['desde']) if options.get('desde') else None
+        ate = _data(options['ate']) if options.get('ate') else None
+
+        if retention.tabela_particionada():
+            retention.garantir_particoes()
+
+        self.stdout.write(self.style.WARNING('Consolidando estatísticas de visualização...'))
+
+        dias = estatisticas.consolidar(desde=desde, ate=ate, progresso=self.progresso)
+
+        if not dias:
+            self.stdout.write(self.style.SUCCESS('✅ Nada a consolidar'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'✅ {dias} dia(s) consolidado(s)'))
+
+    def progresso(self, dia, total):
+        if total is None:
+            self.stdout.write(self.style.WARNING(
+                f'   {dia:%d/%m/%Y}: resumos mantidos (linhas brutas já removidas pela retenção)'
+            ))
+        else:
+            self.stdout.write(f'   {dia:%d/%m/%Y}: {total} visualização(ões)')
@@ -0,0 +1,80 @@
+"""
+Comando de gerenciamento Django para aplicar a retenção das estatísticas
+Uso: python manage.py prune_estatisticas [--dias 180] [--formato ndjson|parquet]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from core import retention
+
+
+class Command(BaseCommand):
+    help = 'Arquiva no storage e remove as estatísticas de visualização mais antigas que o prazo de retenção'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Prazo de retenção em dias (padrão: ESTATISTICAS_RETENCAO_DIAS)',
+        )
+        parser.add_argument(
+            '--formato',
+            choices=['ndjson', 'parquet'],
+            help='Formato do arquivo (padrão: ESTATISTICAS_ARQUIVO_FORMATO)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Linhas excluídas por transação (padrão: ESTATISTICAS_LOTE_EXCLUSAO)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra quantas linhas seriam arquivadas',
+        )
+        parser.add_argument(
+            '--converter-particoes',
+            action='store_true',
+            help='Converte a tabela em particionada por mês (somente PostgreSQL) antes de aplicar a retenção',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options.get('converter_particoes'):
+                self.stdout.write(self.style.WARNING('Convertendo tabela para particionamento mensal...'))
+                if retention.converter_para_particionada():
+                    self.stdout.write(self.style.SUCCESS('✅ Tabela convertida para partições mensais'))
+                else:
+                    self.stdout.write(self.style.SUCCESS('✅ Tabela já é particionada'))
+            
+            data_limite = retention.get_data_limite(options.get('dias'))
+            self.stdout.write(self.style.WARNING(
+                f'Aplicando retenção: estatísticas anteriores a {data_limite:%d/%m/%Y %H:%M}...'
+            ))
+            
+            resultados = retention.aplicar_retencao(
+                dias=options.get('dias'),
+                formato=options.get('formato'),
+                lote=options.get('lote'),
+                dry_run=options.get('dry_run'),
+            )
+        except retention.RetencaoError as e:
+            raise CommandError(str(e))
+        
+        if not resultados:
+            self.stdout.write(self.style.SUCCESS('✅ Nenhuma estatística expirada'))
+            return
+        
+        for resultado in resultados:
+            if options.get('dry_run'):
+                self.stdout.write(f'   {resultado["mes"]}: {resultado["arquivadas"]} linha(s) seriam arquivadas')
+                continue
+            detalhe = ' (partição descartada)' if resultado['particao_descartada'] else ''
+            self.stdout.write(self.style.SUCCESS(
+                f'   {resultado["mes"]}: {resultado["arquivadas"]} arquivada(s) em '
+                f'{resultado["arquivo"] or "-"}, {resultado["excluidas"]} excluída(s){detalhe}'
+            ))
+        
+        if options.get('dry_run'):
+            return
+        
+        total = sum(r['excluidas'] for r in resultados)
+        self.stdout.write(self.style.SUCCESS(f'✅ Retenção concluída! Total excluído: {total}'))
@@ -0,0 +1,59 @@
+"""
+Comando de gerenciamento Django para publicar as postagens agendadas
+Uso: python manage.py publicar_agendadas [--loop] [--intervalo 60]
+
+Sem --loop publica o que venceu e termina (cron a cada minuto). Com --loop
+fica rodando e acorda na data da próxima postagem agendada, ou a cada
+--intervalo segundos para perceber agendamentos novos. Sem o comando, a
+primeira requisição depois da data publica (AGENDAMENTO_NAS_REQUISICOES).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core import agendamento
+
+
+class Command(BaseCommand):
+    help = 'Publica as postagens agendadas cuja data chegou e invalida os caches afetados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Continua rodando e publica cada postagem na hora agendada',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=60,
+            help='Espera máxima em segundos entre verificações no modo --loop (padrão: 60)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.publicar()
+            return
+
+        self.stdout.write(self.style.WARNING('⏰ Agendador iniciado (Ctrl+C para sair)'))
+        try:
+            while True:
+                self.publicar()
+                # Conexões longas caem (timeout do banco): renova entre ciclos
+                close_old_connections()
+                time.sleep(self.espera(options['intervalo']))
+        except KeyboardInterrupt:
+            self.stdout.write('\n👋 Agendador encerrado')
+
+    def publicar(self):
+        for pk, titulo in agendamento.publicar_vencidas():
+            self.stdout.write(self.style.SUCCESS(f'✅ Publicada: {titulo} (#{pk})'))
+
+    def espera(self, intervalo):
+        """Segundos até a próxima postagem agendada, limitados ao intervalo"""
+        proxima = agendamento.proxima_publicacao()
+        if proxima is None:
+            return intervalo
+        return min(intervalo, max((proxima - timezone.now()).total_seconds(), 0) + 0.5)
@@ -0,0 +1,38 @@
+"""
+Comando de gerenciamento Django para pré-renderizar o conteúdo das postagens
+Uso: python manage.py render_postagens [--todas]
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from core.models import Postagem
+
+
+class Command(BaseCommand):
+    help = 'Gera o HTML renderizado das postagens cuja revisão ainda não foi processada'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Renderiza novamente todas as postagens, mesmo as atualizadas',
+        )
+
+    def handle(self, *args, **options):
+        postagens = Postagem.objects.all()
+        if not options.get('todas'):
+            postagens = postagens.filter(
+                Q(conteudo_renderizado_versao__isnull=True) |
+                ~Q(conteudo_renderizado_versao=F('data_atualizacao'))
+            )
+        
+        self.stdout.write(self.style.WARNING('Renderizando conteúdo das postagens...'))
+        
+        total = 0
+        for postagem in postagens.iterator():
+            if not postagem.renderizar_conteudo():
+                self.stdout.write(self.style.ERROR(
+                    f'❌ {postagem.titulo} (#{postagem.pk}): {postagem.erro_renderizacao} (servindo só o texto)'
+                ))
+            total += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} postagem(ns) renderizada(s)'))
@@ -0,0 +1,73 @@
+"""
+Comando de gerenciamento Django para gerar dados em escala (testes de desempenho)
+Uso: python manage.py seed_scale [--visualizacoes 10000000] [--semente 42] [--limpar]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from core import seeding
+
+
+class Command(BaseCommand):
+    help = 'Gera postagens, vídeos e visualizações sintéticas em volume, de forma determinística'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--postagens', type=int, default=2000, help='Quantidade de postagens (padrão: 2000)')
+        parser.add_argument('--videos', type=int, default=1000, help='Quantidade de vídeos (padrão: 1000)')
+        parser.add_argument(
+            '--visualizacoes',
+            type=int,
+            default=1000000,
+            help='Quantidade de estatísticas de visualização (padrão: 1000000)',
+        )
+        parser.add_argument('--dias', type=int, default=365, help='Janela de datas dos dados (padrão: 365)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador (padrão: 42)')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=seeding.LOTE_PADRAO,
+            help=f'Linhas gravadas por transação (padrão: {seeding.LOTE_PADRAO})',
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Remove os dados gerados anteriormente antes de gerar novos',
+        )
+        parser.add_argument(
+            '--apenas-limpar',
+            action='store_true',
+            help='Apenas remove os dados gerados anteriormente',
+        )
+
+    def handle(self, *args, **options):
+        if options['limpar'] or options['apenas_limpar']:
+            self.stdout.write(self.style.WARNING('Removendo dados gerados anteriormente...'))
+            removidos = seeding.limpar()
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Removidos: {removidos["postagens"]} postagem(ns), {removidos["videos"]} vídeo(s), '
+                f'{removidos["visualizacoes"]} visualização(ões)'
+            ))
+            if options['apenas_limpar']:
+                return
+
+        inicio = time.monotonic()
+        total = options['visualizacoes']
+
+        def progresso(gravadas):
+            decorrido = time.monotonic() - inicio
+            self.stdout.write(f'   {gravadas}/{total} visualizações ({gravadas / decorrido:,.0f} linhas/s)')
+
+        self.stdout.write(self.style.WARNING(
+            f'Gerando {options["postagens"]} postagem(ns), {options["videos"]} vídeo(s) e '
+            f'{total} visualização(ões) com semente {options["semente"]}...'
+        ))
+        seeding.semear(
+            postagens=options['postagens'],
+            videos=options['videos'],
+            visualizacoes=total,
+            semente=options['semente'],
+            dias=options['dias'],
+            lote=options['lote'],
+            progresso=progresso,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Dados gerados em {time.monotonic() - inicio:.1f}s'))
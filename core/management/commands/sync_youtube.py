@@ -1,8 +1,11 @@
 """
 Comando de gerenciamento Django para sincronizar vídeos do YouTube
 Uso: python manage.py sync_youtube
+
+Também baixa as thumbnails dos vídeos que ainda não as têm (core/thumbnails.py)
 """
 from django.core.management.base import BaseCommand
+from core import thumbnails
 from core.youtube_service import YouTubeService
 
 
@@ -21,6 +24,11 @@ class Command(BaseCommand):
             default=15,
             help='Número máximo de vídeos a buscar (padrão: 15)',
         )
+        parser.add_argument(
+            '--sem-thumbnails',
+            action='store_true',
+            help='Não baixa as thumbnails pendentes',
+        )
 
     def handle(self, *args, **options):
         channel_id = options.get('channel_id')
@@ -35,3 +43,8 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'   Novos vídeos: {novos}'))
         self.stdout.write(self.style.SUCCESS(f'   Vídeos atualizados: {atualizados}'))
         self.stdout.write(self.style.SUCCESS(f'   Total processado: {novos + atualizados}'))
+        
+        if not options.get('sem_thumbnails'):
+            self.stdout.write(self.style.WARNING('Gerando thumbnails pendentes...'))
+            geradas = thumbnails.gerar_pendentes()
+            self.stdout.write(self.style.SUCCESS(f'🖼️ Thumbnails geradas: {geradas}'))
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_configuracaosite_banner_ativo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postagem',
+            name='conteudo_renderizado',
+            field=models.TextField(blank=True, editable=False, verbose_name='Conteúdo Renderizado'),
+        ),
+        migrations.AddField(
+            model_name='postagem',
+            name='conteudo_renderizado_versao',
+            field=models.DateTimeField(blank=True, editable=False, help_text='data_atualizacao da revisão que gerou o HTML renderizado', null=True, verbose_name='Versão do Conteúdo Renderizado'),
+        ),
+    ]
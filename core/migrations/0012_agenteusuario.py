@@ -0,0 +1,151 @@
+# Generated by Django 6.0 on 2026-10-19 17:41
+
+import hashlib
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+# Cópia da classificação de core/user_agents.py no momento desta migração:
+# mudanças futuras no módulo não alteram o que ela grava
+_BOT = re.compile(
+    r'bot|crawl|spider|slurp|scrap|fetch|preview|monitor|curl|wget|python-requests|'
+    r'httpclient|okhttp|go-http|java/|axios|node-fetch|headless|lighthouse|pingdom|'
+    r'facebookexternalhit|whatsapp|telegram|discord|embedly|bingpreview|feed',
+    re.IGNORECASE
+)
+_TABLET = re.compile(r'ipad|tablet|kindle|silk|playbook|(android(?!.*mobile))', re.IGNORECASE)
+_MOBILE = re.compile(r'mobi|iphone|ipod|android.*mobile|windows phone|blackberry|opera mini|iemobile', re.IGNORECASE)
+_NAVEGADORES = (
+    ('Edge', re.compile(r'edg(?:e|a|ios)?/', re.IGNORECASE)),
+    ('Opera', re.compile(r'opr/|opera', re.IGNORECASE)),
+    ('Samsung Internet', re.compile(r'samsungbrowser', re.IGNORECASE)),
+    ('Firefox', re.compile(r'firefox|fxios', re.IGNORECASE)),
+    ('Chrome', re.compile(r'chrome|crios|chromium', re.IGNORECASE)),
+    ('Safari', re.compile(r'safari', re.IGNORECASE)),
+    ('Internet Explorer', re.compile(r'msie|trident', re.IGNORECASE)),
+)
+_SISTEMAS = (
+    ('iOS', re.compile(r'iphone|ipad|ipod', re.IGNORECASE)),
+    ('Android', re.compile(r'android', re.IGNORECASE)),
+    ('Windows', re.compile(r'windows', re.IGNORECASE)),
+    ('macOS', re.compile(r'mac os x|macintosh', re.IGNORECASE)),
+    ('ChromeOS', re.compile(r'\bcros\b', re.IGNORECASE)),
+    ('Linux', re.compile(r'linux|x11', re.IGNORECASE)),
+)
+
+TAMANHO_LOTE = 1000
+
+
+def _primeiro(padroes, user_agent):
+    for nome, padrao in padroes:
+        if padrao.search(user_agent):
+            return nome
+    return ''
+
+
+def _agente(user_agent):
+    if _BOT.search(user_agent):
+        dispositivo = 'bot'
+    elif _TABLET.search(user_agent):
+        dispositivo = 'tablet'
+    elif _MOBILE.search(user_agent):
+        dispositivo = 'mobile'
+    elif user_agent.startswith('Mozilla/'):
+        dispositivo = 'desktop'
+    else:
+        dispositivo = 'outro'
+    return {
+        'hash': hashlib.sha1(user_agent.encode('utf-8', 'replace')).hexdigest(),
+        'user_agent': user_agent,
+        'dispositivo': dispositivo,
+        'navegador': '' if dispositivo == 'bot' else _primeiro(_NAVEGADORES, user_agent),
+        'sistema_operacional': _primeiro(_SISTEMAS, user_agent),
+    }
+
+
+def popular_agentes(apps, schema_editor):
+    """
+    Move as strings de user agent para a dimensão
+
+    Cada UA distinto é analisado uma vez; as visualizações são então ligadas
+    à dimensão por um único UPDATE (no PostgreSQL, UPDATE ... FROM com hash
+    join), em vez de um UPDATE com varredura da tabela por UA.
+    """
+    EstatisticaVisualizacao = apps.get_model('core', 'EstatisticaVisualizacao')
+    AgenteUsuario = apps.get_model('core', 'AgenteUsuario')
+
+    distintos = (
+        EstatisticaVisualizacao.objects
+        .exclude(user_agent='')
+        .order_by()
+        .values_list('user_agent', flat=True)
+        .distinct()
+    )
+    lote = []
+    for user_agent in distintos.iterator():
+        lote.append(AgenteUsuario(**_agente(user_agent)))
+        if len(lote) >= TAMANHO_LOTE:
+            AgenteUsuario.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+    AgenteUsuario.objects.bulk_create(lote, ignore_conflicts=True)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        visualizacoes = schema_editor.quote_name(EstatisticaVisualizacao._meta.db_table)
+        agentes = schema_editor.quote_name(AgenteUsuario._meta.db_table)
+        schema_editor.execute(
+            f'UPDATE {visualizacoes} AS v SET agente_id = a.id FROM {agentes} AS a '
+            f"WHERE a.user_agent = v.user_agent AND v.user_agent <> ''"
+        )
+    else:
+        EstatisticaVisualizacao.objects.exclude(user_agent='').update(agente=Subquery(
+            AgenteUsuario.objects.filter(user_agent=OuterRef('user_agent')).values('pk')[:1]
+        ))
+
+
+def restaurar_user_agents(apps, schema_editor):
+    EstatisticaVisualizacao = apps.get_model('core', 'EstatisticaVisualizacao')
+    AgenteUsuario = apps.get_model('core', 'AgenteUsuario')
+
+    EstatisticaVisualizacao.objects.filter(agente__isnull=False).update(user_agent=Subquery(
+        AgenteUsuario.objects.filter(pk=OuterRef('agente_id')).values('user_agent')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_postagem_conteudo_renderizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgenteUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(help_text='SHA-1 da string do user agent', max_length=40, unique=True, verbose_name='Hash')),
+                ('user_agent', models.TextField(verbose_name='User Agent')),
+                ('dispositivo', models.CharField(choices=[('desktop', 'Desktop'), ('mobile', 'Celular'), ('tablet', 'Tablet'), ('bot', 'Robô'), ('outro', 'Outro')], db_index=True, default='outro', max_length=10, verbose_name='Dispositivo')),
+                ('navegador', models.CharField(blank=True, max_length=50, verbose_name='Navegador')),
+                ('sistema_operacional', models.CharField(blank=True, max_length=50, verbose_name='Sistema Operacional')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Primeira Ocorrência')),
+            ],
+            options={
+                'verbose_name': 'User Agent',
+                'verbose_name_plural': 'User Agents',
+                'ordering': ['navegador', 'sistema_operacional'],
+            },
+        ),
+        migrations.AddField(
+            model_name='estatisticavisualizacao',
+            name='agente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='visualizacoes', to='core.agenteusuario', verbose_name='User Agent'),
+        ),
+        migrations.RunPython(popular_agentes, restaurar_user_agents),
+        migrations.RemoveField(
+            model_name='estatisticavisualizacao',
+            name='user_agent',
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 18:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_agenteusuario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingPostagem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lista', models.CharField(choices=[('em_alta', 'Em Alta'), ('mais_lidos', 'Mais Lidos')], max_length=20, verbose_name='Lista')),
+                ('posicao', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('pontuacao', models.FloatField(default=0, verbose_name='Pontuação')),
+                ('sessoes_unicas', models.IntegerField(default=0, verbose_name='Sessões Únicas')),
+                ('tempo_medio', models.FloatField(default=0, verbose_name='Tempo Médio (segundos)')),
+                ('scroll_medio', models.FloatField(default=0, verbose_name='Scroll Médio (%)')),
+                ('calculado_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculado em')),
+                ('postagem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='core.postagem', verbose_name='Postagem')),
+            ],
+            options={
+                'verbose_name': 'Ranking de Postagem',
+                'verbose_name_plural': 'Ranking de Postagens',
+                'ordering': ['lista', 'posicao'],
+                'constraints': [models.UniqueConstraint(fields=('lista', 'posicao'), name='ranking_lista_posicao_unica')],
+            },
+        ),
+    ]
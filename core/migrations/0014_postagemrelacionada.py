@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 18:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_rankingpostagem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostagemRelacionada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('similaridade', models.FloatField(verbose_name='Similaridade')),
+                ('postagem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionadas', to='core.postagem', verbose_name='Postagem')),
+                ('relacionada', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.postagem', verbose_name='Relacionada')),
+            ],
+            options={
+                'verbose_name': 'Postagem Relacionada',
+                'verbose_name_plural': 'Postagens Relacionadas',
+                'ordering': ['postagem', 'posicao'],
+                'constraints': [models.UniqueConstraint(fields=('postagem', 'posicao'), name='relacionada_postagem_posicao_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_postagemrelacionada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_conteudo', models.CharField(choices=[('postagem', 'Postagem'), ('video', 'Vídeo'), ('home', 'Página Inicial'), ('site', 'Site Inteiro')], max_length=20, verbose_name='Tipo de Conteúdo')),
+                ('conteudo_id', models.IntegerField(blank=True, null=True, verbose_name='ID do Conteúdo')),
+                ('dia', models.DateField(verbose_name='Dia')),
+                ('visualizacoes', models.IntegerField(default=0, verbose_name='Visualizações')),
+                ('sessoes', models.IntegerField(default=0, verbose_name='Sessões Únicas no Dia')),
+                ('sessoes_hll', models.BinaryField(verbose_name='Esboço HyperLogLog das Sessões')),
+                ('tempo_total', models.BigIntegerField(default=0, verbose_name='Tempo Total (segundos)')),
+                ('scroll_total', models.BigIntegerField(default=0, verbose_name='Scroll Total (%)')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário',
+                'verbose_name_plural': 'Resumos Diários',
+                'ordering': ['-dia'],
+                'indexes': [models.Index(fields=['tipo_conteudo', 'conteudo_id', 'dia'], name='core_resumo_tipo_co_3efeec_idx'), models.Index(fields=['dia'], name='core_resumo_dia_f96e95_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_resumodiario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Derivados WebP no storage por largura (gerados pelo sync_youtube)', verbose_name='Thumbnails'),
+        ),
+    ]
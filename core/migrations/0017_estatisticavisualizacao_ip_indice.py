@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-19 18:33
+
+from django.db import migrations, models
+
+
+def _particoes(schema_editor, tabela):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [tabela]
+        )
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def criar_indice(apps, schema_editor):
+    """
+    Cria o índice de ip_address sem bloquear as gravações no PostgreSQL
+
+    Com CREATE INDEX CONCURRENTLY a tabela de estatísticas continua recebendo
+    beacons durante a construção. Tabelas particionadas (core/retention.py)
+    não aceitam CONCURRENTLY: o índice é criado apenas na tabela pai (ON ONLY)
+    e o de cada partição é construído concorrentemente e anexado a ele.
+    """
+    EstatisticaVisualizacao = apps.get_model('core', 'EstatisticaVisualizacao')
+    campo = EstatisticaVisualizacao._meta.get_field('ip_address')
+    tabela = EstatisticaVisualizacao._meta.db_table
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(schema_editor._create_index_sql(EstatisticaVisualizacao, fields=[campo]))
+        return
+
+    q = schema_editor.quote_name
+    nome = schema_editor._create_index_name(tabela, [campo.column])
+    particoes = _particoes(schema_editor, tabela)
+    if not particoes:
+        schema_editor.execute(schema_editor._create_index_sql(EstatisticaVisualizacao, fields=[campo], concurrently=True))
+        return
+
+    schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {q(nome)} ON ONLY {q(tabela)} ({q(campo.column)})')
+    for particao in particoes:
+        nome_particao = schema_editor._create_index_name(particao, [campo.column])
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {q(nome_particao)} ON {q(particao)} ({q(campo.column)})')
+        schema_editor.execute(f'ALTER INDEX {q(nome)} ATTACH PARTITION {q(nome_particao)}')
+
+
+def remover_indice(apps, schema_editor):
+    EstatisticaVisualizacao = apps.get_model('core', 'EstatisticaVisualizacao')
+    campo = EstatisticaVisualizacao._meta.get_field('ip_address')
+    tabela = EstatisticaVisualizacao._meta.db_table
+    nome = schema_editor._create_index_name(tabela, [campo.column])
+    # DROP INDEX CONCURRENTLY também não vale para índices de tabelas particionadas
+    concorrente = schema_editor.connection.vendor == 'postgresql' and not _particoes(schema_editor, tabela)
+    if concorrente:
+        schema_editor.execute(schema_editor._delete_index_sql(EstatisticaVisualizacao, nome, concurrently=True))
+    else:
+        schema_editor.execute(schema_editor._delete_index_sql(EstatisticaVisualizacao, nome))
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('core', '0016_video_thumbnails'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='estatisticavisualizacao',
+                    name='ip_address',
+                    field=models.GenericIPAddressField(blank=True, db_index=True, null=True, verbose_name='IP Address'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(criar_indice, remover_indice),
+            ],
+        ),
+    ]
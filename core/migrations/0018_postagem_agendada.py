@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 18:37
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def agendar_futuras(apps, schema_editor):
+    """Postagens já publicadas com data futura passam a esperar o agendador"""
+    Postagem = apps.get_model('core', 'Postagem')
+    Postagem.objects.filter(status='publicado', data_publicacao__gt=timezone.now()).update(status='agendado')
+
+
+def publicar_agendadas(apps, schema_editor):
+    Postagem = apps.get_model('core', 'Postagem')
+    Postagem.objects.filter(status='agendado').update(status='publicado')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_estatisticavisualizacao_ip_indice'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postagem',
+            name='status',
+            field=models.CharField(choices=[('rascunho', 'Rascunho'), ('agendado', 'Agendado'), ('publicado', 'Publicado')], default='rascunho', max_length=20, verbose_name='Status'),
+        ),
+        migrations.RunPython(agendar_futuras, publicar_agendadas),
+    ]
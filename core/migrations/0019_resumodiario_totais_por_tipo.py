@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-19 19:05
+
+from django.db import migrations
+
+
+def criar_totais_por_tipo(apps, schema_editor):
+    """Deriva dos resumos por conteúdo as linhas de total por tipo (conteudo_id nulo)"""
+    from core.hll import HyperLogLog
+
+    ResumoDiario = apps.get_model('core', 'ResumoDiario')
+    dias = ResumoDiario.objects.filter(tipo_conteudo='site').values_list('dia', flat=True)
+    for dia in dias.iterator():
+        for tipo in ('postagem', 'video'):
+            linhas = list(ResumoDiario.objects.filter(dia=dia, tipo_conteudo=tipo))
+            if not linhas:
+                continue
+            esboco = HyperLogLog()
+            for linha in linhas:
+                esboco.mesclar_serializado(linha.sessoes_hll)
+            ResumoDiario.objects.filter(dia=dia, tipo_conteudo=tipo, conteudo_id__isnull=True).delete()
+            ResumoDiario.objects.create(
+                tipo_conteudo=tipo,
+                conteudo_id=None,
+                dia=dia,
+                visualizacoes=sum(linha.visualizacoes for linha in linhas),
+                # Sem as sessões originais, o número de sessões únicas vem do esboço
+                sessoes=len(esboco),
+                sessoes_hll=esboco.serializar(),
+                tempo_total=sum(linha.tempo_total for linha in linhas),
+                scroll_total=sum(linha.scroll_total for linha in linhas),
+            )
+
+
+def remover_totais_por_tipo(apps, schema_editor):
+    ResumoDiario = apps.get_model('core', 'ResumoDiario')
+    ResumoDiario.objects.filter(tipo_conteudo__in=('postagem', 'video'), conteudo_id__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_postagem_agendada'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_totais_por_tipo, remover_totais_por_tipo),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 19:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_resumodiario_totais_por_tipo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postagem',
+            name='data_atualizacao',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Data de Atualização'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-19 21:10
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def popular_visualizacoes_com_tempo(apps, schema_editor):
+    """
+    Conta as visualizações com tempo dos resumos já existentes
+
+    Dias cujas linhas brutas ainda estão todas no banco são recontados; nos
+    que a retenção já removeu, a única aproximação possível é considerar que
+    todas as visualizações do resumo tiveram tempo (se houve algum tempo)
+    """
+    ResumoDiario = apps.get_model('core', 'ResumoDiario')
+    EstatisticaVisualizacao = apps.get_model('core', 'EstatisticaVisualizacao')
+
+    ResumoDiario.objects.filter(tempo_total__gt=0).update(visualizacoes_com_tempo=F('visualizacoes'))
+
+    primeira = EstatisticaVisualizacao.objects.order_by('data_visualizacao').values_list('data_visualizacao', flat=True).first()
+    if primeira is None:
+        return
+    dias = (
+        ResumoDiario.objects.filter(tipo_conteudo='site', dia__gte=timezone.localdate(primeira))
+        .values_list('dia', 'visualizacoes')
+    )
+    for dia, visualizacoes in list(dias):
+        linhas = EstatisticaVisualizacao.objects.filter(
+            data_visualizacao__gte=_inicio_do_dia(dia),
+            data_visualizacao__lt=_inicio_do_dia(dia + timedelta(days=1)),
+        ).order_by()
+        if linhas.count() < visualizacoes:
+            continue
+        contagens = Counter()
+        por_conteudo = linhas.filter(tempo_visualizacao__gt=0).values_list('tipo_conteudo', 'conteudo_id')
+        for tipo, conteudo_id in por_conteudo.iterator(chunk_size=5000):
+            contagens['site', None] += 1
+            contagens[tipo, None] += 1
+            if conteudo_id is not None:
+                contagens[tipo, conteudo_id] += 1
+        resumos = list(ResumoDiario.objects.filter(dia=dia))
+        for resumo in resumos:
+            resumo.visualizacoes_com_tempo = contagens[resumo.tipo_conteudo, resumo.conteudo_id]
+        ResumoDiario.objects.bulk_update(resumos, ['visualizacoes_com_tempo'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_postagem_data_atualizacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumodiario',
+            name='visualizacoes_com_tempo',
+            field=models.IntegerField(default=0, verbose_name='Visualizações com Tempo'),
+        ),
+        migrations.RunPython(popular_visualizacoes_com_tempo, migrations.RunPython.noop),
+    ]
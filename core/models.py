@@ -4,6 +4,8 @@ from ckeditor.fields import RichTextField
 import requests
 import logging
 
+from core.instrumentation import medir
+
 logger = logging.getLogger(__name__)
 
 
@@ -72,7 +74,8 @@ class ConfiguracaoSite(models.Model):
                 'key': self.youtube_api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            with medir('yt', 'youtube.channels'):
+                response = requests.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -96,6 +99,16 @@ class ConfiguracaoSite(models.Model):
         
         return self.inscritos_canal
     
+    async def aget_inscritos_display(self):
+        """Versão assíncrona de get_inscritos_display (a chamada à API roda fora do event loop)"""
+        if self.usar_inscritos_automatico:
+            from asgiref.sync import sync_to_async
+            inscritos_auto = await sync_to_async(self.get_inscritos_youtube, thread_sensitive=False)()
+            if inscritos_auto is not None:
+                return inscritos_auto
+        
+        return self.inscritos_canal
+    
     def save(self, *args, **kwargs):
         # Garantir que existe apenas uma instância
         self.pk = 1
@@ -106,6 +119,24 @@ class ConfiguracaoSite(models.Model):
         """Retorna a instância única de configuração"""
         config, created = cls.objects.get_or_create(pk=1)
         return config
+    
+    @classmethod
+    async def aget_config(cls):
+        """Versão assíncrona de get_config"""
+        config, created = await cls.objects.aget_or_create(pk=1)
+        return config
+
+
+class PostagemQuerySet(models.QuerySet):
+    """Consultas de postagens por visibilidade pública"""
+    
+    def publicadas(self, agora=None):
+        """Postagens visíveis no site: publicadas e com data de publicação já alcançada"""
+        return self.filter(status='publicado', data_publicacao__lte=agora or timezone.now())
+    
+    def agendadas(self):
+        """Postagens aguardando o agendador (core/agendamento.py)"""
+        return self.filter(status='agendado')
 
 
 class Postagem(models.Model):
@@ -119,6 +150,7 @@ class Postagem(models.Model):
     
     STATUS_CHOICES = [
         ('rascunho', 'Rascunho'),
+        ('agendado', 'Agendado'),
         ('publicado', 'Publicado'),
     ]
     
@@ -130,7 +162,14 @@ class Postagem(models.Model):
     status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='rascunho')
     data_publicacao = models.DateTimeField('Data de Publicação', default=timezone.now)
     data_criacao = models.DateTimeField('Data de Criação', auto_now_add=True)
-    data_atualizacao = models.DateTimeField('Data de Atualização', auto_now=True)
+    # Definida em save() (e não com auto_now) para servir também de versão do HTML renderizado
+    data_atualizacao = models.DateTimeField('Data de Atualização', default=timezone.now, editable=False)
+    
+    # Conteúdo pré-renderizado (sanitizado e otimizado) para exibição pública
+    conteudo_renderizado = models.TextField('Conteúdo Renderizado', blank=True, editable=False)
+    conteudo_renderizado_versao = models.DateTimeField('Versão do Conteúdo Renderizado', null=True, blank=True, editable=False, help_text='data_atualizacao da revisão que gerou o HTML renderizado')
+    
+    objects = PostagemQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Postagem'
@@ -140,12 +179,102 @@ class Postagem(models.Model):
     def __str__(self):
         return self.titulo
     
-    def get_total_visualizacoes(self):
-        """Retorna o total de visualizações únicas desta postagem"""
-        return EstatisticaVisualizacao.objects.filter(
-            tipo_conteudo='postagem',
-            conteudo_id=self.id
-        ).values('session_key').distinct().count()
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Conteúdo como está no banco, para save() saber se precisa renderizar
+        instancia._conteudo_salvo = instancia.__dict__.get('conteudo')
+        return instancia
+    
+    def save(self, *args, **kwargs):
+        """
+        Salva a postagem renderizando o conteúdo só quando ele mudou
+        
+        O HTML renderizado e a versão vão no mesmo UPDATE da postagem; saves
+        que só mudam o status (ações do admin, agendador) apenas avançam a
+        versão junto com data_atualizacao, sem renderizar de novo.
+        """
+        campos = kwargs.get('update_fields')
+        campos = None if campos is None else set(campos)
+        
+        # Publicada com data futura: fica agendada até o agendador publicá-la,
+        # que é quando feeds, sitemap e relacionadas precisam mudar
+        if self.status == 'publicado' and self.data_publicacao > timezone.now():
+            self.status = 'agendado'
+            if campos is not None:
+                campos.add('status')
+        
+        # Conteúdo adiado (.defer) não pode ter sido alterado; a revisão é
+        # renderizada na próxima leitura se a versão ficar para trás
+        if 'conteudo' not in self.get_deferred_fields() and (campos is None or 'conteudo' in campos):
+            em_dia = (
+                not self._state.adding
+                and self.conteudo == getattr(self, '_conteudo_salvo', None)
+                and self.conteudo_renderizado_versao is not None
+                and self.conteudo_renderizado_versao == self.data_atualizacao
+            )
+            if not em_dia:
+                self.conteudo_renderizado = self._renderizar()
+            if campos is None or 'data_atualizacao' in campos:
+                self.data_atualizacao = timezone.now()
+            self.conteudo_renderizado_versao = self.data_atualizacao
+            if campos is not None:
+                campos |= {'conteudo_renderizado', 'conteudo_renderizado_versao'}
+        elif campos is None or 'data_atualizacao' in campos:
+            self.data_atualizacao = timezone.now()
+        
+        if campos is not None:
+            kwargs['update_fields'] = campos
+        super().save(*args, **kwargs)
+        if 'conteudo' not in self.get_deferred_fields():
+            self._conteudo_salvo = self.conteudo
+    
+    def _renderizar(self):
+        """
+        HTML final do conteúdo atual
+        
+        Se o renderizador falhar, retorna o texto da revisão escapado (sem
+        formatação, mas seguro e atual) e deixa o erro em erro_renderizacao
+        para o admin avisar; a revisão não é tentada de novo a cada acesso.
+        """
+        from django.utils.html import escape, linebreaks, strip_tags
+        from .content_renderer import renderizar_conteudo
+        
+        self.erro_renderizacao = None
+        try:
+            return renderizar_conteudo(self.conteudo)
+        except Exception as e:
+            logger.exception(f'Erro ao renderizar conteúdo da postagem {self.pk}: {e}')
+            self.erro_renderizacao = str(e) or e.__class__.__name__
+            return linebreaks(escape(strip_tags(self.conteudo or '')))
+    
+    def renderizar_conteudo(self):
+        """
+        Gera e armazena o HTML final do conteúdo para a revisão atual
+        
+        Returns:
+            True se o HTML foi renderizado normalmente (ver _renderizar)
+        """
+        html = self._renderizar()
+        # update() não altera data_atualizacao, que continua sendo a chave da revisão
+        Postagem.objects.filter(pk=self.pk).update(
+            conteudo_renderizado=html,
+            conteudo_renderizado_versao=self.data_atualizacao
+        )
+        self.conteudo_renderizado = html
+        self.conteudo_renderizado_versao = self.data_atualizacao
+        return self.erro_renderizacao is None
+    
+    def get_conteudo_html(self):
+        """Retorna o HTML renderizado, regenerando apenas se a revisão mudou"""
+        if self.conteudo_renderizado_versao != self.data_atualizacao:
+            self.renderizar_conteudo()
+        return self.conteudo_renderizado
+    
+    def get_total_visualizacoes(self, exato=False):
+        """Retorna o total de visualizações únicas desta postagem (aproximado, ver core/estatisticas.py)"""
+        from .estatisticas import contar_unicos
+        return contar_unicos('postagem', self.id, exato=exato)
     
     def get_tempo_medio_visualizacao(self):
         """Retorna o tempo médio de visualização em segundos"""
@@ -170,22 +299,21 @@ class Postagem(models.Model):
         scroll_medio = resultado['scroll_profundidade__avg']
         return round(scroll_medio) if scroll_medio else 0
     
-    def get_visualizacoes_ultimos_30_dias(self):
-        """Visualizações dos últimos 30 dias"""
+    def get_visualizacoes_ultimos_30_dias(self, exato=False):
+        """Visualizações únicas dos últimos 30 dias (incluindo hoje)"""
         from datetime import timedelta
-        data_limite = timezone.now() - timedelta(days=30)
+        from .estatisticas import contar_unicos
+        hoje = timezone.localdate()
         
-        return EstatisticaVisualizacao.objects.filter(
-            tipo_conteudo='postagem',
-            conteudo_id=self.id,
-            data_visualizacao__gte=data_limite
-        ).values('session_key').distinct().count()
+        return contar_unicos('postagem', self.id, hoje - timedelta(days=29), hoje, exato=exato)
     
     def get_taxa_engajamento(self):
         """Taxa de engajamento baseada no tempo e scroll"""
-        tempo_medio = self.get_tempo_medio_visualizacao()
-        scroll_medio = self.get_scroll_medio()
-        
+        return self.classificar_engajamento(self.get_tempo_medio_visualizacao(), self.get_scroll_medio())
+    
+    @staticmethod
+    def classificar_engajamento(tempo_medio, scroll_medio):
+        """Classifica o engajamento a partir do tempo médio (s) e do scroll médio (%)"""
         # Considera engajado se passou mais de 30s E rolou mais de 50%
         if tempo_medio >= 30 and scroll_medio >= 50:
             return 'Alto'
@@ -203,6 +331,10 @@ class Video(models.Model):
     descricao = models.TextField('Descrição', blank=True)
     data_publicacao = models.DateTimeField('Data de Publicação', default=timezone.now)
     data_criacao = models.DateTimeField('Data de Criação', auto_now_add=True)
+    thumbnails = models.JSONField(
+        'Thumbnails', default=dict, blank=True, editable=False,
+        help_text='Derivados WebP no storage por largura (gerados pelo sync_youtube)'
+    )
     
     class Meta:
         verbose_name = 'Vídeo'
@@ -219,6 +351,74 @@ class Video(models.Model):
     def get_embed_url(self):
         """Retorna a URL para incorporar o vídeo"""
         return f'https://www.youtube.com/embed/{self.youtube_id}'
+    
+    def get_thumbnail_url(self):
+        """Menor thumbnail local; sem cache local, a hqdefault do YouTube (sempre existe)"""
+        from django.core.files.storage import default_storage
+        if self.thumbnails:
+            return default_storage.url(self.thumbnails[min(self.thumbnails, key=int)])
+        return f'https://i.ytimg.com/vi/{self.youtube_id}/hqdefault.jpg'
+    
+    def get_thumbnail_srcset(self):
+        """srcset das thumbnails locais ('' enquanto não foram geradas)"""
+        from django.core.files.storage import default_storage
+        return ', '.join(
+            f'{default_storage.url(nome)} {largura}w'
+            for largura, nome in sorted(self.thumbnails.items(), key=lambda item: int(item[0]))
+        )
+
+
+class AgenteUsuario(models.Model):
+    """Dimensão de user agents: cada string distinta é armazenada e analisada uma única vez"""
+    
+    DISPOSITIVO_CHOICES = [
+        ('desktop', 'Desktop'),
+        ('mobile', 'Celular'),
+        ('tablet', 'Tablet'),
+        ('bot', 'Robô'),
+        ('outro', 'Outro'),
+    ]
+    
+    hash = models.CharField('Hash', max_length=40, unique=True, help_text='SHA-1 da string do user agent')
+    user_agent = models.TextField('User Agent')
+    dispositivo = models.CharField('Dispositivo', max_length=10, choices=DISPOSITIVO_CHOICES, default='outro', db_index=True)
+    navegador = models.CharField('Navegador', max_length=50, blank=True)
+    sistema_operacional = models.CharField('Sistema Operacional', max_length=50, blank=True)
+    data_criacao = models.DateTimeField('Primeira Ocorrência', auto_now_add=True)
+    
+    # Cache em memória hash -> pk, evita consultas repetidas para os UAs mais comuns
+    _cache_ids = {}
+    
+    class Meta:
+        verbose_name = 'User Agent'
+        verbose_name_plural = 'User Agents'
+        ordering = ['navegador', 'sistema_operacional']
+    
+    def __str__(self):
+        partes = [p for p in (self.navegador, self.sistema_operacional) if p]
+        descricao = ' / '.join(partes) or self.user_agent[:60]
+        return f'{self.get_dispositivo_display()}: {descricao}'
+    
+    @classmethod
+    def get_id_para(cls, user_agent):
+        """Retorna o id da dimensão para a string informada, criando-a se necessário"""
+        from .user_agents import analisar_user_agent, hash_user_agent
+        
+        if not user_agent:
+            return None
+        
+        chave = hash_user_agent(user_agent)
+        agente_id = cls._cache_ids.get(chave)
+        if agente_id is None:
+            agente, created = cls.objects.get_or_create(
+                hash=chave,
+                defaults={'user_agent': user_agent, **analisar_user_agent(user_agent)}
+            )
+            agente_id = agente.pk
+            if len(cls._cache_ids) >= 2048:
+                cls._cache_ids.clear()
+            cls._cache_ids[chave] = agente_id
+        return agente_id
 
 
 class EstatisticaVisualizacao(models.Model):
@@ -238,8 +438,8 @@ class EstatisticaVisualizacao(models.Model):
     session_key = models.CharField('Session Key', max_length=40, db_index=True)
     
     # Dados técnicos
-    ip_address = models.GenericIPAddressField('IP Address', null=True, blank=True)
-    user_agent = models.TextField('User Agent', blank=True)
+    ip_address = models.GenericIPAddressField('IP Address', null=True, blank=True, db_index=True)
+    agente = models.ForeignKey(AgenteUsuario, on_delete=models.PROTECT, null=True, blank=True, related_name='visualizacoes', verbose_name='User Agent')
     
     # Métricas de tempo
     tempo_visualizacao = models.IntegerField('Tempo de Visualização (segundos)', default=0, help_text='Tempo que o usuário passou na página')
@@ -262,3 +462,90 @@ class EstatisticaVisualizacao(models.Model):
         if self.conteudo_titulo:
             return f'{self.tipo_conteudo}: {self.conteudo_titulo} - {self.data_visualizacao.strftime("%d/%m/%Y %H:%M")}'
         return f'{self.tipo_conteudo} - {self.data_visualizacao.strftime("%d/%m/%Y %H:%M")}'
+
+
+class RankingPostagem(models.Model):
+    """Ranking de postagens pré-calculado por core/ranking.py (lido pela home)"""
+    
+    LISTA_CHOICES = [
+        ('em_alta', 'Em Alta'),
+        ('mais_lidos', 'Mais Lidos'),
+    ]
+    
+    lista = models.CharField('Lista', max_length=20, choices=LISTA_CHOICES)
+    posicao = models.PositiveSmallIntegerField('Posição')
+    postagem = models.ForeignKey(Postagem, on_delete=models.CASCADE, related_name='rankings', verbose_name='Postagem')
+    pontuacao = models.FloatField('Pontuação', default=0)
+    sessoes_unicas = models.IntegerField('Sessões Únicas', default=0)
+    tempo_medio = models.FloatField('Tempo Médio (segundos)', default=0)
+    scroll_medio = models.FloatField('Scroll Médio (%)', default=0)
+    calculado_em = models.DateTimeField('Calculado em', default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Ranking de Postagem'
+        verbose_name_plural = 'Ranking de Postagens'
+        ordering = ['lista', 'posicao']
+        constraints = [
+            models.UniqueConstraint(fields=['lista', 'posicao'], name='ranking_lista_posicao_unica'),
+        ]
+    
+    def __str__(self):
+        return f'{self.get_lista_display()} #{self.posicao}: {self.postagem_id}'
+
+
+class PostagemRelacionada(models.Model):
+    """Vizinhos mais próximos de cada postagem (TF-IDF), mantidos por core/relacionadas.py"""
+    
+    postagem = models.ForeignKey(Postagem, on_delete=models.CASCADE, related_name='relacionadas', verbose_name='Postagem')
+    relacionada = models.ForeignKey(Postagem, on_delete=models.CASCADE, related_name='+', verbose_name='Relacionada')
+    posicao = models.PositiveSmallIntegerField('Posição')
+    similaridade = models.FloatField('Similaridade')
+    
+    class Meta:
+        verbose_name = 'Postagem Relacionada'
+        verbose_name_plural = 'Postagens Relacionadas'
+        ordering = ['postagem', 'posicao']
+        constraints = [
+            models.UniqueConstraint(fields=['postagem', 'posicao'], name='relacionada_postagem_posicao_unica'),
+        ]
+    
+    def __str__(self):
+        return f'{self.postagem_id} → {self.relacionada_id} ({self.similaridade:.2f})'
+
+
+class ResumoDiario(models.Model):
+    """
+    Consolidação diária das visualizações por conteúdo (core/estatisticas.py)
+    
+    Guarda contagens, somas e um esboço HyperLogLog das sessões, que pode ser
+    unido ao de outros dias para contar visitantes únicos em qualquer período.
+    A linha com tipo 'site' resume todas as visualizações do dia e as linhas
+    com conteudo_id nulo resumem cada tipo de conteúdo.
+    """
+    
+    TIPO_CHOICES = EstatisticaVisualizacao.TIPO_CONTEUDO_CHOICES + [
+        ('site', 'Site Inteiro'),
+    ]
+    
+    tipo_conteudo = models.CharField('Tipo de Conteúdo', max_length=20, choices=TIPO_CHOICES)
+    conteudo_id = models.IntegerField('ID do Conteúdo', null=True, blank=True)
+    dia = models.DateField('Dia')
+    visualizacoes = models.IntegerField('Visualizações', default=0)
+    sessoes = models.IntegerField('Sessões Únicas no Dia', default=0)
+    sessoes_hll = models.BinaryField('Esboço HyperLogLog das Sessões')
+    tempo_total = models.BigIntegerField('Tempo Total (segundos)', default=0)
+    # Denominador do tempo médio: visualizações sem tempo registrado não entram na média
+    visualizacoes_com_tempo = models.IntegerField('Visualizações com Tempo', default=0)
+    scroll_total = models.BigIntegerField('Scroll Total (%)', default=0)
+    
+    class Meta:
+        verbose_name = 'Resumo Diário'
+        verbose_name_plural = 'Resumos Diários'
+        ordering = ['-dia']
+        indexes = [
+            models.Index(fields=['tipo_conteudo', 'conteudo_id', 'dia']),
+            models.Index(fields=['dia']),
+        ]
+    
+    def __str__(self):
+        return f'{self.tipo_conteudo} {self.conteudo_id or ""} - {self.dia:%d/%m/%Y}'
@@ -0,0 +1,110 @@
+"""
+Paginação com contagem estimada para tabelas grandes no admin
+O changelist conta as linhas a cada carregamento; em tabelas com milhões de
+linhas o COUNT(*) exato domina o tempo da página. No PostgreSQL a contagem
+passa a vir das estatísticas do planner (reltuples da tabela sem filtros, ou
+a estimativa do EXPLAIN com filtros) quando ela passa do limite configurado;
+abaixo do limite, ou em outros bancos, a contagem continua exata.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def _linhas_da_tabela(cursor, tabela):
+    """
+    reltuples da tabela; numa tabela particionada, a soma das partições
+
+    O autovacuum nunca analisa a tabela pai de uma tabela particionada (a de
+    estatísticas, ver core/retention.py), então o reltuples dela fica em -1.
+    -1 indica tabela nunca analisada (VACUUM/ANALYZE).
+    """
+    cursor.execute(
+        'SELECT relkind, reltuples FROM pg_class WHERE oid = %s::regclass',
+        [tabela],
+    )
+    linha = cursor.fetchone()
+    if linha is None:
+        return None
+    tipo, linhas = linha
+    if tipo == 'p':
+        cursor.execute(
+            'SELECT SUM(c.reltuples) FILTER (WHERE c.reltuples >= 0) '
+            'FROM pg_partition_tree(%s::regclass) arvore JOIN pg_class c ON c.oid = arvore.relid '
+            'WHERE arvore.isleaf',
+            [tabela],
+        )
+        linhas = cursor.fetchone()[0]
+        # Nenhuma partição analisada ainda
+        if linhas is None:
+            return None
+    return int(linhas) if linhas >= 0 else None
+
+
+def estimar_linhas(queryset):
+    """
+    Número aproximado de linhas de um queryset segundo o planner do PostgreSQL
+
+    Returns:
+        Estimativa inteira, ou None se o banco não for PostgreSQL, a tabela
+        ainda não tiver estatísticas ou a consulta for vazia
+    """
+    conexao = connections[queryset.db]
+    if conexao.vendor != 'postgresql':
+        return None
+
+    consulta = queryset.query
+    try:
+        with conexao.cursor() as cursor:
+            if not consulta.where:
+                return _linhas_da_tabela(cursor, queryset.model._meta.db_table)
+
+            sql, parametros = consulta.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', parametros)
+            plano = cursor.fetchone()[0]
+    except DatabaseError as e:
+        logger.warning(f'Não foi possível estimar as linhas de {queryset.model.__name__}: {e}')
+        return None
+    except EmptyResultSet:
+        # Filtro que nunca casa (ex.: __in=[]); o COUNT exato resolve sem consulta
+        return None
+
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]['Plan']['Plan Rows'])
+
+
+class PaginadorEstimado(Paginator):
+    """Paginator que usa a estimativa do planner acima de ADMIN_CONTAGEM_ESTIMADA_LIMITE linhas"""
+
+    estimada = False
+
+    @cached_property
+    def count(self):
+        estimativa = estimar_linhas(self.object_list)
+        if estimativa is not None and estimativa >= settings.ADMIN_CONTAGEM_ESTIMADA_LIMITE:
+            self.estimada = True
+            return estimativa
+        return super().count
+
+    def page(self, number):
+        """
+        Uma página vazia depois da primeira indica estimativa acima do total
+        real: a contagem passa a ser exata e a página é validada de novo
+        (EmptyPage se estiver mesmo além do fim)
+        """
+        pagina = super().page(number)
+        if self.estimada and pagina.number > 1 and not pagina.object_list:
+            self.estimada = False
+            self.count = Paginator.count.func(self)
+            self.__dict__.pop('num_pages', None)
+            self.__dict__.pop('page_range', None)
+            pagina = super().page(number)
+        return pagina
@@ -0,0 +1,152 @@
+"""
+Ranking de postagens a partir das estatísticas de visualização
+O cálculo é feito periodicamente (python manage.py calcular_ranking) e o
+resultado fica na tabela RankingPostagem, então a home lê um top-N pronto
+em uma única consulta, sem agregar as visualizações a cada requisição
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import EstatisticaVisualizacao, Postagem, RankingPostagem
+
+# Faixas de idade (em dias) usadas para o decaimento da pontuação "em alta".
+# Cada faixa conta sessões únicas e recebe o peso do decaimento exponencial
+# no seu ponto médio: tudo sai de uma única varredura com agregação condicional
+FAIXAS_DIAS = ((0, 1), (1, 2), (2, 4), (4, 7), (7, 14), (14, 30), (30, 60), (60, 90))
+
+# Tempo de leitura (segundos) a partir do qual a postagem conta como bem lida
+TEMPO_REFERENCIA = 180
+
+# Campos não usados nos cards da home
+CAMPOS_PESADOS = ('postagem__conteudo', 'postagem__conteudo_renderizado')
+
+
+def _qualidade(tempo_medio, scroll_medio):
+    """Fator entre 0,5 e 1 que favorece postagens lidas até o fim"""
+    tempo = min((tempo_medio or 0) / TEMPO_REFERENCIA, 1)
+    scroll = min((scroll_medio or 0) / 100, 1)
+    return 0.5 + 0.25 * tempo + 0.25 * scroll
+
+
+def agregar_visualizacoes(agora, janela_dias):
+    """
+    Agrega as visualizações de postagens da janela por postagem
+
+    Returns:
+        Lista de dicionários com conteudo_id, sessoes, tempo_medio,
+        scroll_medio e sessões únicas por faixa de idade (faixa_0, faixa_1...)
+    """
+    faixas = {}
+    for indice, (inicio, fim) in enumerate(FAIXAS_DIAS):
+        if inicio >= janela_dias:
+            break
+        faixas[f'faixa_{indice}'] = Count('session_key', distinct=True, filter=Q(
+            data_visualizacao__gt=agora - timedelta(days=min(fim, janela_dias)),
+            data_visualizacao__lte=agora - timedelta(days=inicio),
+        ))
+
+    return list(
+        EstatisticaVisualizacao.objects
+        .filter(
+            tipo_conteudo='postagem',
+            conteudo_id__isnull=False,
+            data_visualizacao__gt=agora - timedelta(days=janela_dias),
+            data_visualizacao__lte=agora,
+        )
+        .order_by()
+        .values('conteudo_id')
+        .annotate(
+            sessoes=Count('session_key', distinct=True),
+            tempo_medio=Avg('tempo_visualizacao'),
+            scroll_medio=Avg('scroll_profundidade'),
+            **faixas,
+        )
+    )
+
+
+def calcular_ranking(janela_dias=None, meia_vida_dias=None, tamanho=None, agora=None):
+    """
+    Recalcula as listas "em alta" e "mais lidos"
+
+    - em alta: sessões únicas com decaimento exponencial pela idade da
+      visualização (meia-vida configurável), ponderadas pela qualidade da
+      leitura (tempo médio e scroll médio);
+    - mais lidos: sessões únicas na janela, sem decaimento.
+
+    Returns:
+        Dicionário com o número de postagens agregadas, de entradas
+        gravadas por lista e a duração em segundos
+    """
+    janela_dias = janela_dias or settings.RANKING_JANELA_DIAS
+    meia_vida_dias = meia_vida_dias or settings.RANKING_MEIA_VIDA_DIAS
+    tamanho = tamanho or settings.RANKING_TAMANHO
+    agora = agora or timezone.now()
+    inicio = time.perf_counter()
+
+    linhas = agregar_visualizacoes(agora, janela_dias)
+    publicadas = set(
+        Postagem.objects.publicadas(agora).filter(pk__in=[linha['conteudo_id'] for linha in linhas])
+        .values_list('pk', flat=True)
+    )
+    linhas = [linha for linha in linhas if linha['conteudo_id'] in publicadas]
+
+    pesos = {
+        f'faixa_{indice}': 0.5 ** (((inicio_faixa + min(fim, janela_dias)) / 2) / meia_vida_dias)
+        for indice, (inicio_faixa, fim) in enumerate(FAIXAS_DIAS)
+        if inicio_faixa < janela_dias
+    }
+    for linha in linhas:
+        qualidade = _qualidade(linha['tempo_medio'], linha['scroll_medio'])
+        linha['em_alta'] = qualidade * sum(linha[faixa] * peso for faixa, peso in pesos.items())
+        linha['mais_lidos'] = linha['sessoes']
+
+    entradas = []
+    for lista, _ in RankingPostagem.LISTA_CHOICES:
+        ordenadas = sorted(linhas, key=lambda linha: (linha[lista], linha['tempo_medio'] or 0), reverse=True)
+        for posicao, linha in enumerate(ordenadas[:tamanho], start=1):
+            entradas.append(RankingPostagem(
+                lista=lista,
+                posicao=posicao,
+                postagem_id=linha['conteudo_id'],
+                pontuacao=round(linha[lista], 4),
+                sessoes_unicas=linha['sessoes'],
+                tempo_medio=round(linha['tempo_medio'] or 0, 1),
+                scroll_medio=round(linha['scroll_medio'] or 0, 1),
+                calculado_em=agora,
+            ))
+
+    # Leitores continuam vendo o ranking anterior até o commit
+    with transaction.atomic():
+        RankingPostagem.objects.all().delete()
+        RankingPostagem.objects.bulk_create(entradas)
+
+    return {
+        'postagens': len(linhas),
+        'entradas': {lista: sum(1 for e in entradas if e.lista == lista) for lista, _ in RankingPostagem.LISTA_CHOICES},
+        'duracao': time.perf_counter() - inicio,
+    }
+
+
+def _ranking(lista, quantidade):
+    return (
+        RankingPostagem.objects
+        .filter(lista=lista, postagem__status='publicado', postagem__data_publicacao__lte=timezone.now())
+        .select_related('postagem')
+        .defer(*CAMPOS_PESADOS)
+        [:quantidade]
+    )
+
+
+def top_postagens(lista, quantidade):
+    """Retorna as postagens publicadas no topo de uma lista (uma consulta)"""
+    return [entrada.postagem for entrada in _ranking(lista, quantidade)]
+
+
+async def atop_postagens(lista, quantidade):
+    """Versão assíncrona de top_postagens"""
+    return [entrada.postagem async for entrada in _ranking(lista, quantidade)]
@@ -0,0 +1,278 @@
+"""
+Postagens relacionadas
+Cada postagem publicada vira um vetor TF-IDF do texto (título, subtítulo e
+conteúdo sem HTML); as mais parecidas, com bônus para a mesma categoria,
+ficam na tabela PostagemRelacionada, lida pela página da postagem em uma
+única consulta.
+
+Com NumPy e SciPy instalados (pip install numpy scipy) as similaridades são
+calculadas em blocos com um produto de matrizes esparsas; sem eles, um
+índice invertido em Python puro produz o mesmo resultado, mais devagar.
+"""
+import heapq
+import html
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.html import strip_tags
+
+from .models import Postagem, PostagemRelacionada
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada ocorrência de um termo conforme o campo
+PESOS_CAMPOS = {'titulo': 3, 'subtitulo': 2, 'conteudo': 1}
+
+# Linhas da matriz de similaridade calculadas por produto (limita a memória)
+TAMANHO_BLOCO = 512
+
+# Casas decimais comparadas na ordenação dos vizinhos: o produto de matrizes
+# usa float32, e empates (o bônus de categoria sozinho, por exemplo) são
+# desfeitos pela postagem mais antiga nos dois caminhos
+CASAS_ORDENACAO = 6
+
+# Acima desta fração do corpus (ações em massa do admin) a atualização
+# incremental custa mais que recalcular todas as listas em blocos de matriz
+FRACAO_RECALCULO_COMPLETO = 0.1
+
+_PALAVRA = re.compile(r'[a-z0-9]{3,}')
+
+STOPWORDS = frozenset('''
+    ainda algum alguma apos aquela aquele aqui assim ate cada com como contra das depois
+    desde dessa desse desta deste diz dos ela elas ele eles em entre essa esse esta estao
+    estava este eram essa for foi foram mais mas mesmo muito muita nao nas nem nos nossa
+    nosso num numa para pela pelas pelo pelos pode por porque quais qual quando quanto que
+    quem sao seja sem ser seu seus sobre sua suas tambem tem tendo ter toda todas todo todos
+    tudo uma umas uns vai voce voces
+'''.split())
+
+# Termos por (pk, data_atualizacao): o texto só é processado de novo quando a postagem muda
+_cache_termos = {}
+
+
+def tokenizar(texto):
+    """Palavras sem acentos, em minúsculas e sem stopwords de um trecho HTML"""
+    texto = html.unescape(strip_tags(texto or '')).lower()
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return [palavra for palavra in _PALAVRA.findall(texto) if palavra not in STOPWORDS]
+
+
+def _contar_termos(postagem):
+    termos = Counter()
+    for campo, peso in PESOS_CAMPOS.items():
+        for palavra in tokenizar(postagem[campo]):
+            termos[palavra] += peso
+    return termos
+
+
+class Corpus:
+    """Vetores TF-IDF normalizados (termo -> peso) das postagens publicadas"""
+
+    def __init__(self, ids, categorias, contagens):
+        self.ids = ids
+        self.posicoes = {pk: indice for indice, pk in enumerate(ids)}
+        self.categorias = categorias
+
+        total = len(contagens)
+        frequencias = Counter(termo for termos in contagens for termo in termos)
+        idf = {termo: math.log((1 + total) / (1 + frequencia)) + 1 for termo, frequencia in frequencias.items()}
+
+        self.vetores = []
+        for termos in contagens:
+            vetor = {termo: (1 + math.log(tf)) * idf[termo] for termo, tf in termos.items()}
+            norma = math.sqrt(sum(peso * peso for peso in vetor.values())) or 1
+            self.vetores.append({termo: peso / norma for termo, peso in vetor.items()})
+
+        self._indice = None
+
+    @classmethod
+    def carregar(cls):
+        """Monta o corpus, lendo o texto apenas das postagens alteradas desde a última vez"""
+        publicadas = Postagem.objects.publicadas().order_by('pk')
+        base = list(publicadas.values('pk', 'categoria', 'data_atualizacao'))
+
+        faltantes = [p['pk'] for p in base if (p['pk'], p['data_atualizacao']) not in _cache_termos]
+        for inicio in range(0, len(faltantes), 500):
+            textos = publicadas.filter(pk__in=faltantes[inicio:inicio + 500]).values(
+                'pk', 'data_atualizacao', *PESOS_CAMPOS
+            )
+            for postagem in textos:
+                if len(_cache_termos) >= 4096:
+                    _cache_termos.clear()
+                _cache_termos[(postagem['pk'], postagem['data_atualizacao'])] = _contar_termos(postagem)
+
+        return cls(
+            [p['pk'] for p in base],
+            [p['categoria'] for p in base],
+            [_cache_termos.get((p['pk'], p['data_atualizacao']), Counter()) for p in base],
+        )
+
+    def _indice_invertido(self):
+        if self._indice is None:
+            self._indice = defaultdict(list)
+            for indice, vetor in enumerate(self.vetores):
+                for termo, peso in vetor.items():
+                    self._indice[termo].append((indice, peso))
+        return self._indice
+
+    def similaridades(self, indice, bonus):
+        """Pontuação da postagem informada contra todas as outras ({indice: pontuação})"""
+        pontuacoes = defaultdict(float)
+        indice_invertido = self._indice_invertido()
+        for termo, peso in self.vetores[indice].items():
+            for outro, peso_outro in indice_invertido[termo]:
+                pontuacoes[outro] += peso * peso_outro
+        if bonus:
+            categoria = self.categorias[indice]
+            for outro, categoria_outro in enumerate(self.categorias):
+                if categoria_outro == categoria:
+                    pontuacoes[outro] += bonus
+        pontuacoes.pop(indice, None)
+        return pontuacoes
+
+    def vizinhos(self, indices, k, bonus):
+        """As k postagens mais parecidas com cada uma das informadas ({indice: [(indice, pontuação)]})"""
+        try:
+            import numpy  # noqa: F401
+            from scipy import sparse  # noqa: F401
+        except ImportError:
+            return {
+                indice: [
+                    (outro, pontuacao)
+                    for outro, pontuacao in heapq.nlargest(
+                        k, self.similaridades(indice, bonus).items(),
+                        key=lambda item: (round(item[1], CASAS_ORDENACAO), -item[0]),
+                    )
+                    if pontuacao > 0
+                ]
+                for indice in indices
+            }
+        return self._vizinhos_matriz(list(indices), k, bonus)
+
+    def _vizinhos_matriz(self, indices, k, bonus):
+        import numpy as np
+        from scipy import sparse
+
+        vocabulario = {}
+        linhas, colunas, valores = [], [], []
+        for linha, vetor in enumerate(self.vetores):
+            for termo, peso in vetor.items():
+                linhas.append(linha)
+                colunas.append(vocabulario.setdefault(termo, len(vocabulario)))
+                valores.append(peso)
+        matriz = sparse.csr_matrix(
+            (valores, (linhas, colunas)), shape=(len(self.vetores), max(len(vocabulario), 1)), dtype=np.float32
+        )
+        transposta = matriz.T.tocsc()
+        codigos = {categoria: codigo for codigo, categoria in enumerate(set(self.categorias))}
+        categorias = np.array([codigos[categoria] for categoria in self.categorias])
+
+        k = min(k, len(self.vetores) - 1)
+        resultado = {}
+        for inicio in range(0, len(indices), TAMANHO_BLOCO):
+            bloco = np.array(indices[inicio:inicio + TAMANHO_BLOCO])
+            if k <= 0:
+                resultado.update({int(indice): [] for indice in bloco})
+                continue
+            pontuacoes = (matriz[bloco] @ transposta).toarray()
+            pontuacoes += bonus * (categorias[bloco][:, None] == categorias[None, :])
+            pontuacoes[np.arange(len(bloco)), bloco] = -np.inf
+            ordenacao = np.round(pontuacoes, CASAS_ORDENACAO)
+            # k-ésima maior pontuação de cada linha; todos os empatados com ela
+            # entram na ordenação para que o desempate seja pelo índice
+            limiares = np.partition(ordenacao, -k, axis=1)[:, -k]
+            for linha, indice in enumerate(bloco):
+                candidatos = np.flatnonzero(ordenacao[linha] >= limiares[linha])
+                candidatos = candidatos[np.lexsort((candidatos, -ordenacao[linha, candidatos]))][:k]
+                resultado[int(indice)] = [
+                    (int(outro), float(pontuacoes[linha, outro])) for outro in candidatos if pontuacoes[linha, outro] > 0
+                ]
+        return resultado
+
+
+def _gravar(corpus, vizinhos, postagens_afetadas=None):
+    """Substitui as listas de vizinhos (todas, ou apenas das postagens afetadas)"""
+    entradas = [
+        PostagemRelacionada(
+            postagem_id=corpus.ids[indice],
+            relacionada_id=corpus.ids[outro],
+            posicao=posicao,
+            similaridade=round(pontuacao, 4),
+        )
+        for indice, lista in vizinhos.items()
+        for posicao, (outro, pontuacao) in enumerate(lista, start=1)
+    ]
+    with transaction.atomic():
+        existentes = PostagemRelacionada.objects.all()
+        if postagens_afetadas is not None:
+            existentes = existentes.filter(postagem_id__in=postagens_afetadas)
+        existentes.delete()
+        PostagemRelacionada.objects.bulk_create(entradas, batch_size=1000)
+    return len(entradas)
+
+
+def recalcular(k=None, bonus=None):
+    """Recalcula os vizinhos de todas as postagens publicadas"""
+    k = k or settings.RELACIONADAS_QUANTIDADE
+    bonus = settings.RELACIONADAS_BONUS_CATEGORIA if bonus is None else bonus
+    corpus = Corpus.carregar()
+    vizinhos = corpus.vizinhos(range(len(corpus.ids)), k, bonus)
+    return {'postagens': len(corpus.ids), 'relacoes': _gravar(corpus, vizinhos)}
+
+
+def atualizar(pks, afetadas=()):
+    """
+    Atualização incremental após salvar (ou excluir) postagens
+
+    Recalcula a lista das postagens informadas e apenas das outras listas
+    que elas podem alterar: as que já apontavam para elas e as em que a nova
+    pontuação entra no top-k. Os pesos IDF das demais listas só mudam no
+    próximo recálculo completo (python manage.py calcular_relacionadas).
+
+    Args:
+        afetadas: Outras postagens cujas listas devem ser recalculadas
+    """
+    k = settings.RELACIONADAS_QUANTIDADE
+    bonus = settings.RELACIONADAS_BONUS_CATEGORIA
+    corpus = Corpus.carregar()
+
+    if len(set(pks)) > FRACAO_RECALCULO_COMPLETO * len(corpus.ids):
+        vizinhos = corpus.vizinhos(range(len(corpus.ids)), k, bonus)
+        return _gravar(corpus, vizinhos)
+
+    listas = defaultdict(list)
+    # Quem aponta para cada postagem (as listas delas mudam se ela mudar)
+    apontam = defaultdict(set)
+    for postagem_id, relacionada_id, similaridade in PostagemRelacionada.objects.values_list(
+        'postagem_id', 'relacionada_id', 'similaridade'
+    ):
+        listas[postagem_id].append((relacionada_id, similaridade))
+        apontam[relacionada_id].add(postagem_id)
+
+    afetadas = set(afetadas) | set(pks)
+    for pk in pks:
+        afetadas.update(apontam.get(pk, ()))
+        indice = corpus.posicoes.get(pk)
+        if indice is None:
+            continue
+        for outro, pontuacao in corpus.similaridades(indice, bonus).items():
+            lista = listas.get(corpus.ids[outro], [])
+            if pontuacao > 0 and (len(lista) < k or pontuacao > min(s for _, s in lista)):
+                afetadas.add(corpus.ids[outro])
+
+    indices = [corpus.posicoes[pk] for pk in afetadas if pk in corpus.posicoes]
+    vizinhos = corpus.vizinhos(indices, k, bonus)
+    return _gravar(corpus, vizinhos, afetadas)
+
+
+def atualizar_sem_erros(pks, afetadas=()):
+    """Versão usada pelos sinais: uma falha aqui não pode impedir a gravação da postagem"""
+    try:
+        atualizar(pks, afetadas)
+    except Exception as e:
+        logger.error(f'Erro ao atualizar postagens relacionadas de {pks}: {e}')
@@ -0,0 +1,404 @@
+"""
+Retenção das estatísticas de visualização
+Arquiva as linhas antigas de EstatisticaVisualizacao no storage (NDJSON
+compactado ou Parquet) e depois as remove em lotes pequenos. No PostgreSQL,
+se a tabela estiver particionada por mês, partições inteiras são
+desanexadas e descartadas instantaneamente
+"""
+import gzip
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .estatisticas import consolidar
+from .models import EstatisticaVisualizacao
+
+logger = logging.getLogger(__name__)
+
+PASTA_ARQUIVO = 'arquivo/estatisticas'
+TABELA = EstatisticaVisualizacao._meta.db_table
+
+
+class RetencaoError(Exception):
+    """Erro de configuração ou execução da retenção"""
+
+
+def get_data_limite(dias=None):
+    """Retorna o instante antes do qual as estatísticas brutas expiram"""
+    dias = dias if dias is not None else settings.ESTATISTICAS_RETENCAO_DIAS
+    return timezone.now() - timedelta(days=dias)
+
+
+def _inicio_do_mes(data):
+    return data.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _proximo_mes(data):
+    return (data.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _meses_expirados(data_limite):
+    """
+    Retorna os intervalos mensais [inicio, fim) com linhas anteriores ao limite.
+    O último intervalo é truncado no limite para não arquivar dados válidos.
+    """
+    primeira = (
+        EstatisticaVisualizacao.objects
+        .filter(data_visualizacao__lt=data_limite)
+        .order_by('data_visualizacao')
+        .values_list('data_visualizacao', flat=True)
+        .first()
+    )
+    if primeira is None:
+        return []
+
+    intervalos = []
+    inicio = _inicio_do_mes(timezone.localtime(primeira))
+    while inicio < data_limite:
+        fim = min(_proximo_mes(inicio), data_limite)
+        intervalos.append((inicio, fim))
+        inicio = _proximo_mes(inicio)
+    return intervalos
+
+
+# ===================================
+# Arquivamento
+# ===================================
+
+def _linhas(inicio, fim):
+    """Itera as linhas do intervalo como dicionários, sem carregar tudo na memória"""
+    campos = [campo.attname for campo in EstatisticaVisualizacao._meta.concrete_fields]
+    # O arquivo leva o user agent por extenso para não depender da dimensão
+    return (
+        EstatisticaVisualizacao.objects
+        .filter(data_visualizacao__gte=inicio, data_visualizacao__lt=fim)
+        .order_by('pk')
+        .values(
+            *campos,
+            user_agent=F('agente__user_agent'),
+            dispositivo=F('agente__dispositivo'),
+        )
+        .iterator(chunk_size=2000)
+    )
+
+
+def _escrever_ndjson(linhas, destino):
+    total = 0
+    with gzip.GzipFile(fileobj=destino, mode='wb') as arquivo:
+        for linha in linhas:
+            arquivo.write(json.dumps(linha, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+            arquivo.write(b'\n')
+            total += 1
+    return total
+
+
+def _escrever_parquet(linhas, destino, tamanho_grupo=50000):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RetencaoError('O formato parquet requer o pacote pyarrow (pip install pyarrow)')
+
+    total = 0
+    escritor = None
+    grupo = []
+
+    def gravar(grupo):
+        nonlocal escritor
+        tabela = pa.Table.from_pylist(grupo)
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, tabela.schema, compression='zstd')
+        escritor.write_table(tabela)
+
+    for linha in linhas:
+        grupo.append(linha)
+        total += 1
+        if len(grupo) >= tamanho_grupo:
+            gravar(grupo)
+            grupo = []
+    if grupo:
+        gravar(grupo)
+    if escritor is not None:
+        escritor.close()
+    return total
+
+
+def arquivar_intervalo(inicio, fim, formato=None):
+    """
+    Grava as linhas do intervalo em um arquivo no storage padrão
+
+    Returns:
+        Tupla (nome_do_arquivo, total_de_linhas); nome é None se não houver linhas
+    """
+    formato = formato or settings.ESTATISTICAS_ARQUIVO_FORMATO
+    if formato not in ('ndjson', 'parquet'):
+        raise RetencaoError(f'Formato de arquivo desconhecido: {formato}')
+
+    extensao = 'ndjson.gz' if formato == 'ndjson' else 'parquet'
+    nome = (
+        f'{PASTA_ARQUIVO}/{inicio:%Y-%m}/'
+        f'estatisticas_{inicio:%Y%m%d}_{fim:%Y%m%d}_{timezone.now():%Y%m%d%H%M%S}.{extensao}'
+    )
+
+    # Arquivo temporário em disco: meses grandes não cabem confortavelmente na memória
+    with tempfile.TemporaryFile() as temporario:
+        if formato == 'ndjson':
+            total = _escrever_ndjson(_linhas(inicio, fim), temporario)
+        else:
+            total = _escrever_parquet(_linhas(inicio, fim), temporario)
+
+        if total == 0:
+            return None, 0
+
+        temporario.seek(0)
+        nome = default_storage.save(nome, File(temporario))
+
+    logger.info(f'{total} estatísticas arquivadas em {nome}')
+    return nome, total
+
+
+# ===================================
+# Exclusão em lotes
+# ===================================
+
+def excluir_em_lotes(inicio, fim, lote=None):
+    """Exclui as linhas do intervalo em lotes, cada um em sua própria transação"""
+    lote = lote or settings.ESTATISTICAS_LOTE_EXCLUSAO
+    intervalo = EstatisticaVisualizacao.objects.filter(
+        data_visualizacao__gte=inicio, data_visualizacao__lt=fim
+    )
+
+    total = 0
+    while True:
+        ids = list(intervalo.order_by('pk').values_list('pk', flat=True)[:lote])
+        if not ids:
+            break
+        with transaction.atomic():
+            excluidas, _ = EstatisticaVisualizacao.objects.filter(pk__in=ids).delete()
+        total += excluidas
+    return total
+
+
+# ===================================
+# Partições mensais (PostgreSQL)
+# ===================================
+
+def _nome_particao(inicio):
+    return f'{TABELA}_p{inicio:%Y%m}'
+
+
+def tabela_particionada():
+    """Indica se a tabela de estatísticas é particionada (apenas PostgreSQL)"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass',
+            [TABELA]
+        )
+        return cursor.fetchone() is not None
+
+
+def _nome_particao_padrao():
+    return f'{TABELA}_padrao'
+
+
+def _criar_particao(cursor, inicio):
+    """
+    Cria a partição do mês, se ainda não existir
+
+    Linhas do mês que já caíram na partição padrão (cron parado) são movidas
+    para a nova partição antes de ela ser anexada; o PostgreSQL recusa o
+    ATTACH enquanto a partição padrão tiver linhas do intervalo.
+    """
+    q = connection.ops.quote_name
+    nome = _nome_particao(inicio)
+    cursor.execute('SELECT to_regclass(%s)', [nome])
+    if cursor.fetchone()[0] is not None:
+        return
+
+    fim = _proximo_mes(inicio)
+    padrao = _nome_particao_padrao()
+    with transaction.atomic():
+        cursor.execute(
+            f'CREATE TABLE {q(nome)} (LIKE {q(TABELA)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute('SELECT to_regclass(%s)', [padrao])
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(
+                f'WITH movidas AS (DELETE FROM {q(padrao)} '
+                f'WHERE data_visualizacao >= %s AND data_visualizacao < %s RETURNING *) '
+                f'INSERT INTO {q(nome)} SELECT * FROM movidas',
+                [inicio, fim]
+            )
+        cursor.execute(
+            f'ALTER TABLE {q(TABELA)} ATTACH PARTITION {q(nome)} FOR VALUES FROM (%s) TO (%s)',
+            [inicio, fim]
+        )
+
+
+def garantir_particoes(meses_a_frente=2, desde=None):
+    """
+    Cria as partições do mês atual e dos próximos meses, se ainda não existirem
+
+    Args:
+        desde: Cria também as partições dos meses entre esta data e o atual
+    """
+    inicio = _inicio_do_mes(timezone.localtime(desde) if desde else timezone.localtime())
+    limite = _inicio_do_mes(timezone.localtime())
+    for _ in range(meses_a_frente):
+        limite = _proximo_mes(limite)
+    with connection.cursor() as cursor:
+        while inicio <= limite:
+            _criar_particao(cursor, inicio)
+            inicio = _proximo_mes(inicio)
+
+
+def _particoes_existentes():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [TABELA]
+        )
+        return {linha[0] for linha in cursor.fetchall()}
+
+
+def descartar_particao(inicio):
+    """Desanexa e remove a partição do mês informado"""
+    nome = connection.ops.quote_name(_nome_particao(inicio))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {connection.ops.quote_name(TABELA)} DETACH PARTITION {nome}')
+        cursor.execute(f'DROP TABLE {nome}')
+
+
+def converter_para_particionada():
+    """
+    Converte a tabela de estatísticas em uma tabela particionada por mês.
+
+    A chave primária passa a ser (id, data_visualizacao), exigência do
+    PostgreSQL para tabelas particionadas; os índices e as chaves
+    estrangeiras existentes são recriados na tabela pai e propagados para as
+    partições. O id passa a usar uma sequência própria, já que colunas
+    identity só são aceitas em tabelas particionadas a partir do PostgreSQL 17.
+
+    Uma partição padrão (DEFAULT) recebe as linhas de meses sem partição, para
+    que as gravações não falhem se os comandos agendados pararem; a próxima
+    execução de garantir_particoes() as move para a partição do mês.
+    """
+    if connection.vendor != 'postgresql':
+        raise RetencaoError('Particionamento disponível apenas no PostgreSQL')
+    if tabela_particionada():
+        return False
+
+    q = connection.ops.quote_name
+    antiga = f'{TABELA}_nao_particionada'
+    sequencia = f'{TABELA}_particionada_id_seq'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+            [TABELA, TABELA]
+        )
+        indices = cursor.fetchall()
+        # LIKE ... INCLUDING CONSTRAINTS copia só os CHECK; as chaves
+        # estrangeiras (agente_id) são recriadas depois da cópia dos dados
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABELA]
+        )
+        chaves_estrangeiras = cursor.fetchall()
+        cursor.execute('SELECT MIN(data_visualizacao), MAX(data_visualizacao) FROM ' + q(TABELA))
+        minimo, maximo = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {q(TABELA)} RENAME TO {q(antiga)}')
+        cursor.execute(
+            f'CREATE TABLE {q(TABELA)} (LIKE {q(antiga)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (data_visualizacao)'
+        )
+        cursor.execute(f'ALTER TABLE {q(TABELA)} ADD PRIMARY KEY (id, data_visualizacao)')
+        cursor.execute(f'CREATE SEQUENCE {q(sequencia)} OWNED BY {q(TABELA)}.id')
+        cursor.execute(f"ALTER TABLE {q(TABELA)} ALTER COLUMN id SET DEFAULT nextval('{sequencia}')")
+        # As definições foram lidas antes da renomeação e já apontam para a nova tabela
+        for nome_indice, definicao in indices:
+            cursor.execute(f'ALTER INDEX {q(nome_indice)} RENAME TO {q(nome_indice[:59] + "_old")}')
+            cursor.execute(definicao)
+
+        # Partições para os dados existentes e para os próximos meses
+        inicio = _inicio_do_mes(timezone.localtime(minimo or timezone.now()))
+        ultimo = _inicio_do_mes(timezone.localtime(maximo or timezone.now()))
+        while inicio <= ultimo:
+            cursor.execute(
+                f'CREATE TABLE {q(_nome_particao(inicio))} PARTITION OF {q(TABELA)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [inicio, _proximo_mes(inicio)]
+            )
+            inicio = _proximo_mes(inicio)
+        cursor.execute(f'CREATE TABLE {q(_nome_particao_padrao())} PARTITION OF {q(TABELA)} DEFAULT')
+        garantir_particoes()
+
+        cursor.execute(f'INSERT INTO {q(TABELA)} SELECT * FROM {q(antiga)}')
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {q(TABELA)}), 0) + 1, false)', [sequencia])
+        cursor.execute(f'DROP TABLE {q(antiga)}')
+        for nome_restricao, definicao in chaves_estrangeiras:
+            cursor.execute(f'ALTER TABLE {q(TABELA)} ADD CONSTRAINT {q(nome_restricao)} {definicao}')
+    return True
+
+
+# ===================================
+# Execução
+# ===================================
+
+def aplicar_retencao(dias=None, formato=None, lote=None, dry_run=False):
+    """
+    Arquiva e remove as estatísticas mais antigas que o prazo de retenção
+
+    Returns:
+        Lista de dicionários com o resultado de cada mês processado
+    """
+    data_limite = get_data_limite(dias)
+    particionada = tabela_particionada()
+    if particionada and not dry_run:
+        garantir_particoes()
+        particoes = _particoes_existentes()
+
+    meses = _meses_expirados(data_limite)
+    if meses and not dry_run:
+        # Os resumos diários (e os esboços de visitantes únicos) precisam
+        # existir antes de as linhas brutas saírem do banco. Consolida até
+        # ontem para que o dia do limite, excluído em parte, não seja refeito.
+        consolidar()
+
+    resultados = []
+    for inicio, fim in meses:
+        mes_completo = fim == _proximo_mes(inicio)
+        resultado = {'mes': f'{inicio:%Y-%m}', 'arquivo': None, 'arquivadas': 0, 'excluidas': 0, 'particao_descartada': False}
+
+        if dry_run:
+            resultado['arquivadas'] = EstatisticaVisualizacao.objects.filter(
+                data_visualizacao__gte=inicio, data_visualizacao__lt=fim
+            ).count()
+            resultados.append(resultado)
+            continue
+
+        resultado['arquivo'], resultado['arquivadas'] = arquivar_intervalo(inicio, fim, formato)
+
+        if particionada and mes_completo and _nome_particao(inicio) in particoes:
+            descartar_particao(inicio)
+            resultado['excluidas'] = resultado['arquivadas']
+            resultado['particao_descartada'] = True
+        else:
+            resultado['excluidas'] = excluir_em_lotes(inicio, fim, lote)
+
+        resultados.append(resultado)
+    return resultados
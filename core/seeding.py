@@ -0,0 +1,267 @@
+"""
+Geração de dados em escala para testes de desempenho
+Cria postagens, vídeos e milhões de visualizações com distribuições
+realistas (popularidade de cauda longa, sessões com várias páginas, picos
+por horário) a partir de uma semente, de modo que a mesma semente gere
+sempre o mesmo conjunto. No PostgreSQL as visualizações são gravadas com
+COPY; nos demais bancos, com bulk_create em lotes grandes
+"""
+import csv
+import io
+import itertools
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .content_renderer import renderizar_conteudo
+from .models import AgenteUsuario, EstatisticaVisualizacao, Postagem, Video
+
+# Marcadores que identificam os dados gerados (usados por limpar())
+PREFIXO_TITULO = '[seed]'
+PREFIXO_SESSAO = 'seed'
+PREFIXO_YOUTUBE = 'seed'
+
+LOTE_PADRAO = 50000
+
+# (user agent, peso) - a proporção aproxima o tráfego de um site de conteúdo
+USER_AGENTS = (
+    ('Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Mobile Safari/537.36', 28),
+    ('Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1', 18),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Safari/537.36', 22),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Safari/537.36 Edg/129.0', 6),
+    ('Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15', 6),
+    ('Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0', 3),
+    ('Mozilla/5.0 (iPad; CPU OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1', 4),
+    ('Mozilla/5.0 (Linux; Android 13; SM-X200) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Safari/537.36', 2),
+    ('Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)', 6),
+    ('Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)', 3),
+    ('facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)', 2),
+)
+
+# Peso relativo de cada hora do dia (pico à noite)
+PESOS_HORA = (2, 1, 1, 1, 1, 1, 2, 3, 4, 5, 5, 6, 7, 6, 6, 6, 6, 7, 8, 10, 11, 10, 7, 4)
+
+PARAGRAFO = (
+    '<p>Mesa Secreta analisa jogos de tabuleiro com <strong>regras</strong>, '
+    '<em>estratégias</em> e <a href="https://example.com" target="_blank">referências</a>.</p>'
+)
+VARIACOES_CONTEUDO = 20
+
+
+@contextmanager
+def sem_auto_now(model, *campos):
+    """Desativa auto_now/auto_now_add temporariamente para gravar datas históricas"""
+    fields = [model._meta.get_field(campo) for campo in campos]
+    originais = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, originais):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _pesos_zipf(quantidade, expoente=1.1):
+    """Pesos acumulados de uma distribuição de Zipf (poucos itens concentram as visitas)"""
+    return list(itertools.accumulate(1 / (posicao + 1) ** expoente for posicao in range(quantidade)))
+
+
+def gerar_postagens(quantidade, rng, dias, lote=LOTE_PADRAO):
+    """Cria postagens (90% publicadas) com conteúdo pré-renderizado"""
+    categorias = [valor for valor, _ in Postagem.CATEGORIA_CHOICES]
+    agora = timezone.now()
+
+    # Poucas variações de conteúdo, renderizadas uma única vez cada
+    conteudos = []
+    for _ in range(VARIACOES_CONTEUDO):
+        secoes = []
+        for indice in range(rng.randint(3, 8)):
+            secoes.append(f'<h2>Seção {indice + 1}</h2>')
+            secoes.extend([PARAGRAFO] * rng.randint(2, 6))
+        html = ''.join(secoes)
+        conteudos.append((html, renderizar_conteudo(html)))
+
+    with sem_auto_now(Postagem, 'data_criacao'):
+        for inicio in range(0, quantidade, lote):
+            objetos = []
+            for indice in range(inicio, min(inicio + lote, quantidade)):
+                publicada_em = agora - timedelta(minutes=rng.randint(0, dias * 24 * 60))
+                html, renderizado = rng.choice(conteudos)
+                objetos.append(Postagem(
+                    titulo=f'{PREFIXO_TITULO} Postagem {indice + 1}',
+                    subtitulo='Resumo gerado para testes de desempenho',
+                    conteudo=html,
+                    conteudo_renderizado=renderizado,
+                    categoria=rng.choice(categorias),
+                    status='publicado' if rng.random() < 0.9 else 'rascunho',
+                    data_publicacao=publicada_em,
+                    data_criacao=publicada_em,
+                    data_atualizacao=publicada_em,
+                ))
+            Postagem.objects.bulk_create(objetos)
+
+    Postagem.objects.filter(titulo__startswith=PREFIXO_TITULO).update(
+        conteudo_renderizado_versao=F('data_atualizacao')
+    )
+
+
+def gerar_videos(quantidade, rng, dias, lote=LOTE_PADRAO):
+    """Cria vídeos com datas de publicação distribuídas na janela"""
+    agora = timezone.now()
+    for inicio in range(0, quantidade, lote):
+        Video.objects.bulk_create([
+            Video(
+                titulo=f'{PREFIXO_TITULO} Vídeo {indice + 1}',
+                youtube_id=f'{PREFIXO_YOUTUBE}{indice:07d}',
+                descricao='Descrição gerada para testes de desempenho',
+                data_publicacao=agora - timedelta(minutes=rng.randint(0, dias * 24 * 60)),
+            )
+            for indice in range(inicio, min(inicio + lote, quantidade))
+        ])
+
+
+def _iterar_visualizacoes(quantidade, rng, dias):
+    """
+    Gera as visualizações sessão a sessão, como tuplas na ordem de CAMPOS_VISUALIZACAO
+
+    Cada sessão tem um agente, um IP e um número geométrico de páginas
+    vistas em sequência; o tráfego cresce ao longo da janela e varia por
+    hora do dia.
+    """
+    postagens = list(Postagem.objects.filter(status='publicado').values_list('pk', 'titulo'))
+    videos = list(Video.objects.values_list('pk', 'titulo'))
+    pesos_postagens = _pesos_zipf(len(postagens))
+    pesos_videos = _pesos_zipf(len(videos))
+    agentes = [AgenteUsuario.get_id_para(user_agent) for user_agent, _ in USER_AGENTS]
+    pesos_agentes = list(itertools.accumulate(peso for _, peso in USER_AGENTS))
+    pesos_horas = list(itertools.accumulate(PESOS_HORA))
+    # Mais tráfego nos dias recentes (crescimento linear da audiência)
+    pesos_dias = list(itertools.accumulate(1 + dia for dia in range(dias)))
+
+    inicio_janela = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=dias - 1)
+    geradas = 0
+    while geradas < quantidade:
+        sessao = f'{PREFIXO_SESSAO}{rng.getrandbits(112):028x}'
+        agente = rng.choices(agentes, cum_weights=pesos_agentes)[0]
+        ip = f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+        dia = rng.choices(range(dias), cum_weights=pesos_dias)[0]
+        hora = rng.choices(range(24), cum_weights=pesos_horas)[0]
+        momento = inicio_janela + timedelta(days=dia, hours=hora, seconds=rng.randint(0, 3599))
+        paginas = min(1 + int(math.log(1 - rng.random()) / math.log(0.6)), quantidade - geradas)
+
+        for _ in range(paginas):
+            sorteio = rng.random()
+            if sorteio < 0.65 and postagens:
+                tipo, (conteudo_id, titulo) = 'postagem', rng.choices(postagens, cum_weights=pesos_postagens)[0]
+            elif sorteio < 0.85 and videos:
+                tipo, (conteudo_id, titulo) = 'video', rng.choices(videos, cum_weights=pesos_videos)[0]
+            else:
+                tipo, conteudo_id, titulo = 'home', None, ''
+
+            # Metade das visitas abandona logo no início; o restante lê boa parte da página
+            if rng.random() < 0.45:
+                tempo, scroll = int(rng.expovariate(1 / 8)), int(rng.betavariate(1.2, 6) * 100)
+            else:
+                tempo, scroll = int(rng.lognormvariate(4.2, 0.8)), int(rng.betavariate(5, 1.8) * 100)
+            tempo = min(tempo, 3600)
+            saida = momento + timedelta(seconds=tempo)
+
+            yield (tipo, conteudo_id, titulo, sessao, ip, agente, tempo, min(scroll, 100), momento, saida)
+            momento = saida + timedelta(seconds=rng.randint(1, 30))
+            geradas += 1
+
+
+CAMPOS_VISUALIZACAO = (
+    'tipo_conteudo', 'conteudo_id', 'conteudo_titulo', 'session_key', 'ip_address',
+    'agente_id', 'tempo_visualizacao', 'scroll_profundidade', 'data_visualizacao', 'data_saida',
+)
+
+
+def _gravar_copy(linhas):
+    """Grava um lote com COPY (PostgreSQL)"""
+    buffer = io.StringIO()
+    # Strings entre aspas (título vazio continua ''); None vira "" e é lido
+    # como NULL pelo FORCE_NULL das colunas anuláveis
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(
+        tuple(valor.isoformat() if hasattr(valor, 'isoformat') else valor for valor in linha)
+        for linha in linhas
+    )
+    buffer.seek(0)
+
+    campos = [EstatisticaVisualizacao._meta.get_field(campo) for campo in CAMPOS_VISUALIZACAO]
+    colunas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+    anulaveis = ', '.join(connection.ops.quote_name(campo.column) for campo in campos if campo.null)
+    tabela = connection.ops.quote_name(EstatisticaVisualizacao._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {tabela} ({colunas}) FROM STDIN WITH (FORMAT csv, FORCE_NULL ({anulaveis}))',
+            buffer,
+        )
+
+
+def _gravar_bulk_create(linhas):
+    EstatisticaVisualizacao.objects.bulk_create(
+        [EstatisticaVisualizacao(**dict(zip(CAMPOS_VISUALIZACAO, linha))) for linha in linhas],
+        batch_size=5000,
+    )
+
+
+def gerar_visualizacoes(quantidade, rng, dias, lote=LOTE_PADRAO, progresso=None):
+    """
+    Cria as visualizações em lotes, cada um em sua própria transação
+
+    Args:
+        progresso: Função chamada com o total gravado após cada lote
+    """
+    usar_copy = connection.vendor == 'postgresql'
+    if usar_copy:
+        from .retention import garantir_particoes, tabela_particionada
+        if tabela_particionada():
+            garantir_particoes(desde=timezone.now() - timedelta(days=dias))
+
+    gravar = _gravar_copy if usar_copy else _gravar_bulk_create
+    linhas = _iterar_visualizacoes(quantidade, rng, dias)
+    gravadas = 0
+    with sem_auto_now(EstatisticaVisualizacao, 'data_visualizacao'):
+        while True:
+            bloco = list(itertools.islice(linhas, lote))
+            if not bloco:
+                break
+            with transaction.atomic():
+                if usar_copy:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL synchronous_commit = off')
+                gravar(bloco)
+            gravadas += len(bloco)
+            if progresso:
+                progresso(gravadas)
+    return gravadas
+
+
+def semear(postagens=60, videos=40, visualizacoes=5000, semente=42, dias=90, lote=LOTE_PADRAO, progresso=None):
+    """
+    Gera o conjunto completo de dados a partir da semente
+
+    Returns:
+        Dicionário com as contagens geradas e a semente usada
+    """
+    rng = random.Random(semente)
+    gerar_postagens(postagens, rng, dias, lote)
+    gerar_videos(videos, rng, dias, lote)
+    gerar_visualizacoes(visualizacoes, rng, dias, lote, progresso)
+    return {'postagens': postagens, 'videos': videos, 'visualizacoes': visualizacoes, 'semente': semente, 'dias': dias}
+
+
+def limpar():
+    """Remove todos os dados gerados por semear()"""
+    return {
+        'visualizacoes': EstatisticaVisualizacao.objects.filter(session_key__startswith=PREFIXO_SESSAO).delete()[0],
+        'postagens': Postagem.objects.filter(titulo__startswith=PREFIXO_TITULO).delete()[0],
+        'videos': Video.objects.filter(youtube_id__startswith=PREFIXO_YOUTUBE).delete()[0],
+    }
@@ -0,0 +1,174 @@
+"""
+Sinais do app core
+Invalidam os caches versionados (feeds, sitemap, documentos legais) e
+atualizam as postagens relacionadas quando o conteúdo público muda
+
+Dentro de em_lote() os eventos são acumulados e disparados uma única vez
+no fim do bloco (ações em massa do admin, publicação agendada)
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from . import relacionadas
+from .cache_utils import invalidar
+from .models import ConfiguracaoSite, Postagem, PostagemRelacionada, Video
+
+
+class Lote:
+    """Grupos de cache e postagens alterados durante um bloco em_lote()"""
+
+    def __init__(self):
+        self.grupos = set()
+        self.postagens = set()
+        self.afetadas = set()
+        # Exclusões em massa informam de uma vez as listas que apontam para as excluídas
+        self.afetadas_por_exclusao = False
+
+    def invalidar(self, *grupos):
+        self.grupos.update(grupos)
+
+    def invalidar_postagens(self, categorias):
+        for categoria in categorias:
+            self.grupos.update(_grupos_postagem(categoria))
+
+    def atualizar_relacionadas(self, pks, afetadas=()):
+        self.postagens.update(pks)
+        self.afetadas.update(afetadas)
+
+    def excluir_postagens(self, queryset):
+        """Guarda com uma consulta as listas que apontam para as postagens a excluir"""
+        self.atualizar_relacionadas((), PostagemRelacionada.objects.filter(
+            relacionada__in=queryset.values('pk')
+        ).values_list('postagem_id', flat=True))
+        self.afetadas_por_exclusao = True
+
+    def disparar(self):
+        grupos, postagens, afetadas = set(self.grupos), sorted(self.postagens), set(self.afetadas)
+
+        def apos_commit():
+            # Depois do commit: uma resposta gerada antes dele guardaria o
+            # conteúdo antigo sob a versão nova
+            if grupos:
+                invalidar(*grupos)
+            if postagens or afetadas:
+                relacionadas.atualizar_sem_erros(postagens, afetadas)
+
+        transaction.on_commit(apos_commit)
+
+
+_lote_atual = ContextVar('lote_sinais', default=None)
+
+
+@contextmanager
+def em_lote():
+    """
+    Agrupa invalidações e atualizações de relacionadas em um único evento
+
+    Os sinais disparados no bloco (ex.: exclusões em massa) e o que for
+    registrado no lote retornado (operações com update() e bulk_create(),
+    que não disparam sinais) são processados juntos ao final. Blocos
+    aninhados usam o lote mais externo.
+    """
+    atual = _lote_atual.get()
+    if atual is not None:
+        yield atual
+        return
+
+    lote = Lote()
+    token = _lote_atual.set(lote)
+    try:
+        yield lote
+    finally:
+        _lote_atual.reset(token)
+        # Mesmo com erro: parte das alterações pode já ter sido gravada
+        lote.disparar()
+
+
+def _invalidar(*grupos):
+    lote = _lote_atual.get()
+    if lote is None:
+        invalidar(*grupos)
+    else:
+        lote.invalidar(*grupos)
+
+
+def _atualizar_relacionadas(pks, afetadas=()):
+    lote = _lote_atual.get()
+    if lote is None:
+        transaction.on_commit(lambda: relacionadas.atualizar_sem_erros(pks, afetadas))
+    else:
+        lote.atualizar_relacionadas(pks, afetadas)
+
+
+def _grupos_postagem(categoria):
+    return ('postagens', f'postagens:{categoria}')
+
+
+@receiver(pre_save, sender=Postagem)
+def guardar_estado_publico(sender, instance, **kwargs):
+    """Guarda o estado anterior para saber se a postagem era visível publicamente"""
+    instance._estado_anterior = None
+    if instance.pk:
+        instance._estado_anterior = (
+            Postagem.objects.filter(pk=instance.pk).values('status', 'categoria').first()
+        )
+
+
+@receiver(post_save, sender=Postagem)
+def invalidar_cache_postagem(sender, instance, **kwargs):
+    """Invalida apenas os grupos afetados: rascunhos não aparecem em feeds nem no sitemap"""
+    grupos = set()
+    anterior = getattr(instance, '_estado_anterior', None)
+    if anterior and anterior['status'] == 'publicado':
+        grupos.update(_grupos_postagem(anterior['categoria']))
+    if instance.status == 'publicado':
+        grupos.update(_grupos_postagem(instance.categoria))
+    if grupos:
+        _invalidar(*grupos)
+
+
+@receiver(post_delete, sender=Postagem)
+def invalidar_cache_postagem_excluida(sender, instance, **kwargs):
+    if instance.status == 'publicado':
+        _invalidar(*_grupos_postagem(instance.categoria))
+
+
+@receiver(post_save, sender=Postagem)
+def atualizar_relacionadas_postagem(sender, instance, **kwargs):
+    """Recalcula os vizinhos após o commit; rascunhos que continuam rascunhos são ignorados"""
+    anterior = getattr(instance, '_estado_anterior', None)
+    if instance.status != 'publicado' and not (anterior and anterior['status'] == 'publicado'):
+        return
+    _atualizar_relacionadas([instance.pk])
+
+
+@receiver(pre_delete, sender=Postagem)
+def guardar_relacionadas_afetadas(sender, instance, **kwargs):
+    """As listas que apontam para a postagem são apagadas em cascata: guarda quais eram"""
+    lote = _lote_atual.get()
+    if lote is not None and lote.afetadas_por_exclusao:
+        return
+    instance._relacionadas_afetadas = list(
+        PostagemRelacionada.objects.filter(relacionada=instance).values_list('postagem_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Postagem)
+def atualizar_relacionadas_postagem_excluida(sender, instance, **kwargs):
+    afetadas = getattr(instance, '_relacionadas_afetadas', [])
+    if afetadas:
+        _atualizar_relacionadas([instance.pk], afetadas)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def invalidar_cache_video(sender, instance, **kwargs):
+    _invalidar('videos')
+
+
+@receiver(post_save, sender=ConfiguracaoSite)
+def invalidar_cache_configuracao(sender, instance, **kwargs):
+    _invalidar('configuracao')
@@ -0,0 +1,71 @@
+"""
+Sitemaps do site (postagens, páginas de vídeos e páginas estáticas)
+Os itens vêm de consultas values() leves, sem instanciar os models
+"""
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+from .models import Postagem, Video
+from .views import PostagemListView, VideoListView
+
+
+class PostagemSitemap(Sitemap):
+    """Uma entrada por postagem publicada"""
+    changefreq = 'weekly'
+    priority = 0.8
+
+    def items(self):
+        return (
+            Postagem.objects.publicadas()
+            .order_by('-data_publicacao')
+            .values('pk', 'data_atualizacao')
+        )
+
+    def location(self, item):
+        return reverse('core:postagem_detail', args=[item['pk']])
+
+    def lastmod(self, item):
+        return item['data_atualizacao']
+
+
+class VideoSitemap(Sitemap):
+    """Uma entrada por página da galeria de vídeos (os vídeos não têm página própria)"""
+    changefreq = 'weekly'
+    priority = 0.6
+
+    def items(self):
+        datas = list(Video.objects.order_by('-data_publicacao').values_list('data_publicacao', flat=True))
+        por_pagina = VideoListView.paginate_by
+        return [
+            {'pagina': numero + 1, 'lastmod': datas[inicio]}
+            for numero, inicio in enumerate(range(0, len(datas), por_pagina))
+        ]
+
+    def location(self, item):
+        url = reverse('core:video_list')
+        return url if item['pagina'] == 1 else f'{url}?page={item["pagina"]}'
+
+    def lastmod(self, item):
+        return item['lastmod']
+
+
+class PaginasSitemap(Sitemap):
+    """Páginas fixas e listagens por categoria"""
+    changefreq = 'daily'
+    priority = 0.5
+
+    def items(self):
+        paginas = [('core:home', None), ('core:postagem_list', None)]
+        paginas += [('core:postagem_list', categoria) for categoria, _ in Postagem.CATEGORIA_CHOICES]
+        return paginas
+
+    def location(self, item):
+        nome, categoria = item
+        url = reverse(nome)
+        return f'{url}?categoria={categoria}' if categoria else url
+
+
+SITEMAPS = {
+    'postagens': PostagemSitemap,
+    'videos': VideoSitemap,
+    'paginas': PaginasSitemap,
+}
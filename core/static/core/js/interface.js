@@ -0,0 +1,74 @@
+// ===================================
+// INTERFACE (topo, contadores, rodapé)
+// ===================================
+// Botão Voltar ao Topo - com verificação de segurança
+const scrollTopBtn = document.getElementById('scrollToTop');
+
+if (scrollTopBtn) {
+    window.addEventListener('scroll', () => {
+        if (window.pageYOffset > 300) {
+            scrollTopBtn.classList.add('visible');
+        } else {
+            scrollTopBtn.classList.remove('visible');
+        }
+    });
+
+    scrollTopBtn.addEventListener('click', () => {
+        window.scrollTo({ top: 0, behavior: 'smooth' });
+    });
+}
+
+// Animação de Contadores (Hero Stats)
+function animateCounter(element) {
+    const target = parseInt(element.dataset.target);
+    const duration = 2000; // 2 segundos
+    const increment = target / (duration / 16); // 60 FPS
+    let current = 0;
+
+    const updateCounter = () => {
+        current += increment;
+        if (current < target) {
+            element.textContent = Math.floor(current);
+            requestAnimationFrame(updateCounter);
+        } else {
+            element.textContent = target + '+';
+        }
+    };
+
+    updateCounter();
+}
+
+// Observer para iniciar animação quando os stats aparecerem na tela
+const observerOptions = {
+    threshold: 0.5,
+    rootMargin: '0px'
+};
+
+const statsObserver = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            const statNumbers = entry.target.querySelectorAll('.stat-number');
+            statNumbers.forEach(stat => {
+                if (!stat.classList.contains('animated')) {
+                    stat.classList.add('animated');
+                    animateCounter(stat);
+                }
+            });
+        }
+    });
+}, observerOptions);
+
+// Observar a seção de stats quando a página carregar
+document.addEventListener('DOMContentLoaded', () => {
+    const heroStats = document.querySelector('.hero-stats');
+    if (heroStats) {
+        statsObserver.observe(heroStats);
+    }
+
+    // Atualizar ano automaticamente no footer
+    const currentYear = new Date().getFullYear();
+    const yearElement = document.getElementById('currentYear');
+    if (yearElement) {
+        yearElement.textContent = currentYear;
+    }
+});
@@ -0,0 +1,63 @@
+// ===================================
+// MODAIS (Política de Privacidade / Termos de Uso)
+// ===================================
+function openModal(modalId) {
+    const modal = document.getElementById(modalId);
+    modal.style.display = 'block';
+    document.body.style.overflow = 'hidden';
+
+    // Aplicar o tema ATUAL DA PÁGINA ao modal (não do sistema operacional)
+    const htmlElement = document.documentElement;
+    const pageTheme = htmlElement.getAttribute('data-theme') || 'dark';
+    modal.setAttribute('data-theme', pageTheme);
+
+    carregarConteudoModal(modal);
+}
+
+// O texto dos documentos é buscado apenas na primeira abertura; o navegador
+// revalida com ETag nas visitas seguintes
+function carregarConteudoModal(modal) {
+    const corpo = modal.querySelector('.modal-body-politica[data-src]');
+    if (!corpo || corpo.dataset.carregado) {
+        return;
+    }
+    corpo.dataset.carregado = 'true';
+
+    fetch(corpo.dataset.src, { headers: { 'Accept': 'text/html' } })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.text();
+        })
+        .then(html => {
+            corpo.innerHTML = html;
+        })
+        .catch(() => {
+            delete corpo.dataset.carregado;
+            corpo.innerHTML = '<p><em>Não foi possível carregar o conteúdo. Tente novamente.</em></p>';
+        });
+}
+
+function closeModal(modalId) {
+    document.getElementById(modalId).style.display = 'none';
+    document.body.style.overflow = 'auto';
+}
+
+// Fechar modal ao clicar fora do conteúdo
+window.onclick = function(event) {
+    if (event.target.classList.contains('modal-politica')) {
+        event.target.style.display = 'none';
+        document.body.style.overflow = 'auto';
+    }
+}
+
+// Fechar modal com ESC
+document.addEventListener('keydown', function(event) {
+    if (event.key === 'Escape') {
+        document.querySelectorAll('.modal-politica').forEach(modal => {
+            modal.style.display = 'none';
+        });
+        document.body.style.overflow = 'auto';
+    }
+});
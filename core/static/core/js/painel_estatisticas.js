@@ -0,0 +1,135 @@
+// ===================================
+// PAINEL DE ESTATÍSTICAS DO ADMIN
+// ===================================
+// Gráficos em SVG desenhados a partir da API do painel (sem bibliotecas)
+(() => {
+    const painel = document.getElementById('painel-estatisticas');
+    if (!painel) {
+        return;
+    }
+
+    const CORES = { home: '#FFE656', postagem: '#00E5CC', video: '#FF6B35' };
+    const NOMES = { home: 'Home', postagem: 'Postagens', video: 'Vídeos' };
+    const NOMES_GRANULARIDADE = { dia: 'por dia', semana: 'por semana', mes: 'por mês' };
+    const LARGURA = 800;
+    const ALTURA = 240;
+    const MARGEM = 30;
+    const SVG = 'http://www.w3.org/2000/svg';
+
+    function elemento(nome, atributos) {
+        const el = document.createElementNS(SVG, nome);
+        Object.entries(atributos).forEach(([chave, valor]) => el.setAttribute(chave, valor));
+        return el;
+    }
+
+    function rotulo(periodo) {
+        const [ano, mes, dia] = periodo.split('-');
+        return `${dia}/${mes}/${ano.slice(2)}`;
+    }
+
+    // Linhas de uma ou mais séries que compartilham o eixo x
+    function desenharLinhas(container, periodos, series) {
+        const maximo = Math.max(1, ...series.flatMap((serie) => serie.valores));
+        const passo = periodos.length > 1 ? (LARGURA - 2 * MARGEM) / (periodos.length - 1) : 0;
+        const x = (indice) => MARGEM + indice * passo;
+        const y = (valor) => ALTURA - MARGEM - (valor / maximo) * (ALTURA - 2 * MARGEM);
+
+        const svg = elemento('svg', { viewBox: `0 0 ${LARGURA} ${ALTURA}`, preserveAspectRatio: 'none', role: 'img' });
+        svg.append(elemento('line', { x1: MARGEM, y1: y(0), x2: LARGURA - MARGEM, y2: y(0), stroke: 'rgba(255,255,255,0.2)' }));
+
+        const topo = elemento('text', { x: 2, y: MARGEM, fill: 'rgba(255,255,255,0.6)', 'font-size': 11 });
+        topo.textContent = Math.round(maximo).toLocaleString('pt-BR');
+        svg.append(topo);
+        [0, periodos.length - 1].forEach((indice) => {
+            if (!periodos.length) {
+                return;
+            }
+            const texto = elemento('text', {
+                x: x(indice), y: ALTURA - 8, fill: 'rgba(255,255,255,0.6)', 'font-size': 11,
+                'text-anchor': indice ? 'end' : 'start',
+            });
+            texto.textContent = rotulo(periodos[indice]);
+            svg.append(texto);
+        });
+
+        series.forEach((serie) => {
+            const pontos = serie.valores.map((valor, indice) => `${x(indice)},${y(valor)}`).join(' ');
+            const linha = elemento('polyline', { points: pontos, fill: 'none', stroke: serie.cor, 'stroke-width': 2 });
+            const titulo = elemento('title', {});
+            titulo.textContent = serie.nome;
+            linha.append(titulo);
+            svg.append(linha);
+        });
+        container.replaceChildren(svg);
+
+        if (series.length > 1) {
+            const legenda = document.createElement('div');
+            legenda.className = 'painel-legenda';
+            series.forEach((serie) => {
+                const item = document.createElement('span');
+                item.style.setProperty('--cor', serie.cor);
+                item.textContent = serie.nome;
+                legenda.append(item);
+            });
+            container.append(legenda);
+        }
+    }
+
+    function desenharDivisao(container, divisao) {
+        container.replaceChildren(...Object.entries(divisao).map(([tipo, dados]) => {
+            const linha = document.createElement('div');
+            linha.style.marginBottom = '12px';
+            linha.textContent = `${NOMES[tipo]}: ${dados.visualizacoes.toLocaleString('pt-BR')} (${dados.percentual}%)`;
+            const barra = document.createElement('div');
+            barra.className = 'painel-barra';
+            barra.style.setProperty('--cor', CORES[tipo]);
+            barra.style.width = `${dados.percentual}%`;
+            linha.append(barra);
+            return linha;
+        }));
+    }
+
+    function desenharTop(corpo, postagens) {
+        corpo.replaceChildren(...postagens.map((postagem) => {
+            const linha = document.createElement('tr');
+            [postagem.titulo, postagem.visualizacoes.toLocaleString('pt-BR'), `${postagem.tempo_medio}s`, `${postagem.scroll_medio}%`]
+                .forEach((valor) => {
+                    const celula = document.createElement('td');
+                    celula.textContent = valor;
+                    linha.append(celula);
+                });
+            return linha;
+        }));
+    }
+
+    const grafico = (nome) => painel.querySelector(`[data-grafico="${nome}"]`);
+
+    fetch(painel.dataset.api, { credentials: 'same-origin' })
+        .then((resposta) => {
+            if (!resposta.ok) {
+                return resposta.json().then((erro) => Promise.reject(new Error(erro.error)));
+            }
+            return resposta.json();
+        })
+        .then((dados) => {
+            painel.querySelector('[data-granularidade]').textContent = NOMES_GRANULARIDADE[dados.granularidade];
+            const periodos = dados.serie.map((ponto) => ponto.periodo);
+            desenharLinhas(grafico('serie'), periodos, Object.keys(NOMES).map((tipo) => ({
+                nome: NOMES[tipo], cor: CORES[tipo], valores: dados.serie.map((ponto) => ponto[tipo]),
+            })));
+            desenharLinhas(grafico('tempo'), periodos, [{
+                nome: 'Tempo médio', cor: CORES.postagem, valores: dados.tendencias.map((ponto) => ponto.tempo_medio),
+            }]);
+            desenharLinhas(grafico('scroll'), periodos, [{
+                nome: 'Scroll médio', cor: CORES.video, valores: dados.tendencias.map((ponto) => ponto.scroll_medio),
+            }]);
+            desenharDivisao(grafico('divisao'), dados.divisao);
+            desenharTop(grafico('top'), dados.top_postagens);
+        })
+        .catch((erro) => {
+            const aviso = document.createElement('p');
+            aviso.className = 'errornote';
+            aviso.textContent = `Não foi possível carregar as estatísticas: ${erro.message}`;
+            painel.replaceChildren(aviso);
+        });
+})();
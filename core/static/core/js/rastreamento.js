@@ -0,0 +1,196 @@
+// ===================================
+// COOKIE CONSENT SYSTEM
+// ===================================
+function checkCookieConsent() {
+    const consent = localStorage.getItem('cookieConsent');
+    const banner = document.getElementById('cookieBanner');
+
+    if (!consent) {
+        // Mostrar banner após 1 segundo
+        setTimeout(() => {
+            banner.classList.add('show');
+        }, 1000);
+    } else if (consent === 'accepted') {
+        // Ativar rastreamento
+        enableTracking();
+    }
+}
+
+function acceptCookies() {
+    localStorage.setItem('cookieConsent', 'accepted');
+    localStorage.setItem('cookieConsentDate', new Date().toISOString());
+    closeCookieBanner();
+    enableTracking();
+    console.log('✅ Cookies aceitos - Rastreamento ativado');
+}
+
+function rejectCookies() {
+    localStorage.setItem('cookieConsent', 'rejected');
+    localStorage.setItem('cookieConsentDate', new Date().toISOString());
+    closeCookieBanner();
+    console.log('❌ Cookies rejeitados - Apenas cookies essenciais');
+}
+
+function closeCookieBanner() {
+    const banner = document.getElementById('cookieBanner');
+    banner.classList.remove('show');
+    setTimeout(() => {
+        banner.style.display = 'none';
+    }, 400);
+}
+
+function enableTracking() {
+    iniciarRastreamento();
+}
+
+// ===================================
+// RASTREAMENTO (tempo visível e scroll)
+// ===================================
+// O tempo só conta com a aba visível. As métricas ficam acumuladas e são
+// enviadas em lote com navigator.sendBeacon quando a aba é ocultada ou a
+// página é descartada (visibilitychange/pagehide), e num pulso lento
+// enquanto a página está visível, apenas se algo mudou. Envios que falham
+// ficam em localStorage e seguem no próximo lote, junto com outras páginas.
+const URL_RASTREAMENTO = '/api/track-view/';
+const CHAVE_PENDENTES = 'rastreamentoPendentes';
+const INTERVALO_PULSO = 60000;
+const MAX_PENDENTES = 20;
+
+const paginaAtual = {
+    tipo_conteudo: 'home',
+    conteudo_id: null,
+    conteudo_titulo: document.title,
+    tempo_visualizacao: 0,
+    scroll_profundidade: 0
+};
+let visivelDesde = null;
+let tempoAcumulado = 0;
+let ultimoEnviado = { tempo: -1, scroll: -1 };
+let rastreamentoAtivo = false;
+
+function iniciarRastreamento() {
+    if (rastreamentoAtivo) {
+        return;
+    }
+    rastreamentoAtivo = true;
+
+    const urlName = document.body.dataset.urlName;
+    const detalhe = window.location.pathname.match(/\/postagens\/(\d+)\//);
+    if (urlName === 'postagem_detail' && detalhe) {
+        paginaAtual.tipo_conteudo = 'postagem';
+        paginaAtual.conteudo_id = parseInt(detalhe[1]);
+    } else if (urlName === 'video_list') {
+        paginaAtual.tipo_conteudo = 'video';
+    }
+
+    if (document.visibilityState === 'visible') {
+        visivelDesde = Date.now();
+    }
+
+    window.addEventListener('scroll', atualizarScroll, { passive: true });
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') {
+            pausarTempo();
+            enviarLote();
+        } else {
+            visivelDesde = Date.now();
+        }
+    });
+    window.addEventListener('pagehide', () => {
+        pausarTempo();
+        enviarLote();
+    });
+    setInterval(() => {
+        if (document.visibilityState === 'visible') {
+            enviarLote();
+        }
+    }, INTERVALO_PULSO);
+
+    // Reenvia o que ficou pendente de páginas anteriores
+    if (lerPendentes().length) {
+        enviarLote();
+    }
+}
+
+function atualizarScroll() {
+    const altura = document.documentElement.scrollHeight - window.innerHeight;
+    if (altura <= 0) {
+        return;
+    }
+    const percentual = Math.min(100, Math.round((window.scrollY / altura) * 100));
+    if (percentual > paginaAtual.scroll_profundidade) {
+        paginaAtual.scroll_profundidade = percentual;
+    }
+}
+
+function pausarTempo() {
+    if (visivelDesde !== null) {
+        tempoAcumulado += Date.now() - visivelDesde;
+        visivelDesde = null;
+    }
+}
+
+function tempoVisivel() {
+    const emAndamento = visivelDesde !== null ? Date.now() - visivelDesde : 0;
+    return Math.round((tempoAcumulado + emAndamento) / 1000);
+}
+
+function lerPendentes() {
+    try {
+        return JSON.parse(localStorage.getItem(CHAVE_PENDENTES)) || [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function salvarPendentes(lote) {
+    try {
+        if (lote.length) {
+            localStorage.setItem(CHAVE_PENDENTES, JSON.stringify(lote.slice(-MAX_PENDENTES)));
+        } else {
+            localStorage.removeItem(CHAVE_PENDENTES);
+        }
+    } catch (e) {
+        // localStorage indisponível (modo privado): as métricas pendentes são descartadas
+    }
+}
+
+function enviarLote() {
+    const lote = lerPendentes();
+
+    paginaAtual.tempo_visualizacao = tempoVisivel();
+    // Só envia a página atual se o tempo ou o scroll aumentaram desde o último envio
+    if (paginaAtual.tempo_visualizacao > ultimoEnviado.tempo || paginaAtual.scroll_profundidade > ultimoEnviado.scroll) {
+        lote.push({ ...paginaAtual });
+        ultimoEnviado = { tempo: paginaAtual.tempo_visualizacao, scroll: paginaAtual.scroll_profundidade };
+    }
+    if (!lote.length) {
+        return;
+    }
+
+    const corpo = JSON.stringify(lote);
+    let enviado = false;
+    if (navigator.sendBeacon) {
+        enviado = navigator.sendBeacon(URL_RASTREAMENTO, new Blob([corpo], { type: 'application/json' }));
+    }
+    if (enviado) {
+        salvarPendentes([]);
+        return;
+    }
+
+    // Sem sendBeacon (ou fila do navegador cheia): guarda e tenta com fetch
+    salvarPendentes(lote);
+    fetch(URL_RASTREAMENTO, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: corpo,
+        keepalive: true
+    }).then(response => {
+        if (response.ok) {
+            salvarPendentes([]);
+        }
+    }).catch(() => {});
+}
+
+// Verificar consentimento ao carregar a página
+document.addEventListener('DOMContentLoaded', checkCookieConsent);
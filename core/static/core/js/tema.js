@@ -0,0 +1,23 @@
+// ===================================
+// THEME TOGGLE (Modo Claro/Escuro)
+// ===================================
+// O tema inicial é aplicado por um script inline no <head> de base.html,
+// antes da primeira pintura, para evitar o flash do tema errado
+const themeToggle = document.getElementById('themeToggle');
+const htmlElement = document.documentElement;
+
+// Toggle do tema
+if (themeToggle) {
+    themeToggle.addEventListener('click', () => {
+        const currentTheme = htmlElement.getAttribute('data-theme');
+        const newTheme = currentTheme === 'light' ? 'dark' : 'light';
+
+        if (newTheme === 'light') {
+            htmlElement.setAttribute('data-theme', 'light');
+        } else {
+            htmlElement.removeAttribute('data-theme');
+        }
+
+        localStorage.setItem('theme', newTheme);
+    });
+}
@@ -0,0 +1,21 @@
+// ===================================
+// YOUTUBE LEVE (thumbnail + play; o player só carrega no clique)
+// ===================================
+// Delegação no documento: funciona para componentes inseridos depois do carregamento
+document.addEventListener('click', (event) => {
+    const container = event.target.closest('.youtube-leve[data-embed]');
+    if (!container) {
+        return;
+    }
+    event.preventDefault();
+
+    const iframe = document.createElement('iframe');
+    iframe.src = container.dataset.embed;
+    iframe.title = container.dataset.titulo || 'Vídeo do YouTube';
+    iframe.allow = 'accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture';
+    iframe.allowFullscreen = true;
+
+    container.replaceChildren(iframe);
+    container.classList.add('youtube-leve-ativo');
+    delete container.dataset.embed;
+});
@@ -0,0 +1,160 @@
+"""
+Pipeline dos arquivos estáticos
+Junta e minifica as folhas de estilo do site em um único arquivo e serve
+todos os estáticos com nome versionado (hash do conteúdo), compactados com
+Brotli e gzip, para que possam ser cacheados como imutáveis
+"""
+import gzip
+import logging
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+# Arquivo gerado: arquivos de origem (na ordem de inclusão)
+CSS_BUNDLES = {
+    'core/css/bundle.css': (
+        'core/css/style.css', 'core/css/footer.css', 'core/css/componentes.css', 'core/css/youtube_leve.css',
+        # Gerado por manage.py build_icons
+        'core/css/icones.css',
+    ),
+}
+
+PASTA_BUNDLES = Path(tempfile.gettempdir()) / 'mesa-secreta-bundles'
+
+
+# ===================================
+# Minificação
+# ===================================
+
+_STRINGS_E_COMENTARIOS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*(?!!).*?\*/)', re.DOTALL)
+_ESPACOS = re.compile(r'\s+')
+_ESPACO_EM_VOLTA = re.compile(r'\s*([{};,>])\s*')
+_ESPACO_DEPOIS_DOIS_PONTOS = re.compile(r':\s+')
+
+
+def minificar_css(css):
+    """
+    Remove comentários e espaços desnecessários de uma folha de estilo
+
+    Conservador de propósito: strings são preservadas e operadores de
+    calc() e seletores com ':' não são alterados.
+    """
+    strings = []
+
+    def proteger(match):
+        if match.group(2):
+            return ''
+        strings.append(match.group(1))
+        return f'\x00{len(strings) - 1}\x00'
+
+    css = _STRINGS_E_COMENTARIOS.sub(proteger, css)
+    css = _ESPACOS.sub(' ', css)
+    css = _ESPACO_EM_VOLTA.sub(r'\1', css)
+    css = _ESPACO_DEPOIS_DOIS_PONTOS.sub(':', css)
+    css = css.replace(';}', '}').strip()
+    return re.sub(r'\x00(\d+)\x00', lambda m: strings[int(m.group(1))], css)
+
+
+def gerar_bundle(nome):
+    """Gera o bundle (se alguma origem mudou) e retorna o caminho do arquivo"""
+    origens = []
+    for origem in CSS_BUNDLES[nome]:
+        caminho = finders.find(origem)
+        if caminho is None:
+            raise FileNotFoundError(f'Arquivo de origem do bundle não encontrado: {origem}')
+        origens.append(Path(caminho))
+
+    destino = PASTA_BUNDLES / nome
+    if destino.exists() and destino.stat().st_mtime >= max(origem.stat().st_mtime for origem in origens):
+        return destino
+
+    conteudo = '\n'.join(minificar_css(origem.read_text(encoding='utf-8')) for origem in origens)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix('.tmp')
+    temporario.write_text(conteudo + '\n', encoding='utf-8')
+    temporario.replace(destino)
+    return destino
+
+
+class BundleFinder(BaseFinder):
+    """
+    Finder que expõe os bundles gerados como arquivos estáticos comuns,
+    tanto no servidor de desenvolvimento quanto no collectstatic
+    """
+
+    def check(self, **kwargs):
+        return []
+
+    def find(self, path, find_all=False, **kwargs):
+        if path not in CSS_BUNDLES:
+            return [] if find_all else None
+        caminho = str(gerar_bundle(path))
+        return [caminho] if find_all else caminho
+
+    def list(self, ignore_patterns):
+        storage = FileSystemStorage(location=PASTA_BUNDLES)
+        for nome in CSS_BUNDLES:
+            gerar_bundle(nome)
+            yield nome, storage
+
+
+# ===================================
+# Storage
+# ===================================
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Estáticos com hash no nome, compactados (Brotli quando o pacote
+    brotli está instalado, e gzip) e tolerantes a referências quebradas:
+    um url() apontando para um arquivo inexistente mantém o nome original
+    em vez de interromper o collectstatic, e nomes ausentes do manifesto
+    são servidos sem hash em vez de gerar erro na renderização
+    """
+
+    manifest_strict = False
+    coletando = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError as e:
+            # Fora do collectstatic (ex: estáticos ainda não coletados) o fallback é silencioso
+            if self.coletando:
+                logger.warning(f'Referência estática não encontrada, mantendo o nome original: {e}')
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        self.coletando = True
+        try:
+            yield from super().post_process(paths, dry_run, **options)
+        finally:
+            self.coletando = False
+        if not dry_run:
+            self.relatorio_tamanhos(sys.stdout)
+
+    def relatorio_tamanhos(self, saida):
+        """Escreve o tamanho original, minificado e compactado de cada bundle"""
+        saida.write('\n📦 Tamanho dos bundles:\n')
+        for nome, origens in CSS_BUNDLES.items():
+            original = sum(Path(finders.find(origem)).stat().st_size for origem in origens)
+            caminho = Path(self.path(self.stored_name(nome)))
+            minificado = caminho.read_bytes()
+            comprimidos = {
+                'gzip': caminho.with_name(caminho.name + '.gz'),
+                'brotli': caminho.with_name(caminho.name + '.br'),
+            }
+            detalhes = [f'original {original / 1024:.1f} KB', f'minificado {len(minificado) / 1024:.1f} KB']
+            for formato, arquivo in comprimidos.items():
+                if arquivo.exists():
+                    detalhes.append(f'{formato} {arquivo.stat().st_size / 1024:.1f} KB')
+                elif formato == 'gzip':
+                    detalhes.append(f'gzip ~{len(gzip.compress(minificado, 9)) / 1024:.1f} KB')
+            saida.write(f'   {caminho.name}: {", ".join(detalhes)}\n')
@@ -8,11 +8,20 @@ from django.conf import settings
 from supabase import create_client, Client
 from urllib.parse import urljoin
 
+from core.instrumentation import medido
+
 
 class SupabaseStorage(Storage):
     """
     Storage backend personalizado para Supabase Storage
     """
+    # Arquivos gerados pelo sistema (derivados, caches) mantêm o nome
+    # determinístico para que possam ser reaproveitados entre execuções
+    prefixos_nome_fixo = ('derivados/', 'arquivo/', 'thumbnails/')
+    # Nomes que incluem o hash do conteúdo: servidos com cache de um ano
+    prefixos_imutaveis = ('thumbnails/',)
+    CACHE_IMUTAVEL = str(60 * 60 * 24 * 365)
+    
     def __init__(self):
         self.supabase_url = settings.SUPABASE_URL
         self.supabase_key = settings.SUPABASE_KEY
@@ -23,6 +32,7 @@ class SupabaseStorage(Storage):
         """Retorna o cliente de storage do Supabase"""
         return self.supabase.storage.from_(self.bucket_name)
     
+    @medido('storage')
     def _save(self, name, content):
         """
         Salva o arquivo no Supabase Storage
@@ -39,17 +49,22 @@ class SupabaseStorage(Storage):
         # Upload para o Supabase
         storage_client = self._get_storage_client()
         
+        file_options = {"content-type": self._guess_content_type(name)}
+        if name.startswith(self.prefixos_imutaveis):
+            file_options["cache-control"] = self.CACHE_IMUTAVEL
+        
         try:
             # Upload do arquivo
             response = storage_client.upload(
                 path=name,
                 file=file_content,
-                file_options={"content-type": self._guess_content_type(name)}
+                file_options=file_options
             )
             return name
         except Exception as e:
             raise IOError(f"Erro ao fazer upload para Supabase Storage: {str(e)}")
     
+    @medido('storage')
     def _open(self, name, mode='rb'):
         """
         Abre um arquivo do Supabase Storage
@@ -62,6 +77,7 @@ class SupabaseStorage(Storage):
         except Exception as e:
             raise IOError(f"Erro ao baixar arquivo do Supabase Storage: {str(e)}")
     
+    @medido('storage')
     def delete(self, name):
         """
         Deleta um arquivo do Supabase Storage
@@ -74,16 +90,18 @@ class SupabaseStorage(Storage):
             # Não levanta erro se arquivo não existir
             pass
     
+    @medido('storage')
     def exists(self, name):
         """
         Verifica se o arquivo existe no Supabase Storage
         """
         storage_client = self._get_storage_client()
+        pasta, _, nome_arquivo = name.rpartition('/')
         
         try:
-            # Lista arquivos no bucket
-            files = storage_client.list()
-            return any(file['name'] == name for file in files)
+            # Lista arquivos da pasta do arquivo no bucket
+            files = storage_client.list(pasta) if pasta else storage_client.list()
+            return any(file['name'] == nome_arquivo for file in files)
         except Exception:
             return False
     
@@ -101,6 +119,7 @@ class SupabaseStorage(Storage):
             # URL padrão caso ocorra erro
             return f"{self.supabase_url}/storage/v1/object/public/{self.bucket_name}/{name}"
     
+    @medido('storage')
     def size(self, name):
         """
         Retorna o tamanho do arquivo em bytes
@@ -123,6 +142,9 @@ class SupabaseStorage(Storage):
         import uuid
         from pathlib import Path
         
+        if name.startswith(self.prefixos_nome_fixo):
+            return name
+        
         # Pegar extensão do arquivo
         ext = Path(name).suffix
         # Gerar nome único
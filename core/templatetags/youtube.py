@@ -0,0 +1,49 @@
+"""
+Incorporação leve de vídeos do YouTube
+Renderiza apenas a thumbnail (do cache local, ver core/thumbnails.py) e um
+botão de play; o iframe do player, que baixa cerca de 1 MB de JavaScript, só
+é criado no clique (core/js/youtube_leve.js), no domínio youtube-nocookie.com.
+
+    {% load youtube %}
+    {% youtube_leve video %}
+    {% youtube_leve video classe="video-thumbnail" %}
+
+Páginas fora do site público (admin) precisam incluir core/css/youtube_leve.css
+e core/js/youtube_leve.js; no site eles já estão no bundle e no base.html.
+"""
+from urllib.parse import urlencode
+
+from django import template
+
+register = template.Library()
+
+URL_EMBED = 'https://www.youtube-nocookie.com/embed/{youtube_id}?{parametros}'
+
+
+@register.inclusion_tag('core/partials/youtube_leve.html')
+def youtube_leve(video, classe='', titulo='', sizes='(max-width: 720px) 100vw, 640px'):
+    """
+    Args:
+        video: Instância de Video ou o ID do vídeo no YouTube
+        classe: Classes CSS adicionais do contêiner
+        titulo: Título acessível (padrão: o título do vídeo)
+        sizes: Atributo sizes da thumbnail (largura exibida)
+    """
+    if isinstance(video, str):
+        youtube_id, thumbnail, srcset = video, f'https://i.ytimg.com/vi/{video}/hqdefault.jpg', ''
+    else:
+        youtube_id, thumbnail, srcset = video.youtube_id, video.get_thumbnail_url(), video.get_thumbnail_srcset()
+        titulo = titulo or video.titulo
+
+    return {
+        'url_embed': URL_EMBED.format(
+            youtube_id=youtube_id,
+            # O clique já é a intenção de assistir: o player começa tocando
+            parametros=urlencode({'autoplay': 1, 'rel': 0}),
+        ),
+        'thumbnail': thumbnail,
+        'srcset': srcset,
+        'titulo': titulo or 'Vídeo do YouTube',
+        'classe': classe,
+        'sizes': sizes,
+    }
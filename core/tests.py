@@ -1,3 +1,1144 @@
-from django.test import TestCase
+import gzip
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import agendamento, beacons, estatisticas, ranking, relacionadas, retention, signals, static_pipeline, thumbnails
+from core.cache_utils import chave_versionada, invalidar
+from core.content_renderer import renderizar_conteudo
+from core.hll import HyperLogLog
+from core.paginacao import PaginadorEstimado, estimar_linhas
+from core.models import AgenteUsuario, ConfiguracaoSite, EstatisticaVisualizacao, Postagem, PostagemRelacionada, RankingPostagem, ResumoDiario, Video
+from core.user_agents import analisar_user_agent
+
+
+def criar_visualizacao(dias_atras=0, tipo='postagem', conteudo_id=1, sessao='s1', **campos):
+    """Cria uma visualização com data no passado (data_visualizacao é auto_now_add)"""
+    visualizacao = EstatisticaVisualizacao.objects.create(
+        tipo_conteudo=tipo, conteudo_id=conteudo_id, session_key=sessao, **campos
+    )
+    data = timezone.now() - timedelta(days=dias_atras)
+    EstatisticaVisualizacao.objects.filter(pk=visualizacao.pk).update(data_visualizacao=data)
+    visualizacao.data_visualizacao = data
+    return visualizacao
+
+
+class RenderizadorConteudoTests(TestCase):
+    """Sanitização e otimizações do HTML das postagens (core/content_renderer.py)"""
+
+    def test_remove_tags_e_atributos_nao_permitidos(self):
+        html = renderizar_conteudo(
+            '<p onclick="x()" style="color: red; position: fixed">Oi<script>alert(1)</script></p>'
+            '<a href="javascript:alert(1)">link</a><form><input></form>'
+        )
+        self.assertEqual(html, '<p style="color: red">Oi</p><a>link</a>')
+
+    def test_fecha_tags_abertas(self):
+        self.assertEqual(renderizar_conteudo('<p>um <strong>dois'), '<p>um <strong>dois</strong></p>')
+
+    def test_tag_descartada_nao_fechada_nao_trava(self):
+        # Regressão: <script>/<style> sem fechamento deixava renderizar() em loop infinito
+        self.assertEqual(renderizar_conteudo('<p><script>x'), '<p></p>')
+        self.assertEqual(renderizar_conteudo('<div>texto<style>'), '<div>texto</div>')
+        self.assertEqual(renderizar_conteudo('<ul><li>a<iframe><script>b'), '<ul><li>a</li></ul>')
+
+    def test_links_externos_e_imagens(self):
+        html = renderizar_conteudo('<a href="https://x.com" target="_blank">x</a><img src="https://x.com/a.png">')
+        self.assertIn('rel="noopener noreferrer"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('alt=""', html)
+
+    def test_ancoras_unicas_nos_titulos(self):
+        html = renderizar_conteudo('<h2>Introdução</h2><h2>Introdução</h2>')
+        self.assertEqual(html, '<h2 id="introducao">Introdução</h2><h2 id="introducao-2">Introdução</h2>')
+
+
+class PostagemRenderizacaoTests(TestCase):
+    def _updates(self, consultas):
+        # Só os UPDATEs da postagem: com o DatabaseCache, a invalidação do cache também faz UPDATEs
+        tabela = connection.ops.quote_name(Postagem._meta.db_table)
+        return sum(consulta['sql'].startswith(f'UPDATE {tabela}') for consulta in consultas.captured_queries)
+
+    def test_renderiza_uma_vez_por_revisao(self):
+        postagem = Postagem.objects.create(titulo='Teste', conteudo='<p>Olá<script>x</script></p>')
+        self.assertEqual(postagem.conteudo_renderizado, '<p>Olá</p>')
+        self.assertEqual(postagem.conteudo_renderizado_versao, postagem.data_atualizacao)
+        with mock.patch('core.content_renderer.renderizar_conteudo') as renderizar:
+            Postagem.objects.get(pk=postagem.pk).get_conteudo_html()
+        renderizar.assert_not_called()
+
+    def test_save_sem_mudar_o_conteudo_nao_renderiza(self):
+        postagem = Postagem.objects.create(titulo='Teste', conteudo='<p>Olá</p>')
+        postagem = Postagem.objects.get(pk=postagem.pk)
+        with mock.patch('core.content_renderer.renderizar_conteudo') as renderizar, \
+                CaptureQueriesContext(connection) as consultas:
+            postagem.status = 'publicado'
+            postagem.save()
+        renderizar.assert_not_called()
+        self.assertEqual(self._updates(consultas), 1)
+        salva = Postagem.objects.get(pk=postagem.pk)
+        self.assertEqual(salva.conteudo_renderizado_versao, salva.data_atualizacao)
+
+        salva.conteudo = '<p>Novo</p>'
+        with CaptureQueriesContext(connection) as consultas:
+            salva.save()
+        # HTML e versão no mesmo UPDATE da postagem
+        self.assertEqual(self._updates(consultas), 1)
+        salva = Postagem.objects.get(pk=salva.pk)
+        self.assertEqual(salva.conteudo_renderizado, '<p>Novo</p>')
+        self.assertEqual(salva.conteudo_renderizado_versao, salva.data_atualizacao)
+
+        # Só o status: data_atualizacao e a versão do HTML ficam como estão
+        salva.status = 'rascunho'
+        salva.save(update_fields=['status'])
+        self.assertEqual(Postagem.objects.get(pk=salva.pk).get_conteudo_html(), '<p>Novo</p>')
+
+    def test_dimensoes_das_imagens_ficam_no_manifesto_dos_derivados(self):
+        from io import BytesIO
+        from django.core.files.base import ContentFile
+        from PIL import Image
+        from core import content_renderer
+
+        armazenamento = FileSystemStorage(location=tempfile.mkdtemp(), base_url='/media/')
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 500), 'red').save(buffer, 'PNG')
+        with mock.patch.object(content_renderer, 'default_storage', armazenamento):
+            nome = armazenamento.save('capa.png', ContentFile(buffer.getvalue()))
+            primeira = renderizar_conteudo(f'<img src="/media/{nome}">')
+            self.assertIn('width="1000" height="500"', primeira)
+            self.assertIn('480w', primeira)
+
+            with mock.patch.object(armazenamento, 'open', wraps=armazenamento.open) as abrir, \
+                    mock.patch.object(armazenamento, 'exists', wraps=armazenamento.exists) as existe:
+                self.assertEqual(renderizar_conteudo(f'<img src="/media/{nome}">'), primeira)
+            # Só o manifesto é lido: nem o original nem cada derivado
+            abertos = [chamada.args[0] for chamada in abrir.call_args_list]
+            self.assertEqual(len(abertos), 1)
+            self.assertTrue(abertos[0].startswith('derivados/') and abertos[0].endswith('.json'), abertos)
+            existe.assert_not_called()
+
+    def test_falha_do_renderizador_guarda_texto_escapado_da_revisao(self):
+        with mock.patch('core.content_renderer.renderizar_conteudo', side_effect=ValueError('quebrado')), \
+                self.assertLogs('core.models', 'ERROR'):
+            postagem = Postagem.objects.create(titulo='Teste', conteudo='<p>Novo <b>texto</b> & <i>mais</i></p>')
+        self.assertEqual(postagem.erro_renderizacao, 'quebrado')
+
+        salva = Postagem.objects.get(pk=postagem.pk)
+        self.assertEqual(salva.conteudo_renderizado, '<p>Novo texto &amp; mais</p>')
+        # A versão fica marcada como atual: a página não tenta renderizar de novo a cada acesso
+        self.assertEqual(salva.conteudo_renderizado_versao, salva.data_atualizacao)
+
+
+class RetencaoTests(TestCase):
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.storage = FileSystemStorage(location=pasta.name)
+        patcher = mock.patch.object(retention, 'default_storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_arquiva_e_exclui_apenas_o_que_expirou(self):
+        agente = AgenteUsuario.objects.create(hash='a' * 40, user_agent='Mozilla/5.0 (X11; Linux x86_64) Firefox/120.0')
+        antigas = [criar_visualizacao(400, sessao=f'a{i}', agente=agente) for i in range(3)]
+        recente = criar_visualizacao(1)
+
+        resultados = retention.aplicar_retencao(dias=180, formato='ndjson')
+
+        self.assertEqual(sum(r['excluidas'] for r in resultados), 3)
+        self.assertEqual(list(EstatisticaVisualizacao.objects.values_list('pk', flat=True)), [recente.pk])
+        with self.storage.open(resultados[0]['arquivo'], 'rb') as arquivo:
+            linhas = [json.loads(linha) for linha in gzip.decompress(arquivo.read()).splitlines()]
+        self.assertEqual(sorted(linha['id'] for linha in linhas), sorted(v.pk for v in antigas))
+        self.assertEqual(linhas[0]['user_agent'], agente.user_agent)
+
+    def test_dry_run_nao_altera_nada(self):
+        criar_visualizacao(400)
+        resultados = retention.aplicar_retencao(dias=180, dry_run=True)
+        self.assertEqual(resultados[0]['arquivadas'], 1)
+        self.assertEqual(EstatisticaVisualizacao.objects.count(), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Particionamento disponível apenas no PostgreSQL')
+class ParticionamentoTests(TestCase):
+    # DDL é transacional no PostgreSQL: a conversão é desfeita ao fim de cada teste
+
+    def _converter(self):
+        # As chaves estrangeiras do Django são verificadas no commit, que no
+        # TestCase nunca chega; com verificações pendentes a tabela antiga não pode ser removida
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        return retention.converter_para_particionada()
+
+    def test_conversao_preserva_dados_indices_e_chave_estrangeira(self):
+        agente_id = AgenteUsuario.objects.create(hash='a' * 40, user_agent='Mozilla/5.0 (X11; Linux x86_64) Firefox/120.0').pk
+        criar_visualizacao(40, agente_id=agente_id)
+        criar_visualizacao(0, agente_id=agente_id)
+
+        self.assertTrue(self._converter())
+
+        self.assertTrue(retention.tabela_particionada())
+        self.assertEqual(EstatisticaVisualizacao.objects.filter(agente_id=agente_id).count(), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [retention.TABELA]
+            )
+            chaves = [linha[0] for linha in cursor.fetchall()]
+        self.assertTrue(any('core_agenteusuario' in chave for chave in chaves), chaves)
+        # Nova linha continua recebendo id da sequência própria
+        self.assertIsNotNone(criar_visualizacao(0).pk)
+
+    def test_meses_sem_particao_vao_para_a_padrao_e_depois_para_a_do_mes(self):
+        self._converter()
+        futuro = timezone.localtime() + timedelta(days=200)
+        inicio = futuro.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        padrao = retention._nome_particao_padrao()
+        self.assertIn(padrao, retention._particoes_existentes())
+
+        # Cron parado: o mês ainda não tem partição, mas a gravação não falha
+        visualizacao = criar_visualizacao(-200)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(padrao)}')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        retention.garantir_particoes(meses_a_frente=7)
+        self.assertIn(retention._nome_particao(inicio), retention._particoes_existentes())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(padrao)}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(EstatisticaVisualizacao.objects.filter(pk=visualizacao.pk).exists())
+
+    def test_estimativa_soma_as_particoes(self):
+        for i in range(30):
+            criar_visualizacao(40 * (i % 2), sessao=f's{i}')
+        self._converter()
+        with connection.cursor() as cursor:
+            # Como o autovacuum: analisa as partições, nunca a tabela pai
+            for particao in retention._particoes_existentes():
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(particao)}')
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [retention.TABELA])
+            self.assertEqual(cursor.fetchone()[0], -1)
+        self.assertEqual(estimar_linhas(EstatisticaVisualizacao.objects.all()), 30)
+
+
+class UserAgentTests(TestCase):
+    def test_classificacao(self):
+        iphone = 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Version/17.0 Mobile/15E148 Safari/604.1'
+        self.assertEqual(
+            analisar_user_agent(iphone),
+            {'dispositivo': 'mobile', 'navegador': 'Safari', 'sistema_operacional': 'iOS'}
+        )
+        self.assertEqual(analisar_user_agent('Googlebot/2.1')['dispositivo'], 'bot')
+        self.assertEqual(analisar_user_agent(None)['dispositivo'], 'bot')
+
+    def test_resultado_em_cache_nao_e_compartilhado(self):
+        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36'
+        analisar_user_agent(user_agent)['dispositivo'] = 'alterado'
+        self.assertEqual(analisar_user_agent(user_agent)['dispositivo'], 'desktop')
+
+    def test_dimensao_deduplica_por_hash(self):
+        user_agent = 'Mozilla/5.0 (X11; Linux x86_64) Firefox/121.0'
+        # O cache de ids é do processo e sobreviveria ao rollback do teste
+        AgenteUsuario._cache_ids.clear()
+        self.addCleanup(AgenteUsuario._cache_ids.clear)
+        primeiro = AgenteUsuario.get_id_para(user_agent)
+        AgenteUsuario._cache_ids.clear()
+        self.assertEqual(AgenteUsuario.get_id_para(user_agent), primeiro)
+        self.assertEqual(AgenteUsuario.objects.get(pk=primeiro).navegador, 'Firefox')
+        self.assertIsNone(AgenteUsuario.get_id_para(''))
+
+
+class CacheVersionadoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidar_troca_apenas_as_chaves_do_grupo(self):
+        postagens = chave_versionada('lista', ('postagens',))
+        videos = chave_versionada('lista', ('videos',))
+        invalidar('postagens')
+        self.assertNotEqual(chave_versionada('lista', ('postagens',)), postagens)
+        self.assertEqual(chave_versionada('lista', ('videos',)), videos)
+
+    def test_sitemap_e_feed_mudam_na_publicacao(self):
+        Postagem.objects.create(titulo='Primeira', conteudo='<p>a</p>', status='publicado')
+        resposta = self.client.get('/sitemap.xml')
+        etag = resposta['ETag']
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        segunda = Postagem.objects.create(titulo='Segunda', conteudo='<p>b</p>', status='publicado')
+        resposta = self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn(f'/postagens/{segunda.pk}/', resposta.content.decode())
+        self.assertIn('Segunda', self.client.get('/feeds/postagens/').content.decode())
+
+    def test_gzip_respeita_qualidade_zero(self):
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING='gzip, br')['Content-Encoding'], 'gzip')
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING='*;q=0.5')['Content-Encoding'], 'gzip')
+        for cabecalho in ('gzip;q=0', 'br, gzip; q=0.0', '*;q=0', 'identity'):
+            with self.subTest(cabecalho=cabecalho):
+                resposta = self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING=cabecalho)
+                self.assertNotIn('Content-Encoding', resposta)
+                self.assertIn(b'<urlset', resposta.content)
+
+    def test_if_none_match_curinga_e_etag_fraco(self):
+        etag = self.client.get('/sitemap.xml')['ETag']
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=f'"x", W/{etag}').status_code, 304)
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH='"x"').status_code, 200)
+
+    def test_rascunho_fica_fora_do_feed(self):
+        Postagem.objects.create(titulo='Rascunho secreto', conteudo='<p>a</p>')
+        self.assertNotIn('Rascunho secreto', self.client.get('/feeds/postagens/').content.decode())
+
+
+class DocumentosLegaisTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        config = ConfiguracaoSite.get_config()
+        config.termos_uso = '<p>Termos versão 1</p>'
+        config.save()
+
+    def test_pagina_renderizada_a_cada_requisicao_com_documento_em_cache(self):
+        resposta = self.client.get('/termos/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, 'Termos versão 1')
+        self.assertNotIn('ETag', resposta)
+
+        config = ConfiguracaoSite.get_config()
+        config.termos_uso = '<p>Termos versão 2</p>'
+        config.save()
+        self.assertContains(self.client.get('/termos/'), 'Termos versão 2')
+
+    def test_fragmento_responde_304_ao_etag_e_muda_com_a_configuracao(self):
+        resposta = self.client.get('/termos/fragmento/')
+        self.assertContains(resposta, 'Termos versão 1')
+        self.assertNotContains(resposta, '<html')
+        etag = resposta['ETag']
+        self.assertEqual(self.client.get('/termos/fragmento/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        config = ConfiguracaoSite.get_config()
+        config.termos_uso = '<p>Termos versão 2</p>'
+        config.save()
+        resposta = self.client.get('/termos/fragmento/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, 'Termos versão 2')
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_documento_vazio_mostra_o_aviso(self):
+        self.assertContains(self.client.get('/privacidade/fragmento/'), 'ainda não foi configurada')
+
+
+@override_settings(INSTRUMENTACAO_SERVER_TIMING=True)
+class InstrumentacaoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_conta_as_consultas_da_view(self):
+        Postagem.objects.create(titulo='Primeira', conteudo='<p>a</p>', status='publicado')
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get('/postagens/')
+        metricas = dict(parte.split(';', 1) for parte in resposta['Server-Timing'].split(', '))
+        self.assertEqual(list(metricas), ['db', 'tpl', 'total'])
+        self.assertIn(f'desc="{len(consultas)} consultas"', metricas['db'])
+
+    def test_server_timing_em_view_assincrona(self):
+        self.assertRegex(self.client.get('/')['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* consultas", tpl;dur=')
+
+    def test_spans_em_arquivo_continuam_o_trace_do_chamador(self):
+        caminho = tempfile.mktemp(suffix='.jsonl')
+        self.addCleanup(lambda: os.path.exists(caminho) and os.remove(caminho))
+        trace_id, span_pai = 'a' * 32, 'b' * 16
+        with override_settings(INSTRUMENTACAO_SERVER_TIMING=False, INSTRUMENTACAO_SPANS_ARQUIVO=caminho):
+            self.client.get('/postagens/', HTTP_TRACEPARENT=f'00-{trace_id}-{span_pai}-01')
+
+        with open(caminho, encoding='utf-8') as arquivo:
+            (linha,) = arquivo.readlines()
+        spans = json.loads(linha)['resourceSpans'][0]['scopeSpans'][0]['spans']
+        raiz = next(span for span in spans if span['parentSpanId'] == span_pai)
+        self.assertEqual(raiz['name'], 'GET postagens/')
+        self.assertEqual({span['traceId'] for span in spans}, {trace_id})
+        self.assertIn('db', {span['name'] for span in spans})
+        self.assertIn({'key': 'http.status_code', 'value': {'intValue': '200'}}, raiz['attributes'])
+
+
+class PipelineEstaticosTests(TestCase):
+    def test_collectstatic_gera_nomes_com_hash_e_versoes_compactadas(self):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from django.core.management import call_command
+        from django.templatetags.static import static
+
+        destino = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destino, ignore_errors=True)
+        with override_settings(STATIC_ROOT=destino), mock.patch('sys.stdout', new_callable=io.StringIO) as saida:
+            # Só os estáticos do site: admin e CKEditor deixariam o teste lento
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin', 'ckeditor*'])
+
+            with open(os.path.join(destino, 'staticfiles.json'), encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)['paths']
+            bundle = manifesto['core/css/bundle.css']
+            self.assertRegex(bundle, r'^core/css/bundle\.[0-9a-f]{12}\.css$')
+            self.assertEqual(static('core/css/bundle.css'), f'/static/{bundle}')
+            self.assertEqual(staticfiles_storage.stored_name('core/js/youtube_leve.js'), manifesto['core/js/youtube_leve.js'])
+
+            caminho = os.path.join(destino, bundle)
+            with open(caminho, 'rb') as original, gzip.open(caminho + '.gz') as compactado:
+                conteudo = original.read()
+                self.assertEqual(compactado.read(), conteudo)
+            # Minificado: sem comentários nem quebras de linha dentro das folhas de estilo
+            self.assertNotIn(b'/*', conteudo)
+            self.assertLessEqual(conteudo.count(b'\n'), len(static_pipeline.CSS_BUNDLES['core/css/bundle.css']))
+        self.assertIn('bundle.', saida.getvalue())
+        self.assertIn('minificado', saida.getvalue())
+
+
+class BeaconsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(AgenteUsuario._cache_ids.clear)
+
+    def _requisicao(self, remote_addr='10.0.0.1', encaminhado=None):
+        extras = {'REMOTE_ADDR': remote_addr}
+        if encaminhado is not None:
+            extras['HTTP_X_FORWARDED_FOR'] = encaminhado
+        return RequestFactory().post('/api/track-view/', **extras)
+
+    def test_ip_do_proxy_confiavel_e_nao_o_enviado_pelo_cliente(self):
+        with override_settings(PROXIES_CONFIAVEIS=1):
+            self.assertEqual(beacons.ip_do_cliente(self._requisicao(encaminhado='1.2.3.4, 200.1.1.1')), '200.1.1.1')
+            self.assertEqual(beacons.ip_do_cliente(self._requisicao(encaminhado='1.2.3.4, lixo')), '10.0.0.1')
+            self.assertEqual(beacons.ip_do_cliente(self._requisicao()), '10.0.0.1')
+        with override_settings(PROXIES_CONFIAVEIS=2):
+            self.assertEqual(beacons.ip_do_cliente(self._requisicao(encaminhado='1.2.3.4, 200.1.1.1, 10.0.0.9')), '200.1.1.1')
+            self.assertEqual(beacons.ip_do_cliente(self._requisicao(encaminhado='200.1.1.1')), '10.0.0.1')
+        with override_settings(PROXIES_CONFIAVEIS=0):
+            self.assertEqual(beacons.ip_do_cliente(self._requisicao(encaminhado='1.2.3.4')), '10.0.0.1')
+
+    @override_settings(PROXIES_CONFIAVEIS=1, RASTREAMENTO_RAJADA_IP=3, RASTREAMENTO_LIMITE_IP=1,
+                       RASTREAMENTO_RAJADA_VISITANTE=100, RASTREAMENTO_LIMITE_VISITANTE=100)
+    def test_trocar_o_x_forwarded_for_nao_contorna_o_limite(self):
+        permitidos = [
+            beacons.permitir(None, beacons.ip_do_cliente(self._requisicao(encaminhado=f'1.2.3.{i}, 200.1.1.1')))
+            for i in range(5)
+        ]
+        self.assertEqual(permitidos, [True, True, True, False, False])
+
+    def test_metricas_que_nao_aumentaram_sao_descartadas(self):
+        metrica = beacons.normalizar({'tipo_conteudo': 'postagem', 'conteudo_id': '3', 'tempo_visualizacao': 10, 'scroll_profundidade': 150})
+        self.assertEqual(metrica['scroll_profundidade'], 100)
+        self.assertTrue(beacons.atualizacao_nova('s1', metrica))
+        # Sem lembrar_envio (gravação que falhou) o reenvio continua valendo
+        self.assertTrue(beacons.atualizacao_nova('s1', metrica))
+        beacons.lembrar_envio('s1', metrica)
+        self.assertFalse(beacons.atualizacao_nova('s1', metrica))
+        self.assertTrue(beacons.atualizacao_nova('s1', {**metrica, 'tempo_visualizacao': 20}))
+        with self.assertRaises(ValueError):
+            beacons.normalizar({'tipo_conteudo': 'outro'})
+
+    def test_linhas_duplicadas_da_mesma_pagina_nao_quebram_o_rastreamento(self):
+        navegador = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36'
+        self.client.post('/api/track-view/', json.dumps({'tipo_conteudo': 'home'}), content_type='application/json', HTTP_USER_AGENT=navegador)
+        sessao = self.client.session.session_key
+        # Linha criada por um envio simultâneo
+        criar_visualizacao(tipo='home', conteudo_id=None, sessao=sessao)
+
+        corpo = json.dumps({'tipo_conteudo': 'home', 'tempo_visualizacao': 30})
+        resposta = self.client.post('/api/track-view/', corpo, content_type='application/json', HTTP_USER_AGENT=navegador)
+        self.assertEqual(resposta.json()['registradas'], 1)
+        self.assertEqual(EstatisticaVisualizacao.objects.order_by('pk').first().tempo_visualizacao, 30)
+
+    def test_tempo_de_visualizacao_limitado(self):
+        metrica = beacons.normalizar({'tipo_conteudo': 'home', 'tempo_visualizacao': 10 ** 19})
+        self.assertEqual(metrica['tempo_visualizacao'], beacons.LIMITE_TEMPO_VISUALIZACAO)
+        self.assertEqual(beacons.normalizar({'tempo_visualizacao': -5})['tempo_visualizacao'], 0)
+
+        corpo = json.dumps({'tipo_conteudo': 'home', 'tempo_visualizacao': 10 ** 19})
+        resposta = self.client.post('/api/track-view/', corpo, content_type='application/json', HTTP_USER_AGENT='Mozilla/5.0 Firefox/120.0')
+        self.assertEqual(resposta.json()['registradas'], 1)
+        self.assertEqual(EstatisticaVisualizacao.objects.get().tempo_visualizacao, beacons.LIMITE_TEMPO_VISUALIZACAO)
+
+    def test_track_view(self):
+        navegador = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36'
+        corpo = json.dumps([
+            {'tipo_conteudo': 'postagem', 'conteudo_id': 1, 'tempo_visualizacao': 5},
+            {'tipo_conteudo': 'home'},
+        ])
+        resposta = self.client.post('/api/track-view/', corpo, content_type='application/json', HTTP_USER_AGENT=navegador)
+        self.assertEqual(resposta.json()['registradas'], 2)
+        resposta = self.client.post('/api/track-view/', corpo, content_type='application/json', HTTP_USER_AGENT=navegador)
+        self.assertEqual(resposta.json()['descartadas'], 2)
+        robo = self.client.post('/api/track-view/', corpo, content_type='application/json', HTTP_USER_AGENT='Googlebot/2.1')
+        self.assertEqual(robo.json()['status'], 'ignored')
+        self.assertEqual(EstatisticaVisualizacao.objects.count(), 2)
+        self.assertEqual(EstatisticaVisualizacao.objects.first().ip_address, '127.0.0.1')
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimativa_uniao_e_serializacao(self):
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(30000):
+            a.adicionar(f'sessao-{i}')
+        for i in range(20000, 50000):
+            b.adicionar(f'sessao-{i}')
+        self.assertAlmostEqual(len(a), 30000, delta=30000 * 0.03)
+
+        uniao = HyperLogLog.desserializar(a.serializar())
+        uniao.mesclar_serializado(b.serializar())
+        self.assertAlmostEqual(len(uniao), 50000, delta=50000 * 0.03)
+
+    def test_esboco_pequeno_e_exato(self):
+        esboco = HyperLogLog()
+        for sessao in ['a', 'b', 'c', 'a']:
+            esboco.adicionar(sessao)
+        self.assertEqual(len(HyperLogLog.desserializar(esboco.serializar())), 3)
+
+
+class ConsolidacaoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ontem = timezone.localdate() - timedelta(days=1)
+
+    def _visualizacoes_de_ontem(self):
+        criar_visualizacao(1, tipo='postagem', conteudo_id=1, sessao='s1', tempo_visualizacao=10)
+        criar_visualizacao(1, tipo='postagem', conteudo_id=2, sessao='s1', tempo_visualizacao=30)
+        criar_visualizacao(1, tipo='postagem', conteudo_id=1, sessao='s2')
+        criar_visualizacao(1, tipo='home', conteudo_id=None, sessao='s3')
+
+    def test_resumos_por_conteudo_tipo_e_site(self):
+        self._visualizacoes_de_ontem()
+        self.assertEqual(estatisticas.consolidar(), 1)
+
+        resumos = {(r.tipo_conteudo, r.conteudo_id): r for r in ResumoDiario.objects.filter(dia=self.ontem)}
+        self.assertEqual(set(resumos), {('site', None), ('home', None), ('postagem', None), ('postagem', 1), ('postagem', 2)})
+        self.assertEqual(resumos[('site', None)].visualizacoes, 4)
+        self.assertEqual(resumos[('postagem', None)].sessoes, 2)
+        self.assertEqual(resumos[('postagem', None)].tempo_total, 40)
+        self.assertEqual(resumos[('postagem', None)].visualizacoes_com_tempo, 2)
+        self.assertEqual(resumos[('postagem', 1)].visualizacoes_com_tempo, 1)
+        self.assertEqual(estatisticas.contar_unicos('postagem', 1), 2)
+        self.assertEqual(estatisticas.contar_unicos('site'), 3)
+
+    def test_dia_ja_removido_pela_retencao_mantem_os_resumos(self):
+        self._visualizacoes_de_ontem()
+        estatisticas.consolidar()
+        EstatisticaVisualizacao.objects.filter(conteudo_id=1).delete()
+
+        with self.assertLogs('core.estatisticas', 'WARNING'):
+            self.assertIsNone(estatisticas.consolidar_dia(self.ontem))
+        self.assertEqual(ResumoDiario.objects.get(dia=self.ontem, tipo_conteudo='site').visualizacoes, 4)
+
+        EstatisticaVisualizacao.objects.all().delete()
+        with self.assertLogs('core.estatisticas', 'WARNING'):
+            estatisticas.consolidar(desde=self.ontem)
+        self.assertEqual(ResumoDiario.objects.filter(dia=self.ontem).count(), 5)
+        self.assertEqual(estatisticas.contar_unicos('postagem', 1), 2)
+
+    def test_metricas_que_chegam_depois_atualizam_o_dia(self):
+        self._visualizacoes_de_ontem()
+        estatisticas.consolidar()
+        criar_visualizacao(1, tipo='video', conteudo_id=7, sessao='s4')
+        estatisticas.consolidar()
+        self.assertEqual(ResumoDiario.objects.get(dia=self.ontem, tipo_conteudo='site').visualizacoes, 5)
+
+
+class PaginadorEstimadoTests(TestCase):
+    def setUp(self):
+        for i in range(30):
+            criar_visualizacao(sessao=f's{i}', ip_address='10.0.0.1' if i < 5 else '10.0.0.2')
+
+    @override_settings(ADMIN_CONTAGEM_ESTIMADA_LIMITE=10)
+    def test_contagem_exata_fora_do_postgresql_ou_abaixo_do_limite(self):
+        filtradas = EstatisticaVisualizacao.objects.filter(ip_address='10.0.0.1')
+        self.assertEqual(PaginadorEstimado(filtradas.order_by('pk'), 10).count, 5)
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(estimar_linhas(EstatisticaVisualizacao.objects.all()))
+            self.assertEqual(PaginadorEstimado(EstatisticaVisualizacao.objects.order_by('pk'), 10).count, 30)
+
+    @override_settings(ADMIN_CONTAGEM_ESTIMADA_LIMITE=10)
+    def test_estimativa_acima_do_total_volta_para_a_contagem_exata(self):
+        from django.core.paginator import EmptyPage
+        from core import paginacao
+
+        with mock.patch.object(paginacao, 'estimar_linhas', return_value=100):
+            paginador = PaginadorEstimado(EstatisticaVisualizacao.objects.order_by('pk'), 10)
+            self.assertEqual(paginador.num_pages, 10)
+            self.assertEqual(len(paginador.page(3).object_list), 10)
+            self.assertEqual(paginador.num_pages, 10)
+            with self.assertRaises(EmptyPage):
+                paginador.page(7)
+            self.assertEqual(paginador.count, 30)
+            self.assertEqual(paginador.num_pages, 3)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Estimativa do planner apenas no PostgreSQL')
+    @override_settings(ADMIN_CONTAGEM_ESTIMADA_LIMITE=10)
+    def test_estimativa_do_planner_acima_do_limite(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {EstatisticaVisualizacao._meta.db_table}')
+        EstatisticaVisualizacao.objects.filter(session_key='s0').delete()
+        # reltuples ainda reflete o ANALYZE: a contagem vem da estimativa, não do COUNT(*)
+        self.assertEqual(PaginadorEstimado(EstatisticaVisualizacao.objects.order_by('pk'), 10).count, 30)
+        self.assertIsNone(estimar_linhas(EstatisticaVisualizacao.objects.filter(pk__in=[])))
+
+    def test_changelist_do_admin(self):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        resposta = self.client.get('/admin/core/estatisticavisualizacao/', {'q': '10.0.0.1'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['cl'].result_count, 5)
+        self.assertEqual(self.client.get('/admin/core/estatisticavisualizacao/', {'periodo': 'lixo'}).status_code, 302)
+
+
+class AgendamentoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _postagem(self, titulo, dias, status='publicado'):
+        return Postagem.objects.create(
+            titulo=titulo, conteudo='<p>x</p>', status=status,
+            data_publicacao=timezone.now() + timedelta(days=dias)
+        )
+
+    def test_data_futura_fica_agendada_e_fora_das_publicadas(self):
+        futura = self._postagem('Futura', 2)
+        atual = self._postagem('Atual', -1)
+        self.assertEqual(futura.status, 'agendado')
+        self.assertEqual(list(Postagem.objects.publicadas()), [atual])
+        self.assertEqual(agendamento.proxima_publicacao(), futura.data_publicacao)
+
+    def test_publica_apenas_as_vencidas(self):
+        vencida = self._postagem('Vencida', 1)
+        self._postagem('Futura', 3)
+        publicadas = agendamento.publicar_vencidas(agora=timezone.now() + timedelta(days=2))
+        self.assertEqual(publicadas, [(vencida.pk, 'Vencida')])
+        self.assertEqual(Postagem.objects.get(pk=vencida.pk).status, 'publicado')
+        self.assertEqual(Postagem.objects.agendadas().count(), 1)
+
+    def test_acao_do_admin_publica_apenas_a_selecao(self):
+        from django.contrib import admin
+        from django.contrib.auth.models import User
+        from django.contrib.messages.storage.cookie import CookieStorage
+
+        selecionada = self._postagem('Selecionada', 1)
+        outra = self._postagem('Outra', 1)
+        Postagem.objects.filter(pk=outra.pk).update(data_publicacao=timezone.now() - timedelta(minutes=1))
+
+        requisicao = RequestFactory().post('/admin/')
+        requisicao.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        requisicao._messages = CookieStorage(requisicao)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.site._registry[Postagem].agendar_para_hoje(requisicao, Postagem.objects.filter(pk=selecionada.pk))
+
+        self.assertEqual(Postagem.objects.get(pk=selecionada.pk).status, 'publicado')
+        # Vencida, mas fora da seleção: continua para o agendador
+        self.assertEqual(Postagem.objects.get(pk=outra.pk).status, 'agendado')
+
+
+class PublicacaoNaRequisicaoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        agendamento._proxima.esquecer()
+        self.addCleanup(agendamento._proxima.esquecer)
+
+    def test_primeira_requisicao_depois_da_data_publica(self):
+        postagem = Postagem.objects.create(
+            titulo='Agendada', conteudo='<p>x</p>', status='publicado',
+            data_publicacao=timezone.now() + timedelta(hours=1)
+        )
+        self.assertNotIn('Agendada', self.client.get('/feeds/postagens/').content.decode())
+
+        Postagem.objects.filter(pk=postagem.pk).update(data_publicacao=timezone.now() - timedelta(minutes=1))
+        agendamento._proxima.esquecer()
+        # A invalidação dos caches acontece no commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/robots.txt')
+        self.assertIn('Agendada', self.client.get('/feeds/postagens/').content.decode())
+        self.assertEqual(Postagem.objects.get(pk=postagem.pk).status, 'publicado')
+
+    def test_banco_consultado_apenas_a_cada_intervalo(self):
+        with mock.patch.object(agendamento, 'proxima_publicacao', return_value=None) as proxima:
+            for _ in range(3):
+                self.client.get('/robots.txt')
+            self.assertEqual(proxima.call_count, 1)
+            with mock.patch.object(agendamento, 'INTERVALO_VERIFICACAO', 0):
+                self.client.get('/robots.txt')
+            self.assertEqual(proxima.call_count, 2)
+
+
+class AcoesEmLoteTests(TestCase):
+    def setUp(self):
+        from django.contrib import admin
+        from django.contrib.auth.models import User
+        from django.contrib.messages.storage.cookie import CookieStorage
+
+        cache.clear()
+        self.requisicao = RequestFactory().post('/admin/')
+        self.requisicao.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.requisicao._messages = CookieStorage(self.requisicao)
+        self.admin = admin.site._registry[Postagem]
+        self.postagens = [
+            Postagem.objects.create(titulo=f'Postagem {i}', conteudo=f'<p>jogo de tabuleiro {i}</p>', categoria='dicas')
+            for i in range(4)
+        ]
+
+    def _executar(self, acao, queryset):
+        espiar_invalidacoes = mock.patch.object(signals, 'invalidar', wraps=signals.invalidar)
+        espiar_atualizacoes = mock.patch.object(relacionadas, 'atualizar_sem_erros')
+        with espiar_invalidacoes as invalidacoes, espiar_atualizacoes as atualizacoes, \
+                self.captureOnCommitCallbacks(execute=True):
+            acao(self.requisicao, queryset)
+        return invalidacoes, atualizacoes
+
+    def test_lotes_aninhados_disparam_um_evento(self):
+        with mock.patch.object(signals, 'invalidar') as invalidacoes, self.captureOnCommitCallbacks(execute=True):
+            with signals.em_lote() as externo:
+                externo.invalidar('videos')
+                with signals.em_lote() as interno:
+                    self.assertIs(interno, externo)
+                    interno.invalidar('postagens')
+                invalidacoes.assert_not_called()
+        invalidacoes.assert_called_once()
+        self.assertEqual(set(invalidacoes.call_args.args), {'videos', 'postagens'})
+
+    def test_publicar_em_massa_invalida_uma_vez(self):
+        invalidacoes, atualizacoes = self._executar(self.admin.publicar_postagens, Postagem.objects.all())
+        self.assertEqual(Postagem.objects.publicadas().count(), 4)
+        self.assertEqual(invalidacoes.call_count, 1)
+        atualizacoes.assert_called_once()
+        self.assertEqual(sorted(atualizacoes.call_args.args[0]), sorted(p.pk for p in self.postagens))
+
+    def test_duplicar_cria_rascunhos(self):
+        self._executar(self.admin.duplicar_postagem, Postagem.objects.all())
+        copias = Postagem.objects.filter(titulo__startswith='[CÓPIA]')
+        self.assertEqual(copias.count(), 4)
+        self.assertEqual(set(copias.values_list('status', flat=True)), {'rascunho'})
+
+    def test_excluir_em_massa_dispara_um_evento(self):
+        Postagem.objects.update(status='publicado')
+        invalidacoes, atualizacoes = self._executar(self.admin.delete_queryset, Postagem.objects.all())
+        self.assertFalse(Postagem.objects.exists())
+        self.assertEqual(invalidacoes.call_count, 1)
+        self.assertLessEqual(atualizacoes.call_count, 1)
+
+
+class EstatisticasEmLoteApiTests(TestCase):
+    url = '/api/postagens/stats/'
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        self.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        self.primeira = Postagem.objects.create(titulo='Primeira', conteudo='<p>x</p>', status='publicado', categoria='dicas')
+        self.segunda = Postagem.objects.create(titulo='Segunda', conteudo='<p>x</p>', status='publicado', categoria='resenhas')
+        criar_visualizacao(1, conteudo_id=self.primeira.pk, sessao='s1', tempo_visualizacao=20, scroll_profundidade=50)
+        criar_visualizacao(1, conteudo_id=self.primeira.pk, sessao='s2', tempo_visualizacao=40, scroll_profundidade=100)
+        criar_visualizacao(1, conteudo_id=self.primeira.pk, sessao='s1')
+
+    def test_somente_admin(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_parametros_invalidos(self):
+        self.client.force_login(self.admin)
+        for parametros in ({'inicio': 'ontem'}, {'ids': '1,a'}, {'serie': 'hora'}):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get(self.url, parametros).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'pagina': 5}).status_code, 404)
+
+    def test_metricas_de_cada_postagem(self):
+        self.client.force_login(self.admin)
+        resposta = self.client.get(self.url)
+        self.assertIn('private', resposta['Cache-Control'])
+
+        dados = resposta.json()
+        self.assertEqual(dados['total'], 2)
+        resultados = {postagem['pk']: postagem for postagem in dados['resultados']}
+        self.assertEqual(resultados[self.primeira.pk]['visualizacoes'], 3)
+        self.assertEqual(resultados[self.primeira.pk]['visitantes_unicos'], 2)
+        self.assertEqual(resultados[self.primeira.pk]['tempo_medio'], 30)
+        self.assertEqual(resultados[self.segunda.pk]['visualizacoes'], 0)
+
+    def test_dias_consolidados_vem_dos_resumos(self):
+        estatisticas.consolidar()
+        # Retenção: as linhas brutas de ontem saem do banco, os resumos ficam
+        EstatisticaVisualizacao.objects.all().delete()
+        criar_visualizacao(conteudo_id=self.primeira.pk, sessao='s3', tempo_visualizacao=60)
+        criar_visualizacao(conteudo_id=self.primeira.pk, sessao='s1')
+
+        self.client.force_login(self.admin)
+        dados = self.client.get(self.url, {'ids': self.primeira.pk, 'serie': 'dia'}).json()
+        metricas = dados['resultados'][0]
+        self.assertEqual(metricas['visualizacoes'], 5)
+        self.assertEqual(metricas['visitantes_unicos'], 3)
+        # Só as visualizações com tempo entram na média, também nos dias consolidados
+        self.assertEqual(metricas['tempo_medio'], 40)
+        self.assertEqual([(ponto['visualizacoes'], ponto['visitantes_unicos']) for ponto in metricas['serie']], [(3, 2), (2, 2)])
+
+    def test_filtros_e_serie(self):
+        self.client.force_login(self.admin)
+        dados = self.client.get(self.url, {'categoria': 'dicas', 'serie': 'dia', 'por_pagina': 1}).json()
+        self.assertEqual([postagem['pk'] for postagem in dados['resultados']], [self.primeira.pk])
+        self.assertIsNotNone(dados['inicio'])
+        serie = dados['resultados'][0]['serie']
+        self.assertEqual(serie, [{
+            'periodo': (timezone.localdate() - timedelta(days=1)).isoformat(),
+            'visualizacoes': 3,
+            'visitantes_unicos': 2,
+        }])
+
+        dados = self.client.get(self.url, {'ids': f'{self.segunda.pk}'}).json()
+        self.assertEqual([postagem['pk'] for postagem in dados['resultados']], [self.segunda.pk])
+
+
+class PainelEstatisticasTests(TestCase):
+    url = '/api/estatisticas/painel/'
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        self.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        self.ontem = timezone.localdate() - timedelta(days=1)
+        self.postagem = Postagem.objects.create(titulo='Mais vista', conteudo='<p>x</p>', status='publicado')
+        criar_visualizacao(1, conteudo_id=self.postagem.pk, sessao='s1', tempo_visualizacao=20, scroll_profundidade=40)
+        criar_visualizacao(1, conteudo_id=self.postagem.pk, sessao='s2', tempo_visualizacao=40, scroll_profundidade=80)
+        criar_visualizacao(1, tipo='home', conteudo_id=None, sessao='s1')
+        criar_visualizacao(1, tipo='video', conteudo_id=7, sessao='s3')
+        estatisticas.consolidar()
+
+    def test_somente_admin(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get('/admin/estatisticas/').status_code, 302)
+
+    def test_parametros_invalidos(self):
+        self.client.force_login(self.admin)
+        for parametros in ({'fim': '2024-13-01'}, {'inicio': '2024-02-01', 'fim': '2024-01-01'}, {'granularidade': 'hora'}):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get(self.url, parametros).status_code, 400)
+
+    def test_dados_dos_resumos(self):
+        self.client.force_login(self.admin)
+        dados = self.client.get(self.url).json()
+
+        self.assertEqual(dados['fim'], self.ontem.isoformat())
+        self.assertEqual(dados['granularidade'], 'dia')
+        self.assertEqual(len(dados['serie']), 90)
+        self.assertEqual(dados['serie'][-1], {'periodo': self.ontem.isoformat(), 'home': 1, 'postagem': 2, 'video': 1})
+        self.assertEqual(sum(ponto['postagem'] for ponto in dados['serie']), 2)
+        self.assertEqual(dados['tendencias'][-1]['visualizacoes'], 4)
+        self.assertEqual(dados['divisao']['postagem'], {'visualizacoes': 2, 'percentual': 50.0})
+        self.assertEqual(dados['top_postagens'], [{
+            'pk': self.postagem.pk, 'titulo': 'Mais vista', 'visualizacoes': 2, 'tempo_medio': 30, 'scroll_medio': 60,
+        }])
+
+    def test_granularidade_automatica(self):
+        self.client.force_login(self.admin)
+        inicio = self.ontem - timedelta(days=365)
+        dados = self.client.get(self.url, {'inicio': inicio.isoformat()}).json()
+        self.assertEqual(dados['granularidade'], 'semana')
+        self.assertEqual(sum(ponto['video'] for ponto in dados['serie']), 1)
+
+        dados = self.client.get(self.url, {'inicio': inicio.isoformat(), 'granularidade': 'mes'}).json()
+        self.assertEqual(dados['serie'][0]['periodo'], inicio.replace(day=1).isoformat())
+
+    def test_pagina_do_admin(self):
+        self.client.force_login(self.admin)
+        resposta = self.client.get('/admin/estatisticas/', {'inicio': 'x'})
+        self.assertContains(resposta, 'id="painel-estatisticas"')
+        self.assertContains(resposta, f'fim={self.ontem.isoformat()}')
+
+
+@override_settings(RANKING_JANELA_DIAS=30, RANKING_MEIA_VIDA_DIAS=7, RANKING_TAMANHO=10)
+class RankingTests(TestCase):
+    def _postagem(self, titulo, status='publicado', **campos):
+        return Postagem.objects.create(titulo=titulo, conteudo='<p>x</p>', status=status, **campos)
+
+    def _sessoes(self, postagem, quantidade, dias_atras=0, **campos):
+        for i in range(quantidade):
+            criar_visualizacao(dias_atras, conteudo_id=postagem.pk, sessao=f'{postagem.pk}-{dias_atras}-{i}', **campos)
+
+    def _lista(self, lista):
+        return list(RankingPostagem.objects.filter(lista=lista).order_by('posicao').values_list('postagem__titulo', flat=True))
+
+    def test_decaimento_favorece_as_visualizacoes_recentes(self):
+        antiga = self._postagem('Antiga')
+        recente = self._postagem('Recente')
+        self._sessoes(antiga, 3, dias_atras=20)
+        self._sessoes(recente, 2)
+
+        resultado = ranking.calcular_ranking(agora=timezone.now())
+
+        self.assertEqual(resultado['postagens'], 2)
+        self.assertEqual(self._lista('mais_lidos'), ['Antiga', 'Recente'])
+        self.assertEqual(self._lista('em_alta'), ['Recente', 'Antiga'])
+        # Faixa de hoje (ponto médio de meio dia), sem tempo nem scroll: qualidade 0,5
+        entrada = RankingPostagem.objects.get(lista='em_alta', postagem=recente)
+        self.assertAlmostEqual(entrada.pontuacao, round(0.5 * 2 * 0.5 ** (0.5 / 7), 4))
+
+    def test_qualidade_da_leitura_pondera_a_pontuacao(self):
+        bem_lida = self._postagem('Bem lida')
+        abandonada = self._postagem('Abandonada')
+        self._sessoes(bem_lida, 2, tempo_visualizacao=ranking.TEMPO_REFERENCIA, scroll_profundidade=100)
+        self._sessoes(abandonada, 2)
+
+        ranking.calcular_ranking(agora=timezone.now())
+
+        pontuacoes = dict(RankingPostagem.objects.filter(lista='em_alta').values_list('postagem__titulo', 'pontuacao'))
+        self.assertAlmostEqual(pontuacoes['Bem lida'], 2 * pontuacoes['Abandonada'], places=3)
+        self.assertEqual(ranking._qualidade(10 * ranking.TEMPO_REFERENCIA, 150), 1)
+
+    def test_postagens_nao_publicadas_ficam_de_fora(self):
+        publicada = self._postagem('Publicada')
+        rascunho = self._postagem('Rascunho', status='rascunho')
+        agendada = self._postagem('Agendada', data_publicacao=timezone.now() + timedelta(days=1))
+        for postagem in (publicada, rascunho, agendada):
+            self._sessoes(postagem, 2)
+
+        ranking.calcular_ranking(agora=timezone.now())
+
+        self.assertEqual(self._lista('em_alta'), ['Publicada'])
+        self.assertEqual([p.titulo for p in ranking.top_postagens('mais_lidos', 5)], ['Publicada'])
+
+    def test_substituicao_atomica(self):
+        postagem = self._postagem('Lida')
+        self._sessoes(postagem, 1)
+        ranking.calcular_ranking(agora=timezone.now())
+        anterior = list(RankingPostagem.objects.values_list('pk', flat=True))
+
+        with mock.patch.object(RankingPostagem.objects, 'bulk_create', side_effect=RuntimeError('falhou')):
+            with self.assertRaises(RuntimeError):
+                ranking.calcular_ranking(agora=timezone.now())
+        # A falha desfaz a exclusão: a home continua com o ranking anterior
+        self.assertEqual(list(RankingPostagem.objects.values_list('pk', flat=True)), anterior)
+
+        self._sessoes(self._postagem('Nova'), 3)
+        ranking.calcular_ranking(agora=timezone.now())
+        self.assertEqual(self._lista('mais_lidos'), ['Nova', 'Lida'])
+        self.assertEqual(RankingPostagem.objects.count(), 4)
+
+
+@override_settings(RANKING_JANELA_DIAS=30, RANKING_MEIA_VIDA_DIAS=7, RANKING_TAMANHO=10)
+class HomeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        agora = timezone.now()
+        self.postagens = [
+            Postagem.objects.create(
+                titulo=f'Postagem {i}', conteudo='<p>x</p>', status='publicado',
+                data_publicacao=agora - timedelta(hours=i),
+            )
+            for i in range(8)
+        ]
+
+    def _titulos(self, resposta, chave):
+        return [postagem.titulo for postagem in resposta.context[chave]]
+
+    def test_sem_ranking_mostra_as_mais_recentes(self):
+        resposta = self.client.get('/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(self._titulos(resposta, 'postagens_destaque'), [f'Postagem {i}' for i in range(6)])
+        self.assertEqual(resposta.context['mais_lidos'], [])
+
+    def test_ranking_vem_primeiro_e_e_completado_pelas_recentes(self):
+        for quantidade, postagem in ((3, self.postagens[7]), (2, self.postagens[5])):
+            for i in range(quantidade):
+                criar_visualizacao(conteudo_id=postagem.pk, sessao=f'{postagem.pk}-{i}')
+        ranking.calcular_ranking(agora=timezone.now())
+
+        resposta = self.client.get('/')
+        self.assertEqual(
+            self._titulos(resposta, 'postagens_destaque'),
+            ['Postagem 7', 'Postagem 5', 'Postagem 0', 'Postagem 1', 'Postagem 2', 'Postagem 3'],
+        )
+        self.assertEqual(self._titulos(resposta, 'mais_lidos'), ['Postagem 7', 'Postagem 5'])
+        self.assertContains(resposta, 'Postagem 7')
+
+    def test_postagem_despublicada_sai_do_ranking_da_home(self):
+        criar_visualizacao(conteudo_id=self.postagens[7].pk)
+        ranking.calcular_ranking(agora=timezone.now())
+        Postagem.objects.filter(pk=self.postagens[7].pk).update(status='rascunho')
+
+        resposta = self.client.get('/')
+        self.assertNotIn('Postagem 7', self._titulos(resposta, 'postagens_destaque'))
+        self.assertEqual(len(resposta.context['postagens_destaque']), 6)
+        self.assertEqual(resposta.context['mais_lidos'], [])
+
+
+TEM_MATRIZES = all(importlib.util.find_spec(modulo) for modulo in ('numpy', 'scipy'))
+
+TEXTOS_RELACIONADAS = [
+    ('Catan estratégia de troca', 'dicas', 'catan troca recursos estrada cidade porto'),
+    ('Catan expansão marinheiros', 'reviews', 'catan marinheiros navio porto ilha'),
+    ('Gloomhaven campanha', 'reviews', 'gloomhaven campanha cartas monstros masmorra'),
+    ('Gloomhaven dicas de cartas', 'dicas', 'gloomhaven cartas iniciativa monstros'),
+    ('Azul azulejos', 'reviews', 'azul azulejos padrão parede pontos'),
+    ('Azul estratégia de pontos', 'dicas', 'azul pontos parede bônus coluna'),
+    ('Ticket to Ride rotas', 'reviews', 'trem rotas cartas cidade estrada'),
+    ('Wingspan pássaros', 'novidades', 'wingspan pássaros ovos cartas habitat'),
+]
+
+
+@override_settings(RELACIONADAS_QUANTIDADE=3, RELACIONADAS_BONUS_CATEGORIA=0.1)
+class RelacionadasTests(TestCase):
+    def setUp(self):
+        relacionadas._cache_termos.clear()
+        self.addCleanup(relacionadas._cache_termos.clear)
+        self.postagens = [
+            Postagem.objects.create(
+                titulo=titulo, categoria=categoria, status='publicado',
+                conteudo=f'<p>{texto}</p>', data_publicacao=timezone.now() - timedelta(days=1),
+            )
+            for titulo, categoria, texto in TEXTOS_RELACIONADAS
+        ]
+
+    def _vizinhos_python(self, corpus, indices):
+        # Sem o scipy importável, vizinhos() usa o índice invertido
+        with mock.patch.dict(sys.modules, {'scipy': None}):
+            return corpus.vizinhos(indices, 3, 0.1)
+
+    def _listas(self):
+        listas = {}
+        for postagem_id, relacionada_id in PostagemRelacionada.objects.order_by('postagem_id', 'posicao').values_list('postagem_id', 'relacionada_id'):
+            listas.setdefault(postagem_id, []).append(relacionada_id)
+        return listas
+
+    def test_vizinhos_pelo_texto_e_pela_categoria(self):
+        corpus = relacionadas.Corpus.carregar()
+        vizinhos = self._vizinhos_python(corpus, range(len(corpus.ids)))
+        primeiros = {corpus.ids[indice]: corpus.ids[lista[0][0]] for indice, lista in vizinhos.items()}
+        catan, expansao, gloomhaven, gloomhaven_dicas = (postagem.pk for postagem in self.postagens[:4])
+        self.assertEqual(primeiros[expansao], catan)
+        self.assertEqual(primeiros[gloomhaven], gloomhaven_dicas)
+        # "estratégia" e a mesma categoria (dicas) superam o tema em comum
+        self.assertEqual(primeiros[catan], self.postagens[5].pk)
+        self.assertNotIn(corpus.posicoes[catan], [outro for outro, _ in vizinhos[corpus.posicoes[catan]]])
+
+    @skipUnless(TEM_MATRIZES, 'Requer numpy e scipy')
+    def test_matriz_e_indice_invertido_dao_os_mesmos_vizinhos(self):
+        corpus = relacionadas.Corpus.carregar()
+        indices = list(range(len(corpus.ids)))
+        por_matriz = corpus.vizinhos(indices, 3, 0.1)
+        por_indice = self._vizinhos_python(corpus, indices)
+        self.assertEqual(set(por_matriz), set(por_indice))
+        for indice in indices:
+            self.assertEqual([outro for outro, _ in por_matriz[indice]], [outro for outro, _ in por_indice[indice]])
+            for (_, matriz), (_, python) in zip(por_matriz[indice], por_indice[indice]):
+                self.assertAlmostEqual(matriz, python, places=4)
+
+    @mock.patch.object(relacionadas, 'FRACAO_RECALCULO_COMPLETO', 0.25)
+    def test_atualizacao_incremental_ou_recalculo_completo(self):
+        relacionadas.recalcular()
+        completo = self._listas()
+
+        with mock.patch.object(relacionadas, '_gravar', wraps=relacionadas._gravar) as gravar:
+            relacionadas.atualizar([self.postagens[0].pk])
+        # Uma postagem de oito (abaixo de 25%): só as listas que ela pode alterar
+        afetadas = gravar.call_args.args[2]
+        self.assertIn(self.postagens[0].pk, afetadas)
+        self.assertLess(len(afetadas), len(self.postagens))
+        self.assertEqual(self._listas(), completo)
+
+        with mock.patch.object(relacionadas, '_gravar', wraps=relacionadas._gravar) as gravar:
+            relacionadas.atualizar([postagem.pk for postagem in self.postagens[:3]])
+        # Acima de FRACAO_RECALCULO_COMPLETO do corpus: todas as listas de uma vez
+        self.assertEqual(len(gravar.call_args.args), 2)
+        self.assertEqual(self._listas(), completo)
+
+
+def imagem_jpeg(largura, altura, faixas=0):
+    """JPEG com faixas pretas de altura `faixas` em cima e embaixo (como as thumbnails 4:3 do YouTube)"""
+    from io import BytesIO
+    from PIL import Image
+
+    imagem = Image.new('RGB', (largura, altura), 'black')
+    imagem.paste(Image.new('RGB', (largura, altura - 2 * faixas), 'white'), (0, faixas))
+    buffer = BytesIO()
+    imagem.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class ThumbnailsTests(TestCase):
+    def setUp(self):
+        self.armazenamento = FileSystemStorage(location=tempfile.mkdtemp(), base_url='/media/')
+        for alvo in ('core.thumbnails.default_storage', 'django.core.files.storage.default_storage'):
+            patcher = mock.patch(alvo, self.armazenamento)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.video = Video.objects.create(titulo='Review de Catan', youtube_id='abc123')
+
+    def _respostas(self, **conteudos):
+        """requests.get simulado: 404 para as fontes sem conteúdo"""
+        def get(url, timeout):
+            fonte = url.rsplit('/', 1)[1].removesuffix('.jpg')
+            conteudo = conteudos.get(fonte)
+            return mock.Mock(status_code=200 if conteudo else 404, content=conteudo or b'')
+        return mock.patch.object(thumbnails.requests, 'get', side_effect=get)
+
+    def test_usa_a_maior_fonte_disponivel(self):
+        with self._respostas(sddefault=imagem_jpeg(640, 480, faixas=60), hqdefault=imagem_jpeg(480, 360, faixas=45)) as get:
+            self.assertTrue(thumbnails.gerar_thumbnails(self.video))
+        self.assertEqual([chamada.args[0].rsplit('/', 1)[1] for chamada in get.call_args_list], ['maxresdefault.jpg', 'sddefault.jpg'])
+        self.assertEqual(sorted(self.video.thumbnails, key=int), ['320', '480', '640'])
+
+    def test_recorta_16_9_e_nao_amplia(self):
+        from PIL import Image
+
+        with self._respostas(hqdefault=imagem_jpeg(480, 360, faixas=45)):
+            thumbnails.gerar_thumbnails(self.video)
+        # A hq tem 480px: a largura de 640 não é gerada
+        self.assertEqual(sorted(self.video.thumbnails, key=int), ['320', '480'])
+        with self.armazenamento.open(self.video.thumbnails['480']) as arquivo:
+            imagem = Image.open(arquivo)
+            imagem.load()
+        self.assertEqual(imagem.size, (480, 270))
+        # Faixas pretas removidas: a borda superior é do conteúdo
+        self.assertGreater(min(imagem.convert('L').getpixel((240, 2)), imagem.convert('L').getpixel((240, 267))), 200)
+
+        self.assertFalse(thumbnails.gerar_thumbnails(self.video))
+
+    def test_sem_nenhuma_fonte(self):
+        with self._respostas(), self.assertLogs('core.thumbnails', 'WARNING'):
+            self.assertFalse(thumbnails.gerar_thumbnails(self.video))
+        self.assertEqual(Video.objects.get(pk=self.video.pk).thumbnails, {})
+
+    def test_template_tag_usa_o_cache_local_ou_o_youtube(self):
+        from django.template import Context, Template
+
+        template = Template('{% load youtube %}{% youtube_leve video %}')
+        html = template.render(Context({'video': self.video}))
+        self.assertIn('src="https://i.ytimg.com/vi/abc123/hqdefault.jpg"', html)
+        self.assertNotIn('srcset', html)
+        self.assertIn('youtube-nocookie.com/embed/abc123?autoplay=1', html)
+        self.assertIn('Review de Catan', html)
+
+        with self._respostas(maxresdefault=imagem_jpeg(1280, 720)):
+            thumbnails.gerar_thumbnails(self.video)
+        html = template.render(Context({'video': self.video}))
+        self.assertIn(f'src="/media/{self.video.thumbnails["320"]}"', html)
+        self.assertIn(f'/media/{self.video.thumbnails["640"]} 640w', html)
+
+        html = template.render(Context({'video': 'xyz789'}))
+        self.assertIn('src="https://i.ytimg.com/vi/xyz789/hqdefault.jpg"', html)
+        self.assertIn('Vídeo do YouTube', html)
+
+    def test_lista_de_videos_so_carrega_o_player_no_clique(self):
+        Video.objects.create(titulo='Review de Azul', youtube_id='xyz789')
+        html = self.client.get('/videos/').content.decode()
+
+        self.assertEqual(html.count('class="youtube-leve video-thumbnail"'), 2)
+        self.assertIn('data-embed="https://www.youtube-nocookie.com/embed/abc123?autoplay=1&amp;rel=0"', html)
+        self.assertIn('aria-label="Reproduzir: Review de Azul"', html)
+        self.assertNotIn('<iframe', html)
+        self.assertRegex(html, r'<script src="[^"]*youtube_leve[^"]*\.js" defer>')
@@ -0,0 +1,125 @@
+"""
+Cache local das thumbnails do YouTube
+Cada vídeo tem a thumbnail baixada uma única vez (na sincronização), na
+maior resolução disponível, recortada em 16:9 e gravada no storage como
+WebP em algumas larguras. Os nomes levam o hash da imagem, então o
+conteúdo de um nome nunca muda e os arquivos são servidos com cache imutável.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+import requests
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .instrumentation import medir
+
+logger = logging.getLogger(__name__)
+
+PASTA_THUMBNAILS = 'thumbnails'
+
+# Tamanhos publicados pelo YouTube, do maior para o menor; maxres e sd não
+# existem para todos os vídeos, hq sempre existe (480x360, com faixas pretas)
+FONTES = ('maxresdefault', 'sddefault', 'hqdefault')
+URL_FONTE = 'https://i.ytimg.com/vi/{youtube_id}/{fonte}.jpg'
+
+# Larguras dos cards de vídeo (mínimo de 320px na grade) em 1x e 2x
+LARGURAS_THUMBNAIL = (320, 480, 640)
+PROPORCAO = 16 / 9
+
+
+def baixar_original(youtube_id):
+    """
+    Baixa a maior thumbnail disponível do vídeo
+
+    Returns:
+        Tupla (bytes, fonte) ou None se nenhuma fonte respondeu
+    """
+    for fonte in FONTES:
+        url = URL_FONTE.format(youtube_id=youtube_id, fonte=fonte)
+        try:
+            with medir('yt', 'youtube.thumbnail'):
+                resposta = requests.get(url, timeout=10)
+        except requests.RequestException as e:
+            logger.warning(f'Erro ao baixar {url}: {e}')
+            continue
+        if resposta.status_code == 200 and resposta.content:
+            return resposta.content, fonte
+    return None
+
+
+def _recortar_16_9(imagem):
+    """Remove as faixas pretas de sd/hq (4:3) recortando o centro em 16:9"""
+    largura, altura = imagem.size
+    altura_util = round(largura / PROPORCAO)
+    if altura_util >= altura:
+        return imagem
+    topo = (altura - altura_util) // 2
+    return imagem.crop((0, topo, largura, topo + altura_util))
+
+
+def gerar_thumbnails(video, forcar=False):
+    """
+    Baixa e grava os derivados WebP da thumbnail de um vídeo
+
+    Args:
+        forcar: Gera de novo mesmo que o vídeo já tenha thumbnails
+
+    Returns:
+        True se as thumbnails foram geradas
+    """
+    if video.thumbnails and not forcar:
+        return False
+
+    original = baixar_original(video.youtube_id)
+    if original is None:
+        logger.warning(f'Nenhuma thumbnail disponível para o vídeo {video.youtube_id}')
+        return False
+    conteudo, fonte = original
+
+    imagem = _recortar_16_9(Image.open(BytesIO(conteudo)).convert('RGB'))
+    assinatura = hashlib.sha1(conteudo).hexdigest()[:10]
+
+    thumbnails = {}
+    for largura in LARGURAS_THUMBNAIL:
+        if largura > imagem.width:
+            break
+        nome = f'{PASTA_THUMBNAILS}/{video.youtube_id}-{assinatura}-{largura}w.webp'
+        if not default_storage.exists(nome):
+            redimensionada = imagem.resize((largura, round(largura / PROPORCAO)), Image.LANCZOS)
+            buffer = BytesIO()
+            redimensionada.save(buffer, 'WEBP', quality=80, method=6)
+            nome = default_storage.save(nome, ContentFile(buffer.getvalue()))
+        thumbnails[str(largura)] = nome
+
+    if not thumbnails:
+        return False
+    video.thumbnails = thumbnails
+    video.save(update_fields=['thumbnails'])
+    logger.info(f'Thumbnails do vídeo {video.youtube_id} geradas a partir de {fonte}')
+    return True
+
+
+def gerar_pendentes(videos=None, forcar=False):
+    """
+    Gera as thumbnails dos vídeos que ainda não as têm
+
+    Uma falha em um vídeo não interrompe os demais (a página usa a
+    thumbnail do YouTube enquanto a local não existir)
+
+    Returns:
+        Número de vídeos com thumbnails geradas
+    """
+    from .models import Video
+
+    if videos is None:
+        videos = Video.objects.all() if forcar else Video.objects.filter(thumbnails={})
+    geradas = 0
+    for video in videos:
+        try:
+            geradas += gerar_thumbnails(video, forcar=forcar)
+        except Exception as e:
+            logger.error(f'Erro ao gerar thumbnails do vídeo {video.youtube_id}: {e}')
+    return geradas
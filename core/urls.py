@@ -11,7 +11,25 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     
+    # Documentos legais (página e fragmento carregado pelos modais)
+    path('privacidade/', views.documento_legal, {'documento': 'privacidade'}, name='privacidade'),
+    path('privacidade/fragmento/', views.documento_legal, {'documento': 'privacidade', 'fragmento': True}, name='privacidade_fragmento'),
+    path('termos/', views.documento_legal, {'documento': 'termos'}, name='termos'),
+    path('termos/fragmento/', views.documento_legal, {'documento': 'termos', 'fragmento': True}, name='termos_fragmento'),
+    
+    # SEO e syndication
+    path('sitemap.xml', views.sitemap_xml, name='sitemap'),
+    path('robots.txt', views.robots_txt, name='robots'),
+    path('feeds/postagens/', views.feed_postagens, name='feed_postagens'),
+    path('feeds/postagens/atom/', views.feed_postagens, {'formato': 'atom'}, name='feed_postagens_atom'),
+    path('feeds/postagens/<slug:categoria>/', views.feed_postagens, name='feed_postagens_categoria'),
+    path('feeds/postagens/<slug:categoria>/atom/', views.feed_postagens, {'formato': 'atom'}, name='feed_postagens_categoria_atom'),
+    path('feeds/videos/', views.feed_videos, name='feed_videos'),
+    path('feeds/videos/atom/', views.feed_videos, {'formato': 'atom'}, name='feed_videos_atom'),
+    
     # API de rastreamento
     path('api/track-view/', views.track_view, name='track_view'),
     path('api/postagem/<int:pk>/stats/', views.get_postagem_stats, name='postagem_stats'),
+    path('api/postagens/stats/', views.get_postagens_stats, name='postagens_stats'),
+    path('api/estatisticas/painel/', views.get_painel_estatisticas, name='painel_estatisticas_api'),
 ]
@@ -0,0 +1,85 @@
+"""
+Análise de user agents
+Classifica a string do navegador em tipo de dispositivo, navegador e
+sistema operacional usando apenas expressões regulares (sem dependências)
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+
+# Robôs, crawlers e clientes automatizados
+_BOT = re.compile(
+    r'bot|crawl|spider|slurp|scrap|fetch|preview|monitor|curl|wget|python-requests|'
+    r'httpclient|okhttp|go-http|java/|axios|node-fetch|headless|lighthouse|pingdom|'
+    r'facebookexternalhit|whatsapp|telegram|discord|embedly|bingpreview|feed',
+    re.IGNORECASE
+)
+_TABLET = re.compile(r'ipad|tablet|kindle|silk|playbook|(android(?!.*mobile))', re.IGNORECASE)
+_MOBILE = re.compile(r'mobi|iphone|ipod|android.*mobile|windows phone|blackberry|opera mini|iemobile', re.IGNORECASE)
+
+# A ordem importa: vários navegadores também se anunciam como Chrome/Safari
+_NAVEGADORES = (
+    ('Edge', re.compile(r'edg(?:e|a|ios)?/', re.IGNORECASE)),
+    ('Opera', re.compile(r'opr/|opera', re.IGNORECASE)),
+    ('Samsung Internet', re.compile(r'samsungbrowser', re.IGNORECASE)),
+    ('Firefox', re.compile(r'firefox|fxios', re.IGNORECASE)),
+    ('Chrome', re.compile(r'chrome|crios|chromium', re.IGNORECASE)),
+    ('Safari', re.compile(r'safari', re.IGNORECASE)),
+    ('Internet Explorer', re.compile(r'msie|trident', re.IGNORECASE)),
+)
+
+_SISTEMAS = (
+    ('iOS', re.compile(r'iphone|ipad|ipod', re.IGNORECASE)),
+    ('Android', re.compile(r'android', re.IGNORECASE)),
+    ('Windows', re.compile(r'windows', re.IGNORECASE)),
+    ('macOS', re.compile(r'mac os x|macintosh', re.IGNORECASE)),
+    ('ChromeOS', re.compile(r'\bcros\b', re.IGNORECASE)),
+    ('Linux', re.compile(r'linux|x11', re.IGNORECASE)),
+)
+
+
+def hash_user_agent(user_agent):
+    """Retorna o hash SHA-1 (hex) usado como chave da dimensão de user agents"""
+    return hashlib.sha1(user_agent.encode('utf-8', 'replace')).hexdigest()
+
+
+def _primeiro(padroes, user_agent):
+    for nome, padrao in padroes:
+        if padrao.search(user_agent):
+            return nome
+    return ''
+
+
+@lru_cache(maxsize=1024)
+def _classificar(user_agent):
+    """(dispositivo, navegador, sistema_operacional); tupla imutável, segura para o cache"""
+    if not user_agent or _BOT.search(user_agent):
+        dispositivo = 'bot'
+    elif _TABLET.search(user_agent):
+        dispositivo = 'tablet'
+    elif _MOBILE.search(user_agent):
+        dispositivo = 'mobile'
+    elif user_agent.startswith('Mozilla/'):
+        dispositivo = 'desktop'
+    else:
+        dispositivo = 'outro'
+
+    navegador = '' if dispositivo == 'bot' else _primeiro(_NAVEGADORES, user_agent)
+    return dispositivo, navegador, _primeiro(_SISTEMAS, user_agent)
+
+
+def analisar_user_agent(user_agent):
+    """
+    Classifica um user agent
+
+    Returns:
+        Dicionário novo a cada chamada com dispositivo ('desktop', 'mobile',
+        'tablet', 'bot' ou 'outro'), navegador e sistema_operacional
+    """
+    dispositivo, navegador, sistema_operacional = _classificar(user_agent or '')
+    return {
+        'dispositivo': dispositivo,
+        'navegador': navegador,
+        'sistema_operacional': sistema_operacional,
+    }
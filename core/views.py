@@ -1,28 +1,67 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.views.generic import ListView, DetailView
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.urls import reverse
 from django.utils import timezone
+from asgiref.sync import sync_to_async
+import asyncio
 import json
-from .models import Postagem, Video, ConfiguracaoSite, EstatisticaVisualizacao
+from . import beacons
+from .cache_utils import servir_em_cache
+from .feeds import PostagemFeed, PostagemAtomFeed, VideoFeed, VideoAtomFeed
+from .models import Postagem, Video, ConfiguracaoSite, EstatisticaVisualizacao, AgenteUsuario
 
 
-def home(request):
-    """View da página inicial"""
-    postagens_destaque = Postagem.objects.filter(status='publicado').order_by('-data_publicacao')[:6]
-    videos_recentes = Video.objects.order_by('-data_publicacao')[:3]
-    config = ConfiguracaoSite.get_config()
+async def home(request):
+    """
+    View da página inicial
+    
+    Assíncrona: as consultas independentes e a chamada à API do YouTube
+    (inscritos) são disparadas juntas com asyncio.gather, sem prender um
+    worker enquanto a API responde
+    """
+    from .ranking import CAMPOS_PESADOS, atop_postagens
+    
+    async def destaques():
+        # Destaques vêm do ranking pré-calculado, completados pelas mais recentes
+        postagens = await atop_postagens('em_alta', 6)
+        if len(postagens) < 6:
+            campos = [campo.split('__', 1)[1] for campo in CAMPOS_PESADOS]
+            recentes = (
+                Postagem.objects.publicadas()
+                .exclude(pk__in=[postagem.pk for postagem in postagens])
+                .defer(*campos)
+                .order_by('-data_publicacao')[:6 - len(postagens)]
+            )
+            postagens += [postagem async for postagem in recentes]
+        return postagens
+    
+    async def videos():
+        return [video async for video in Video.objects.order_by('-data_publicacao')[:3]]
+    
+    async def configuracao():
+        config = await ConfiguracaoSite.aget_config()
+        return config, await config.aget_inscritos_display()
+    
+    postagens_destaque, mais_lidos, videos_recentes, (config, inscritos) = await asyncio.gather(
+        destaques(), atop_postagens('mais_lidos', 5), videos(), configuracao()
+    )
     
     context = {
         'postagens_destaque': postagens_destaque,
+        'mais_lidos': mais_lidos,
         'videos_recentes': videos_recentes,
         'config': config,
+        'inscritos': inscritos,
     }
-    return render(request, 'core/home.html', context)
+    # Context processors (usuário, site_config) consultam o banco: renderiza fora do event loop
+    return await sync_to_async(render)(request, 'core/home.html', context)
 
 
 class PostagemListView(ListView):
@@ -33,7 +72,7 @@ class PostagemListView(ListView):
     paginate_by = 9
     
     def get_queryset(self):
-        queryset = Postagem.objects.filter(status='publicado').order_by('-data_publicacao')
+        queryset = Postagem.objects.publicadas().order_by('-data_publicacao')
         categoria = self.request.GET.get('categoria')
         if categoria:
             queryset = queryset.filter(categoria=categoria)
@@ -52,7 +91,28 @@ class PostagemDetailView(DetailView):
     context_object_name = 'postagem'
     
     def get_queryset(self):
-        return Postagem.objects.filter(status='publicado')
+        # O HTML bruto só é carregado se o renderizado estiver desatualizado
+        return Postagem.objects.publicadas().defer('conteudo')
+    
+    def get_context_data(self, **kwargs):
+        from django.conf import settings
+        from .models import PostagemRelacionada
+        
+        context = super().get_context_data(**kwargs)
+        # Vizinhos pré-calculados (core/relacionadas.py): uma consulta pelo índice (postagem, posição)
+        context['relacionadas'] = [
+            relacao.relacionada for relacao in
+            PostagemRelacionada.objects
+            .filter(
+                postagem=self.object,
+                relacionada__status='publicado',
+                relacionada__data_publicacao__lte=timezone.now(),
+            )
+            .select_related('relacionada')
+            .defer('relacionada__conteudo', 'relacionada__conteudo_renderizado')
+            [:settings.RELACIONADAS_EXIBIDAS]
+        ]
+        return context
 
 
 class VideoListView(ListView):
@@ -92,70 +152,418 @@ def logout_view(request):
     return redirect('core:home')
 
 
+# Máximo de métricas aceitas em um único lote
+MAX_ITENS_RASTREAMENTO = 20
+
+
+async def _registrar_visualizacao(session_key, metrica, ip_address, agente_id):
+    """
+    Cria ou atualiza a estatística de uma página para a sessão atual
+    
+    Returns:
+        False se o registro já tinha tempo e scroll iguais ou maiores
+    """
+    # Sem restrição de unicidade (a tabela particionada exigiria a data na
+    # chave), um beacon e um heartbeat simultâneos podem criar duas linhas;
+    # as seguintes passam a atualizar sempre a mais antiga
+    stats = await EstatisticaVisualizacao.objects.filter(
+        session_key=session_key,
+        tipo_conteudo=metrica['tipo_conteudo'],
+        conteudo_id=metrica['conteudo_id'],
+    ).order_by('pk').afirst()
+    created = stats is None
+    if created:
+        stats = await EstatisticaVisualizacao.objects.acreate(
+            session_key=session_key,
+            tipo_conteudo=metrica['tipo_conteudo'],
+            conteudo_id=metrica['conteudo_id'],
+            conteudo_titulo=metrica['conteudo_titulo'],
+            ip_address=ip_address,
+            agente_id=agente_id,
+        )
+    
+    # As métricas só crescem (o cache de envios pode ter sido despejado)
+    if (not created
+            and metrica['tempo_visualizacao'] <= stats.tempo_visualizacao
+            and metrica['scroll_profundidade'] <= stats.scroll_profundidade):
+        return False
+    
+    # Atualizar métricas
+    stats.tempo_visualizacao = max(stats.tempo_visualizacao, metrica['tempo_visualizacao'])
+    stats.scroll_profundidade = max(stats.scroll_profundidade, metrica['scroll_profundidade'])
+    stats.data_saida = timezone.now()
+    await stats.asave(update_fields=['tempo_visualizacao', 'scroll_profundidade', 'data_saida'])
+    return True
+
+
+# Beacons (navigator.sendBeacon) não enviam cabeçalhos, então não há token CSRF;
+# o endpoint só grava métricas anônimas da própria sessão
+@csrf_exempt
 @require_http_methods(["POST"])
-def track_view(request):
-    """API endpoint para registrar visualizações e métricas"""
+async def track_view(request):
+    """
+    API endpoint para registrar visualizações e métricas
+    
+    Aceita um objeto ou uma lista de objetos (lote enviado pelo rastreador).
+    Robôs são ignorados, a taxa é limitada por visitante e por IP e métricas
+    que não aumentaram desde o último envio são descartadas (core/beacons.py)
+    """
+    # Os contadores e limites ficam no cache, que pode ser o banco
+    # (DatabaseCache): as chamadas a core/beacons.py saem do event loop
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    if beacons.eh_robo(user_agent):
+        await sync_to_async(beacons.registrar)('robos')
+        return JsonResponse({'status': 'ignored'})
+    
+    ip_address = beacons.ip_do_cliente(request)
+    if not await sync_to_async(beacons.permitir)(request.session.session_key, ip_address):
+        await sync_to_async(beacons.registrar)('limitados')
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Muitas requisições'
+        }, status=429)
+    
     try:
         data = json.loads(request.body)
-        
-        # Obter ou criar session key
-        if not request.session.session_key:
-            request.session.create()
-        
-        # Obter IP do usuário
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
-        else:
-            ip_address = request.META.get('REMOTE_ADDR')
-        
-        # Criar ou atualizar estatística
-        tipo_conteudo = data.get('tipo_conteudo', 'home')
-        conteudo_id = data.get('conteudo_id')
-        
-        # Buscar estatística existente ou criar nova
-        stats, created = EstatisticaVisualizacao.objects.get_or_create(
-            session_key=request.session.session_key,
-            tipo_conteudo=tipo_conteudo,
-            conteudo_id=conteudo_id,
-            defaults={
-                'conteudo_titulo': data.get('conteudo_titulo', ''),
-                'ip_address': ip_address,
-                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-            }
-        )
-        
-        # Atualizar métricas
-        stats.tempo_visualizacao = data.get('tempo_visualizacao', 0)
-        stats.scroll_profundidade = data.get('scroll_profundidade', 0)
-        stats.data_saida = timezone.now()
-        stats.save()
-        
-        return JsonResponse({
-            'status': 'success',
-            'message': 'Estatística registrada com sucesso'
-        })
-        
-    except Exception as e:
+        itens = data if isinstance(data, list) else [data]
+        if len(itens) > MAX_ITENS_RASTREAMENTO or not all(isinstance(item, dict) for item in itens):
+            raise ValueError('Lote inválido')
+        metricas = [beacons.normalizar(item) for item in itens]
+    except (ValueError, TypeError, OverflowError) as e:
         return JsonResponse({
             'status': 'error',
             'message': str(e)
         }, status=400)
+    
+    # Obter ou criar session key
+    if not request.session.session_key:
+        await request.session.acreate()
+    session_key = request.session.session_key
+    
+    agente_id = None
+    registradas = 0
+    for metrica in metricas:
+        if not await sync_to_async(beacons.atualizacao_nova)(session_key, metrica):
+            continue
+        if agente_id is None:
+            agente_id = await sync_to_async(AgenteUsuario.get_id_para)(user_agent)
+        if await _registrar_visualizacao(session_key, metrica, ip_address, agente_id):
+            registradas += 1
+        # Só depois da gravação: se ela falhar, o reenvio não é descartado
+        await sync_to_async(beacons.lembrar_envio)(session_key, metrica)
+    
+    await sync_to_async(beacons.registrar_envio)(registradas, len(metricas) - registradas)
+    return JsonResponse({
+        'status': 'success',
+        'message': 'Estatística registrada com sucesso',
+        'registradas': registradas,
+        'descartadas': len(metricas) - registradas,
+    })
 
 
-def get_postagem_stats(request, pk):
+async def get_postagem_stats(request, pk):
     """API endpoint para obter estatísticas de uma postagem (somente admin)"""
-    if not request.user.is_staff:
+    from datetime import date, timedelta
+    from .estatisticas import contar_unicos, metricas_postagens
+    
+    usuario = await request.auser()
+    if not usuario.is_staff:
         return JsonResponse({'error': 'Sem permissão'}, status=403)
     
-    postagem = get_object_or_404(Postagem, pk=pk)
+    postagem = await aget_object_or_404(Postagem, pk=pk)
+    # Contagens únicas vêm dos esboços HyperLogLog; ?exato=1 conta nas visualizações (auditoria)
+    exato = request.GET.get('exato') == '1'
+    hoje = timezone.localdate()
+    
+    # Período arbitrário: ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+    periodo = 'inicio' in request.GET or 'fim' in request.GET
+    if periodo:
+        try:
+            inicio = date.fromisoformat(request.GET['inicio']) if request.GET.get('inicio') else None
+            fim = date.fromisoformat(request.GET['fim']) if request.GET.get('fim') else None
+        except ValueError:
+            return JsonResponse({'error': 'Datas devem estar no formato AAAA-MM-DD'}, status=400)
+    
+    consultas = [
+        # Tempo, scroll e engajamento saem de uma única consulta agrupada
+        sync_to_async(metricas_postagens)([postagem.pk]),
+        sync_to_async(contar_unicos)('postagem', postagem.pk, exato=exato),
+        sync_to_async(contar_unicos)('postagem', postagem.pk, hoje - timedelta(days=29), hoje, exato=exato),
+    ]
+    if periodo:
+        consultas.append(sync_to_async(contar_unicos)('postagem', postagem.pk, inicio, fim, exato=exato))
+    
+    metricas, total, ultimos_30_dias, *periodo = await asyncio.gather(*consultas)
+    metricas = metricas[postagem.pk]
     
     stats = {
-        'total_visualizacoes': postagem.get_total_visualizacoes(),
-        'tempo_medio': postagem.get_tempo_medio_visualizacao(),
-        'scroll_medio': postagem.get_scroll_medio(),
-        'visualizacoes_30_dias': postagem.get_visualizacoes_ultimos_30_dias(),
-        'taxa_engajamento': postagem.get_taxa_engajamento(),
+        'total_visualizacoes': total,
+        'tempo_medio': metricas['tempo_medio'],
+        'scroll_medio': metricas['scroll_medio'],
+        'visualizacoes_30_dias': ultimos_30_dias,
+        'taxa_engajamento': metricas['taxa_engajamento'],
+        'exato': exato,
     }
+    if periodo:
+        stats['visualizacoes_periodo'] = periodo[0]
     
     return JsonResponse(stats)
+
+
+# Postagens por página na API de estatísticas em lote
+POR_PAGINA_ESTATISTICAS = 50
+MAX_POR_PAGINA_ESTATISTICAS = 200
+
+
+def get_postagens_stats(request):
+    """
+    API endpoint para estatísticas de várias postagens de uma vez (somente admin)
+
+    Parâmetros (todos opcionais):
+        ids: IDs separados por vírgula (ex: ids=1,2,3)
+        categoria: Filtra as postagens pela categoria
+        inicio, fim: Período das visualizações (AAAA-MM-DD)
+        serie: 'dia' ou 'semana' para incluir a série temporal de cada postagem
+        pagina, por_pagina: Paginação (padrão 50 por página, máximo 200)
+    """
+    from datetime import date, timedelta
+    from django.core.paginator import EmptyPage, Paginator
+    from django.utils.cache import patch_cache_control
+    from .estatisticas import SERIES, TIMEOUT_CONTAGENS, metricas_postagens
+    
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Sem permissão'}, status=403)
+    
+    try:
+        inicio = date.fromisoformat(request.GET['inicio']) if request.GET.get('inicio') else None
+        fim = date.fromisoformat(request.GET['fim']) if request.GET.get('fim') else None
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+        pagina = int(request.GET.get('pagina', 1))
+        por_pagina = min(int(request.GET.get('por_pagina', POR_PAGINA_ESTATISTICAS)), MAX_POR_PAGINA_ESTATISTICAS)
+    except ValueError:
+        return JsonResponse({'error': 'Parâmetros inválidos (datas em AAAA-MM-DD, ids e páginas numéricos)'}, status=400)
+    
+    serie = request.GET.get('serie') or None
+    if serie and serie not in SERIES:
+        return JsonResponse({'error': f'Série deve ser uma de: {", ".join(SERIES)}'}, status=400)
+    if serie and inicio is None:
+        # Séries sem início cobririam toda a história; limita aos últimos 30 dias
+        inicio = (fim or timezone.localdate()) - timedelta(days=29)
+    
+    postagens = Postagem.objects.order_by('-data_publicacao', '-pk')
+    if ids:
+        postagens = postagens.filter(pk__in=ids)
+    if request.GET.get('categoria'):
+        postagens = postagens.filter(categoria=request.GET['categoria'])
+    
+    paginador = Paginator(postagens.values('pk', 'titulo', 'categoria', 'status', 'data_publicacao'), max(por_pagina, 1))
+    try:
+        pagina = paginador.page(pagina)
+    except EmptyPage:
+        return JsonResponse({'error': 'Página inexistente'}, status=404)
+    
+    metricas = metricas_postagens([postagem['pk'] for postagem in pagina], inicio, fim, serie)
+    resposta = JsonResponse({
+        'resultados': [{**postagem, **metricas[postagem['pk']]} for postagem in pagina],
+        'pagina': pagina.number,
+        'paginas': paginador.num_pages,
+        'total': paginador.count,
+        'inicio': inicio.isoformat() if inicio else None,
+        'fim': (fim or timezone.localdate()).isoformat(),
+    })
+    # Mesmo prazo do cache das métricas no servidor; só o navegador do admin guarda
+    patch_cache_control(resposta, private=True, max_age=TIMEOUT_CONTAGENS)
+    return resposta
+
+
+def _periodo_painel(parametros):
+    """Período do painel de estatísticas: padrão são os últimos 90 dias consolidados"""
+    from datetime import date, timedelta
+    from .estatisticas import ultimo_dia_consolidado
+    
+    fim = date.fromisoformat(parametros['fim']) if parametros.get('fim') else None
+    fim = fim or ultimo_dia_consolidado() or timezone.localdate() - timedelta(days=1)
+    inicio = date.fromisoformat(parametros['inicio']) if parametros.get('inicio') else fim - timedelta(days=89)
+    return inicio, fim
+
+
+def get_painel_estatisticas(request):
+    """
+    API do painel de estatísticas do site (somente admin)
+    
+    Lê apenas os resumos diários (core/estatisticas.py), então cobre só os
+    dias já consolidados.
+    
+    Parâmetros (todos opcionais):
+        inicio, fim: Período (AAAA-MM-DD); padrão: últimos 90 dias consolidados
+        granularidade: 'dia', 'semana' ou 'mes'; padrão: a menor que mantém
+            a série com até 120 pontos
+    """
+    from django.utils.cache import patch_cache_control
+    from .estatisticas import GRANULARIDADES, TIMEOUT_CONTAGENS, painel
+    
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Sem permissão'}, status=403)
+    
+    try:
+        inicio, fim = _periodo_painel(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Datas devem estar no formato AAAA-MM-DD'}, status=400)
+    if inicio > fim:
+        return JsonResponse({'error': 'O início deve ser anterior ao fim'}, status=400)
+    
+    granularidade = request.GET.get('granularidade') or None
+    if granularidade and granularidade not in GRANULARIDADES:
+        return JsonResponse({'error': f'Granularidade deve ser uma de: {", ".join(GRANULARIDADES)}'}, status=400)
+    
+    resposta = JsonResponse(painel(inicio, fim, granularidade))
+    patch_cache_control(resposta, private=True, max_age=TIMEOUT_CONTAGENS)
+    return resposta
+
+
+@staff_member_required
+def painel_estatisticas(request):
+    """Painel de estatísticas do site no admin (gráficos carregados da API do painel)"""
+    from django.contrib import admin
+    
+    try:
+        inicio, fim = _periodo_painel(request.GET)
+    except ValueError:
+        messages.error(request, 'Datas devem estar no formato AAAA-MM-DD; mostrando o período padrão.')
+        inicio, fim = _periodo_painel({})
+    
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Estatísticas do Site',
+        'inicio': inicio,
+        'fim': fim,
+        'granularidade': request.GET.get('granularidade', ''),
+    }
+    return render(request, 'admin/painel_estatisticas.html', context)
+
+
+def sitemap_xml(request):
+    """sitemap.xml gerado uma vez por versão do conteúdo publicado"""
+    from django.contrib.sitemaps.views import sitemap
+    from .sitemaps import SITEMAPS
+    
+    return servir_em_cache(
+        request, 'sitemap', ('postagens', 'videos'),
+        lambda: sitemap(request, SITEMAPS),
+        'application/xml; charset=utf-8'
+    )
+
+
+def feed_postagens(request, categoria=None, formato='rss'):
+    """Feed RSS/Atom das postagens, geral ou de uma categoria"""
+    feed = PostagemAtomFeed() if formato == 'atom' else PostagemFeed()
+    grupos = (f'postagens:{categoria}',) if categoria else ('postagens',)
+    
+    return servir_em_cache(
+        request, f'feed-postagens-{formato}-{categoria or "todas"}', grupos,
+        lambda: feed(request, categoria=categoria),
+        feed.feed_type.content_type
+    )
+
+
+def feed_videos(request, formato='rss'):
+    """Feed RSS/Atom dos vídeos"""
+    feed = VideoAtomFeed() if formato == 'atom' else VideoFeed()
+    
+    return servir_em_cache(
+        request, f'feed-videos-{formato}', ('videos',),
+        lambda: feed(request),
+        feed.feed_type.content_type
+    )
+
+
+# Documentos legais servidos como página própria e como fragmento dos modais
+DOCUMENTOS_LEGAIS = {
+    'privacidade': {
+        'titulo': 'Política de Privacidade',
+        'icone': 'fa-shield-halved',
+        'campo': 'politica_privacidade',
+        'campo_data': 'politica_privacidade_atualizada',
+        'vazio': 'A política de privacidade ainda não foi configurada. Configure em Configurações do Site no painel admin.',
+    },
+    'termos': {
+        'titulo': 'Termos de Uso',
+        'icone': 'fa-file-contract',
+        'campo': 'termos_uso',
+        'campo_data': 'termos_uso_atualizado',
+        'vazio': 'Os termos de uso ainda não foram configurados. Configure em Configurações do Site no painel admin.',
+    },
+}
+
+
+def _html_documento_legal(documento):
+    """HTML do documento, renderizado uma vez por versão da configuração"""
+    from django.core.cache import cache
+    from django.template.loader import render_to_string
+    from .cache_utils import TIMEOUT_RESPOSTAS, chave_versionada
+    
+    chave = chave_versionada(f'documento-{documento}-html', ('configuracao',))
+    html = cache.get(chave)
+    if html is None:
+        info = DOCUMENTOS_LEGAIS[documento]
+        config = ConfiguracaoSite.get_config()
+        html = render_to_string('core/partials/documento_legal.html', {
+            'documento': info,
+            'texto': getattr(config, info['campo']),
+            'atualizado_em': getattr(config, info['campo_data']),
+        })
+        cache.set(chave, html, TIMEOUT_RESPOSTAS)
+    return html
+
+
+def documento_legal(request, documento, fragmento=False):
+    """Política de privacidade ou termos de uso, gerados uma vez por versão da configuração"""
+    from django.utils.safestring import mark_safe
+    
+    if not fragmento:
+        # Só o documento vai para o cache: a página em volta (base.html) é
+        # renderizada a cada requisição, com o usuário e o token CSRF de quem pede
+        return render(request, 'core/documento_legal.html', {
+            'documento': DOCUMENTOS_LEGAIS[documento],
+            'conteudo': mark_safe(_html_documento_legal(documento)),
+        })
+    
+    return servir_em_cache(
+        request, f'documento-{documento}-fragmento', ('configuracao',),
+        lambda: HttpResponse(_html_documento_legal(documento)), 'text/html; charset=utf-8'
+    )
+
+
+def robots_txt(request):
+    """robots.txt apontando para o sitemap"""
+    linhas = [
+        'User-agent: *',
+        'Disallow: /admin/',
+        'Disallow: /api/',
+        f'Sitemap: {request.build_absolute_uri(reverse("core:sitemap"))}',
+    ]
+    return HttpResponse('\n'.join(linhas) + '\n', content_type='text/plain')
+
+
+@staff_member_required
+def relatorio_desempenho(request):
+    """Relatório de desempenho por URL coletado pela instrumentação (somente admin)"""
+    from django.conf import settings
+    from django.contrib import admin
+    from .instrumentation import agregador
+    
+    if request.method == 'POST':
+        agregador.limpar()
+        beacons.zerar_contadores()
+        messages.success(request, 'Amostras de desempenho e contadores de beacons descartados.')
+        return redirect('relatorio_desempenho')
+    
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Desempenho por URL',
+        'ativa': settings.INSTRUMENTACAO_ATIVA,
+        'linhas': agregador.relatorio(),
+        'amostras_por_url': agregador.amostras_por_url,
+        'beacons': beacons.contadores(),
+    }
+    return render(request, 'admin/relatorio_desempenho.html', context)
@@ -7,6 +7,7 @@ from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
 from core.models import Video
+from core.instrumentation import medir
 
 
 class YouTubeService:
@@ -33,7 +34,8 @@ class YouTubeService:
         feed_url = self.get_channel_feed_url()
         
         try:
-            feed = feedparser.parse(feed_url)
+            with medir('yt', 'youtube.feed'):
+                feed = feedparser.parse(feed_url)
             videos = []
             
             for entry in feed.entries[:max_results]: